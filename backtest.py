@@ -1,21 +1,73 @@
-import pybaseball as pb
+import argparse
 import pandas as pd
-import subprocess
-import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from data_collection import fetch_schedule
+from pipeline import get_win_probability_matrix
+from odds_calculations import american_to_decimal, calculate_adjusted_odds, calculate_edge
+from betting_strategies import calculate_bet_size
+from stats_history import get_team_stats_history
+from utils import TEAM_ABBRS, TEAM_ABBR_ALIASES, parse_game_date
+from tracing import traced, call_with_trace, merge_trace, format_trace_summary, write_trace
 
-def clean_date(date_str):
-    """
-    Clean the date string to handle doubleheaders and ensure a standard format.
-    """
-    clean_date_str = re.sub(r'\(.*\)', '', date_str).strip()
-    return clean_date_str
+# Hardcoded values (same sizing settings as main.py)
+max_bet_percentage = 25
+max_edge = 1.3
+default_odds = 100  # Even money, for games without odds; the schedules carry no prices
+odds_column = 'Odds'  # Optional American odds column in the games frame, used when present
+
+@dataclass
+class GameResult:
+    date: pd.Timestamp
+    team: str
+    opponent: str
+    home: bool
+    win_prob: float
+    odds: float
+    edge: float
+    bet_size: float
+    outcome: int
+    profit: float
+    bankroll: float
+
+@dataclass
+class BacktestResult:
+    team: str
+    year: int
+    initial_bankroll: float
+    total_bets: int = 0
+    profitable_bets: int = 0
+    total_profit: float = 0.0
+    biggest_profit: float = 0.0
+    biggest_loss: float = 0.0
+    final_bankroll: float = 0.0
+    assumed_odds_games: int = 0  # Games settled at the default odds because they had none
+    games: list = field(default_factory=list)
 
+    @property
+    def profitable_bet_percentage(self):
+        return (self.profitable_bets / self.total_bets) * 100 if self.total_bets > 0 else 0
+
+    def to_frame(self):
+        """Returns one row per evaluated game, led by the Date/Team1/Team2/Bet Size/Profit columns."""
+        frame = pd.DataFrame([asdict(game) for game in self.games],
+                             columns=list(GameResult.__dataclass_fields__))
+        frame = frame.rename(columns={
+            'date': 'Date', 'team': 'Team1', 'opponent': 'Team2', 'bet_size': 'Bet Size', 'profit': 'Profit',
+            'home': 'Home', 'win_prob': 'Win Probability', 'odds': 'Odds', 'edge': 'Edge',
+            'outcome': 'Outcome', 'bankroll': 'Bankroll'
+        })
+        frame.insert(0, 'Year', self.year)
+        return frame[['Date', 'Team1', 'Team2', 'Bet Size', 'Profit', 'Year', 'Home',
+                      'Win Probability', 'Odds', 'Edge', 'Outcome', 'Bankroll']]
+
+@traced()
 def fetch_historical_data(team, year):
     """
     Fetch historical game stats for a specific team and year.
     """
     try:
-        games = pb.schedule_and_record(year, team)
+        games = fetch_schedule(year, team)
         if games.empty:
             raise ValueError(f"No data found for {team} in {year}.")
         return games
@@ -23,25 +75,11 @@ def fetch_historical_data(team, year):
         print(f"Error fetching data: {e}")
         return None
 
-def run_main_py(team1, team2, pitcher1, pitcher2, odds_team1, odds_team2):
-    """
-    Run main.py with necessary inputs for a given game between team1 and team2.
-    """
-    try:
-        result = subprocess.run(
-            ["python", "main.py"],
-            input=f"{team1}\n{team2}\n{pitcher1}\n{pitcher2}\n{odds_team1}\n{odds_team2}\n",
-            capture_output=True,
-            text=True
-        )
-        output = result.stdout.strip()
-        return output
-    except Exception as e:
-        return None
-
 def calculate_profit_loss(bet_size, team_odds, outcome):
     """
     Calculate the profit or loss for a given bet based on the Kelly bet size, odds, and outcome.
+
+    team_odds are decimal odds.
     """
     if outcome == 1:  # Win
         profit = bet_size * (team_odds - 1)  # Profit based on decimal odds
@@ -49,125 +87,232 @@ def calculate_profit_loss(bet_size, team_odds, outcome):
         profit = -bet_size  # The bet amount is lost
     return profit
 
-def extract_edge_from_result(result):
+def evaluate_game(team, opponent, home, year, game_date, bankroll, odds=default_odds,
+                  max_edge=max_edge, max_bet_percentage=max_bet_percentage):
     """
-    Extract the edge percentage for the selected team from the output of main.py.
+    Runs the model, odds and sizing stages for one game on the stats as they stood that morning.
+
+    Returns:
+    tuple: (win_prob, edge, bet_size) for the selected team; bet_size is 0 when no bet is suggested.
     """
-    try:
-        match = re.search(r'Edge: (-?[0-9]+(?:\.[0-9]+)?)%', result)
-        if match:
-            return float(match.group(1))
-        return 0
-    except Exception:
-        return 0
-
-def simulate_betting_strategy(games, bankroll, team, max_games):
+    # Pairwise win probabilities for the whole league that morning, shared by every game on the date
+    matrix = get_win_probability_matrix(year, as_of=game_date)
+    if team not in matrix.index or opponent not in matrix.index:
+        raise ValueError(f"No stats for {team} vs {opponent} in {year}.")
+
+    # main.py scores the away team first: win_prob = original_method(away_stats, home_stats)
+    if home:
+        win_prob = 1 - matrix.at[opponent, team]
+    else:
+        win_prob = matrix.at[team, opponent]
+
+    implied_prob = 1 / american_to_decimal(odds)
+    adjusted_odds = calculate_adjusted_odds(odds, win_prob, implied_prob)
+    edge = calculate_edge(adjusted_odds, odds)
+    bet_size = calculate_bet_size(edge, max_edge, max_bet_percentage, bankroll)
+    return win_prob, edge, bet_size if bet_size is not None else 0
+
+@traced()
+def simulate_betting_strategy(games, bankroll, team, max_games, year, odds=default_odds,
+                              max_edge=max_edge, max_bet_percentage=max_bet_percentage, verbose=True):
     """
-    Simulate bets on historical games by automatically running main.py.
+    Simulate bets on historical games by running the prediction pipeline in-process.
+
+    Games are priced from their odds_column when the frame has one; the rest are priced
+    at odds (even money by default) and counted in assumed_odds_games, since a backtest
+    at even money overstates the return on favorites.
+
+    Returns:
+    BacktestResult: Aggregate metrics plus one GameResult per evaluated game.
     """
-    total_bets = 0
-    profitable_bets = 0
-    total_profit = 0
-    biggest_profit = 0
-    biggest_loss = 0
-    profit_history = []
-    
-    # Only process the first 'max_games' games
-    games = games.head(max_games)
-
-    for idx, game in games.iterrows():
-        # Clean the date before parsing
-        game_date_str = clean_date(game['Date'])
-
-        team1 = game['Tm']
-        team2 = game['Opp']
-        pitcher1 = "Unknown_Pitcher1"  # Placeholder for pitcher name (can be enhanced)
-        pitcher2 = "Unknown_Pitcher2"  # Placeholder for pitcher name
-        team1_odds = 100  # Replace with actual odds from dataset if available
-        team2_odds = -110  # Replace with actual odds from dataset if available
-
-        # Only run the Kelly Criterion bet check if the selected team is involved
-        if team1 == team:
-            result = run_main_py(team1, team2, pitcher1, pitcher2, team1_odds, team2_odds)
-        else:
-            continue  # Skip the game if the selected team is not team1
-        
-        if result is None:
-            continue  # Skip if no result is returned or main.py fails
+    result = BacktestResult(team=team, year=year, initial_bankroll=bankroll, final_bankroll=bankroll)
 
-        # Simulate the win/loss from historical data for the selected team
-        outcome = 1 if game['W/L'] == 'W' else 0  # 1 for win, 0 for loss
+    # Only process completed games, up to 'max_games'
+    games = games[games['W/L'].notna()].head(max_games)
 
-        # Parse the result from main.py to get the Kelly bet suggestion
-        bet_size = extract_bet_size_from_result(result)  # This function should extract the bet size from the result
-        edge = extract_edge_from_result(result)  # Extract edge percentage
+    for game_number, (_, game) in enumerate(games.iterrows(), start=1):
+        game_date = parse_game_date(game['Date'], year)
+        if pd.isna(game_date):
+            continue
 
-        if bet_size > 0:  # Only calculate if a bet is suggested
-            total_bets += 1
-            if team1 == team:
-                team_odds = team1_odds
-            else:
-                team_odds = team2_odds
+        opponent = TEAM_ABBR_ALIASES.get(game['Opp'], game['Opp'])
+        home = game.get('Home_Away') != '@'
+        game_odds = game.get(odds_column)
+        assumed_odds = game_odds is None or pd.isna(game_odds)
+        if assumed_odds:
+            game_odds = odds
 
-            profit = calculate_profit_loss(bet_size, team_odds, outcome)
+        try:
+            win_prob, edge, bet_size = evaluate_game(
+                team, opponent, home, year, game_date, bankroll, game_odds, max_edge, max_bet_percentage)
+        except ValueError as e:
+            print(f"Skipping game {game_number}: {e}")
+            continue
+        result.assumed_odds_games += assumed_odds
+
+        # Simulate the win/loss from historical data for the selected team
+        outcome = 1 if str(game['W/L']).startswith('W') else 0  # 1 for win (including walk-offs), 0 for loss
+
+        profit = 0.0
+        if bet_size > 0:  # Only calculate if a bet is suggested
+            result.total_bets += 1
+            profit = calculate_profit_loss(bet_size, american_to_decimal(game_odds), outcome)
 
             # Track the biggest profit/loss
             if profit > 0:
-                profitable_bets += 1
-                biggest_profit = max(biggest_profit, profit)
+                result.profitable_bets += 1
+                result.biggest_profit = max(result.biggest_profit, profit)
             else:
-                biggest_loss = min(biggest_loss, profit)
+                result.biggest_loss = min(result.biggest_loss, profit)
 
             bankroll += profit
-            total_profit += profit
-            profit_history.append((game['Date'], team1, team2, bet_size, profit))
+            result.total_profit += profit
 
-        # Print the edge % in the progress message
-        print(f"Processing game {idx + 1}/{max_games}... Edge for {team}: {edge:.2f}%")
+        result.games.append(GameResult(game_date, team, opponent, home, win_prob, game_odds, edge,
+                                       bet_size, outcome, profit, bankroll))
 
-    profitable_bet_percentage = (profitable_bets / total_bets) * 100 if total_bets > 0 else 0
-    return total_bets, total_profit, biggest_profit, biggest_loss, bankroll, profitable_bet_percentage
+        if verbose:
+            print(f"Processing game {game_number}/{len(games)}... Edge for {team}: {edge:.2f}%")
 
-def extract_bet_size_from_result(result):
-    """
-    Extract the Kelly Criterion suggested bet size from the output of main.py.
-    """
-    try:
-        # Look for the line where the bet size is mentioned in result (e.g., "$100.00")
-        match = re.search(r'\$([0-9]+(?:\.[0-9]+)?)', result)
-        if match:
-            return float(match.group(1))
-        return 0
-    except Exception:
-        return 0
-
-def backtest_team(team, year, initial_bankroll=1000):
+    result.final_bankroll = bankroll
+    return result
+
+@traced()
+def backtest_team(team, year, initial_bankroll=1000, max_games=162, verbose=True):
     """
     Backtest a specific team's performance over a season using the main.py prediction logic.
     """
-    print(f"Backtesting {team} for the {year} season...")
-
-    # Ask the user how many games they want to backtest
-    max_games = int(input(f"Enter the number of games to backtest for {team} in {year}: "))
+    if verbose:
+        print(f"Backtesting {team} for the {year} season...")
 
     games = fetch_historical_data(team, year)
     if games is None:
-        return
+        return None
 
-    total_bets, total_profit, biggest_profit, biggest_loss, final_bankroll, profitable_bet_percentage = simulate_betting_strategy(
-        games, initial_bankroll, team, max_games)
+    return simulate_betting_strategy(games, initial_bankroll, team, max_games, year, verbose=verbose)
 
-    # Final output once the backtest is complete
-    print("\nBacktest Results:")
-    print(f"Total Bets: {total_bets}")
-    print(f"Total Profit/Loss: {total_profit:.2f}")
-    print(f"Biggest Profit: {biggest_profit:.2f}")
-    print(f"Biggest Loss: {biggest_loss:.2f}")
-    print(f"Ending Bankroll: {final_bankroll:.2f}")
-    print(f"Profitable Bets: {profitable_bet_percentage:.2f}%")
+def summarize_backtests(results):
+    """
+    Builds one row of aggregate metrics per (team, season) shard, plus an 'ALL' row
+    whose Ending Bankroll is the mean over the shards.
+    """
+    rows = []
+    for result in results:
+        staked = sum(game.bet_size for game in result.games)
+        rows.append({
+            'Team': result.team,
+            'Year': result.year,
+            'Games': len(result.games),
+            'Total Bets': result.total_bets,
+            'Profitable Bets %': result.profitable_bet_percentage,
+            'Total Staked': staked,
+            'Total Profit': result.total_profit,
+            'ROI %': (result.total_profit / staked) * 100 if staked > 0 else 0,
+            'Biggest Profit': result.biggest_profit,
+            'Biggest Loss': result.biggest_loss,
+            'Ending Bankroll': result.final_bankroll,
+            'Assumed Odds Games': result.assumed_odds_games
+        })
+
+    summary = pd.DataFrame(rows, columns=['Team', 'Year', 'Games', 'Total Bets', 'Profitable Bets %',
+                                          'Total Staked', 'Total Profit', 'ROI %', 'Biggest Profit',
+                                          'Biggest Loss', 'Ending Bankroll', 'Assumed Odds Games'])
+    if summary.empty:
+        return summary
+
+    total_bets = summary['Total Bets'].sum()
+    profitable_bets = sum(result.profitable_bets for result in results)
+    staked = summary['Total Staked'].sum()
+    total_profit = summary['Total Profit'].sum()
+    summary.loc[len(summary)] = {
+        'Team': 'ALL',
+        'Year': None,
+        'Games': summary['Games'].sum(),
+        'Total Bets': total_bets,
+        'Profitable Bets %': (profitable_bets / total_bets) * 100 if total_bets > 0 else 0,
+        'Total Staked': staked,
+        'Total Profit': total_profit,
+        'ROI %': (total_profit / staked) * 100 if staked > 0 else 0,
+        'Biggest Profit': summary['Biggest Profit'].max(),
+        'Biggest Loss': summary['Biggest Loss'].min(),
+        # Every shard starts from the same bankroll, so summing their endings means nothing
+        'Ending Bankroll': summary['Ending Bankroll'].mean(),
+        'Assumed Odds Games': summary['Assumed Odds Games'].sum()
+    }
+    return summary
+
+@traced()
+def run_backtests(teams, seasons, initial_bankroll=1000, max_games=162, processes=None):
+    """
+    Backtests every (team, season) pair, sharded across a process pool.
+
+    Each season's point-in-time stats store is built once in the parent first, so the
+    workers only read it from the on-disk cache.
+
+    Args:
+    teams (list): Team abbreviations.
+    seasons (list): Seasons to backtest.
+    initial_bankroll (float): Starting bankroll for each shard.
+    max_games (int): Maximum number of games per shard.
+    processes (int): Worker processes; defaults to the CPU count.
+
+    Returns:
+    tuple: (combined per-game results DataFrame, summary DataFrame).
+    """
+    for year in seasons:
+        get_team_stats_history(year)
+
+    shards = [(team, year) for year in seasons for team in teams]
+    results = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {
+            executor.submit(call_with_trace, backtest_team, team, year, initial_bankroll, max_games, False): (team, year)
+            for team, year in shards
+        }
+        for future in as_completed(futures):
+            team, year = futures[future]
+            try:
+                result, trace = future.result()
+            except Exception as e:
+                print(f"Backtest {team} {year} failed: {e}")
+                continue
+            merge_trace(trace)  # The worker's spans, so the run report covers the whole backtest
+            if result is not None:
+                print(f"Finished {team} {year}: {result.total_bets} bets, profit {result.total_profit:.2f}")
+                results.append(result)
+
+    results.sort(key=lambda result: (result.year, result.team))
+    frames = [result.to_frame() for result in results]
+    combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return combined, summarize_backtests(results)
 
 if __name__ == "__main__":
-    # Backtest the system for a specific team and year
-    team = 'NYY'  # New York Yankees
-    year = 2024
-    backtest_team(team, year, initial_bankroll=103.58)
+    parser = argparse.ArgumentParser(description="Backtest the betting algorithm over teams and seasons.")
+    parser.add_argument('--teams', nargs='+', default=['NYY'], help="Team abbreviations, or 'all'")
+    parser.add_argument('--seasons', nargs='+', type=int, default=[2024])
+    parser.add_argument('--bankroll', type=float, default=103.58)
+    parser.add_argument('--max-games', type=int, default=162)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', default=None, help="Combined results CSV (default backtest_<team>_<season>.csv)")
+    parser.add_argument('--trace', action='store_true', help="Print the timing report and append it to the trace file")
+    args = parser.parse_args()
+
+    teams = TEAM_ABBRS if args.teams == ['all'] else args.teams
+    combined, summary = run_backtests(teams, args.seasons, args.bankroll, args.max_games, args.processes)
+
+    output_file = args.output
+    if output_file is None:
+        output_file = f"backtest_{'_'.join(teams) if len(teams) <= 3 else 'ALL'}_{'_'.join(map(str, args.seasons))}.csv"
+    combined.to_csv(output_file, index=False)
+
+    print("\nBacktest Results:")
+    print(summary.to_string(index=False))
+    if not summary.empty and summary['Assumed Odds Games'].iloc[-1] > 0:
+        print(f"\nNote: {summary['Assumed Odds Games'].iloc[-1]} games had no odds and were settled at "
+              f"{default_odds:+.0f} (even money), so profit and ROI do not reflect real prices.")
+    print(f"\nPer-game results written to {output_file}")
+
+    if args.trace:
+        write_trace('backtest')
+        print("\nTiming Report:")
+        print(format_trace_summary())
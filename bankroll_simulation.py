@@ -0,0 +1,171 @@
+import argparse
+import numpy as np
+import pandas as pd
+from betting_strategies import calculate_bet_size_array
+from odds_calculations import american_to_decimal_array
+
+# Hardcoded values (same sizing settings as main.py)
+bankroll = 41
+max_bet_percentage = 25
+max_edge = 1.3
+SIMULATED_SEASONS = 100000
+RUIN_PERCENTAGE = 10  # A season is ruined once the bankroll falls to this share of its start
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+def load_bets(backtest_results):
+    """
+    Extracts the candidate bets from backtest output.
+
+    Args:
+    backtest_results (DataFrame or str): The combined per-game DataFrame from backtest.run_backtests,
+    or the path of the CSV it writes.
+
+    Returns:
+    DataFrame: One row per game with 'win_prob', 'decimal_odds', 'edge' and 'outcome'.
+    """
+    if isinstance(backtest_results, str):
+        backtest_results = pd.read_csv(backtest_results)
+    missing = {'Win Probability', 'Odds', 'Edge', 'Outcome'} - set(backtest_results.columns)
+    if missing:
+        raise ValueError(f"Backtest results are missing columns: {', '.join(sorted(missing))}")
+
+    bets = pd.DataFrame({
+        'win_prob': backtest_results['Win Probability'].astype(float),
+        'decimal_odds': american_to_decimal_array(backtest_results['Odds'].astype(float)),
+        'edge': backtest_results['Edge'].astype(float),
+        'outcome': backtest_results['Outcome'].astype(int)
+    })
+    return bets.dropna().reset_index(drop=True)
+
+def stake_fractions(edges, max_edge=max_edge, max_bet_percentage=max_bet_percentage):
+    """
+    Returns calculate_bet_size's stake for each edge as a fraction of the current bankroll,
+    capped at the whole bankroll.
+    """
+    return np.minimum(calculate_bet_size_array(edges, max_edge, max_bet_percentage, 1.0), 1.0)
+
+def simulate_seasons(bets, initial_bankroll=bankroll, max_edge=max_edge, max_bet_percentage=max_bet_percentage,
+                     seasons=SIMULATED_SEASONS, mode='replay', outcomes='model', bets_per_season=None, seed=0):
+    """
+    Simulates many seasons of betting at once, vectorized across seasons.
+
+    Each bet stakes calculate_bet_size's share of the bankroll as it stands at that point,
+    the same as simulate_betting_strategy does.
+
+    Args:
+    bets (DataFrame): Output of load_bets.
+    initial_bankroll (float): Starting bankroll of every season.
+    max_edge (float): The maximum allowable edge.
+    max_bet_percentage (float): The maximum bet size as a percentage of the bankroll.
+    seasons (int): Number of simulated seasons.
+    mode (str): 'replay' bets the same sequence every season; 'bootstrap' draws each season's
+    bets with replacement from the backtest.
+    outcomes (str): 'model' draws each result from the model's win probability;
+    'historical' uses the game's real result (bootstrap mode only).
+    bets_per_season (int): Games per bootstrapped season; defaults to the backtest length.
+    seed (int): Random seed.
+
+    Returns:
+    dict: 'ending_bankroll', 'max_drawdown' (fraction below the running peak) and 'ruined' arrays, one entry per season.
+    """
+    if mode not in ('replay', 'bootstrap'):
+        raise ValueError(f"Unknown simulation mode '{mode}'.")
+    if outcomes not in ('model', 'historical'):
+        raise ValueError(f"Unknown outcome source '{outcomes}'.")
+    if outcomes == 'historical' and mode == 'replay':
+        raise ValueError("Historical outcomes only vary between seasons in bootstrap mode.")
+
+    rng = np.random.default_rng(seed)
+    fractions = stake_fractions(bets['edge'].to_numpy(), max_edge, max_bet_percentage)
+    win_probs = bets['win_prob'].to_numpy()
+    payouts = bets['decimal_odds'].to_numpy() - 1
+    results = bets['outcome'].to_numpy().astype(bool)
+    game_count = len(bets) if bets_per_season is None or mode == 'replay' else bets_per_season
+
+    current = np.full(seasons, float(initial_bankroll))
+    peak = current.copy()
+    lowest = current.copy()
+    max_drawdown = np.zeros(seasons)
+
+    # Step through the season one game at a time, with every simulated season in one array
+    for game in range(game_count):
+        if mode == 'replay':
+            picks = game
+        else:
+            picks = rng.integers(0, len(bets), seasons)
+
+        if outcomes == 'model':
+            won = rng.random(seasons) < win_probs[picks]
+        else:
+            won = results[picks]
+
+        stakes = fractions[picks] * current
+        current = current + np.where(won, stakes * payouts[picks], -stakes)
+
+        np.maximum(peak, current, out=peak)
+        np.minimum(lowest, current, out=lowest)
+        np.maximum(max_drawdown, 1 - current / peak, out=max_drawdown)
+
+    return {
+        'ending_bankroll': current,
+        'max_drawdown': max_drawdown,
+        'ruined': lowest <= initial_bankroll * RUIN_PERCENTAGE / 100
+    }
+
+def summarize_simulation(simulation, initial_bankroll=bankroll, quantiles=QUANTILES):
+    """
+    Summarizes simulated seasons.
+
+    Returns:
+    dict: Ending-bankroll and max-drawdown quantiles, mean ending bankroll,
+    probability of finishing below the starting bankroll, and risk of ruin.
+    """
+    ending = simulation['ending_bankroll']
+    summary = {
+        'Seasons': len(ending),
+        'Mean Ending Bankroll': float(ending.mean()),
+        'P(Ending < Start)': float((ending < initial_bankroll).mean()),
+        'Risk of Ruin': float(simulation['ruined'].mean())
+    }
+    for q, value in zip(quantiles, np.quantile(ending, quantiles)):
+        summary[f"Ending Bankroll p{q * 100:g}"] = float(value)
+    for q, value in zip(quantiles, np.quantile(simulation['max_drawdown'], quantiles)):
+        summary[f"Max Drawdown p{q * 100:g}"] = float(value)
+    return summary
+
+def compare_settings(bets, max_bet_percentages, max_edges, initial_bankroll=bankroll, **simulation):
+    """
+    Simulates every (max_bet_percentage, max_edge) combination on the same random seed.
+
+    Extra keyword arguments are passed to simulate_seasons.
+
+    Returns:
+    DataFrame: One summary row per setting.
+    """
+    rows = []
+    for bet_percentage in max_bet_percentages:
+        for edge_cap in max_edges:
+            result = simulate_seasons(bets, initial_bankroll, edge_cap, bet_percentage, **simulation)
+            row = {'Max Bet %': bet_percentage, 'Max Edge': edge_cap}
+            row.update(summarize_simulation(result, initial_bankroll))
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo bankroll and risk-of-ruin simulation over backtest bets.")
+    parser.add_argument('input', help="Per-game backtest CSV written by backtest.py")
+    parser.add_argument('--bankroll', type=float, default=bankroll)
+    parser.add_argument('--max-bet-percentage', type=float, nargs='+', default=[max_bet_percentage])
+    parser.add_argument('--max-edge', type=float, nargs='+', default=[max_edge])
+    parser.add_argument('--seasons', type=int, default=SIMULATED_SEASONS)
+    parser.add_argument('--mode', choices=['replay', 'bootstrap'], default='replay')
+    parser.add_argument('--outcomes', choices=['model', 'historical'], default='model')
+    parser.add_argument('--bets-per-season', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    bets = load_bets(args.input)
+    summary = compare_settings(bets, args.max_bet_percentage, args.max_edge, args.bankroll,
+                               seasons=args.seasons, mode=args.mode, outcomes=args.outcomes,
+                               bets_per_season=args.bets_per_season, seed=args.seed)
+    print(summary.T.to_string(header=False) if len(summary) == 1 else summary.to_string(index=False))
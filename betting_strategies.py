@@ -1,3 +1,11 @@
+import numpy as np
+
+# Hardcoded values
+KELLY_FRACTION = 0.5  # Stake this share of the full-Kelly solution
+KELLY_MAX_TOTAL_PERCENTAGE = 95  # Never have more than this share of the bankroll open at once
+KELLY_EXACT_MAX_SCENARIOS = 2 ** 16  # Enumerate every joint outcome up to this many scenarios (16 distinct bets)
+KELLY_SCENARIOS = 200000  # Stratified outcome scenarios for larger slates
+
 def calculate_bet_size(edge, max_edge, max_bet_percentage, bankroll):
     """
     Calculate the suggested bet size based on the edge, max edge, and bankroll.
@@ -38,4 +46,133 @@ def suggested_bet_size(edge, max_edge, max_bet_percentage, bankroll):
     Returns:
     float: The suggested bet size in dollars, or None if the edge is 1% or less.
     """
-    return calculate_bet_size(edge, max_edge, max_bet_percentage, bankroll)
\ No newline at end of file
+    return calculate_bet_size(edge, max_edge, max_bet_percentage, bankroll)
+
+def calculate_bet_size_array(edges, max_edge, max_bet_percentage, bankroll):
+    """
+    Vectorized calculate_bet_size over many edges.
+
+    Args:
+    edges (ndarray or Series): The calculated edges.
+    max_edge (float): The maximum allowable edge.
+    max_bet_percentage (float): The maximum bet size as a percentage of the bankroll.
+    bankroll (float): The current bankroll.
+
+    Returns:
+    ndarray: The suggested bet sizes in dollars, 0 where the edge is 1% or less.
+    """
+    edges = np.asarray(edges, dtype=float)
+    edge_ratio = (edges - 1) / (max_edge - 1)
+    max_bet_size = (max_bet_percentage / 100) * bankroll
+    return np.where(edges > 1.00, edge_ratio * max_bet_size, 0.0)
+
+def group_bets(win_probs, decimal_odds):
+    """
+    Groups identical bets (same win probability and odds), which share one optimal stake.
+
+    Returns:
+    tuple: (group, probs, odds, counts) where group maps each bet to its group and
+    probs, odds and counts describe the groups.
+    """
+    pairs = np.column_stack([win_probs, decimal_odds])
+    unique, group, counts = np.unique(pairs, axis=0, return_inverse=True, return_counts=True)
+    return group.ravel(), unique[:, 0], unique[:, 1], counts
+
+def kelly_scenarios(win_probs, counts=None, exact_max_scenarios=KELLY_EXACT_MAX_SCENARIOS,
+                    scenarios=KELLY_SCENARIOS, seed=0):
+    """
+    Builds the joint outcomes of groups of independent bets and their probabilities.
+
+    Args:
+    win_probs (array-like): Win probability of each bet in each group.
+    counts (array-like): Number of identical bets in each group; 1 each by default.
+
+    Returns:
+    tuple: (wins, weights) where wins is an (S, G) matrix of the number of bets won in
+    each group and weights the (S,) scenario probabilities. Every outcome is enumerated
+    while there are at most exact_max_scenarios of them; beyond that, equally weighted
+    Latin hypercube scenarios stratify each group's win count, so only the pairing of
+    outcomes across groups is sampled.
+    """
+    from scipy.stats import binom
+
+    win_probs = np.asarray(win_probs, dtype=float)
+    counts = np.ones(len(win_probs), dtype=int) if counts is None else np.asarray(counts, dtype=int)
+    if np.prod(counts + 1.0) <= exact_max_scenarios:
+        grids = np.meshgrid(*[np.arange(count + 1) for count in counts], indexing='ij')
+        wins = np.stack([grid.ravel() for grid in grids], axis=1)
+        weights = np.prod(binom.pmf(wins, counts, win_probs), axis=1)
+    else:
+        rng = np.random.default_rng(seed)
+        strata = rng.permuted(np.tile(np.arange(scenarios), (len(counts), 1)), axis=1).T
+        quantiles = (strata + 1 - rng.random(strata.shape)) / scenarios  # In (0, 1], one per stratum
+        wins = binom.ppf(quantiles, counts, win_probs).astype(int)
+        weights = np.full(scenarios, 1 / scenarios)
+    return wins, weights
+
+def simultaneous_kelly(win_probs, decimal_odds, bankroll=None, kelly_fraction=KELLY_FRACTION,
+                       max_bet_percentage=None, max_total_percentage=KELLY_MAX_TOTAL_PERCENTAGE,
+                       exact_max_scenarios=KELLY_EXACT_MAX_SCENARIOS, scenarios=KELLY_SCENARIOS, seed=0):
+    """
+    Sizes every bet on a slate at once by maximizing the expected log bankroll, so that
+    bets open on the same day share one bankroll instead of each being sized alone.
+
+    Bets are treated as independent, so pass at most one side of any game. Only
+    positive-expectation bets are staked; the rest get 0. Identical bets always get
+    identical stakes.
+
+    Args:
+    win_probs (array-like): Win probability of each candidate bet.
+    decimal_odds (array-like): Decimal odds of each candidate bet.
+    bankroll (float): If given, stakes are returned in dollars instead of bankroll fractions.
+    kelly_fraction (float): Share of the full-Kelly stakes to bet (e.g. 0.5 for half Kelly).
+    max_bet_percentage (float): Optional cap on any single stake, as a percentage of the bankroll.
+    max_total_percentage (float): Cap on the combined stakes, as a percentage of the bankroll.
+    exact_max_scenarios (int): Largest number of joint outcomes solved exactly; larger slates are sampled.
+    scenarios (int): Number of sampled outcome scenarios for larger slates.
+    seed (int): Seed for the sampled scenarios.
+
+    Returns:
+    ndarray: The stake of each bet, aligned with win_probs.
+    """
+    from scipy.optimize import minimize
+
+    win_probs = np.asarray(win_probs, dtype=float)
+    decimal_odds = np.asarray(decimal_odds, dtype=float)
+    stakes = np.zeros(len(win_probs))
+
+    positive = win_probs * decimal_odds > 1
+    if positive.any():
+        # One stake per group of identical bets, so symmetric bets cannot drift apart
+        group, probs, odds, counts = group_bets(win_probs[positive], decimal_odds[positive])
+        wins, weights = kelly_scenarios(probs, counts, exact_max_scenarios, scenarios, seed)
+        # Return per unit staked on each bet of a group, summed over the group: w(o - 1) - (k - w)
+        returns = wins * odds - counts
+
+        max_total = max_total_percentage / 100
+        max_bet = min(max_bet_percentage / 100, max_total) if max_bet_percentage is not None else max_total
+        # The optimizer works on full-Kelly fractions, so the total cap is scaled up to match
+        # (but kept short of the whole bankroll, where losing every bet leaves nothing)
+        full_max_total = min(max_total / kelly_fraction, 1 - 1e-6)
+
+        def negative_growth(fractions):
+            wealth = np.maximum(1 + returns @ fractions, 1e-12)  # Keep the log finite at the bounds
+            return -weights @ np.log(wealth), -(weights / wealth) @ returns
+
+        # Start from the individual Kelly stakes, scaled down to fit the bankroll
+        initial = np.minimum((probs * odds - 1) / (odds - 1), full_max_total)
+        if counts @ initial > full_max_total:
+            initial *= full_max_total / (counts @ initial)
+
+        solution = minimize(
+            negative_growth, initial, jac=True, method='SLSQP',
+            bounds=[(0, full_max_total)] * len(probs),
+            constraints=[{'type': 'ineq', 'fun': lambda fractions: full_max_total - counts @ fractions,
+                          'jac': lambda fractions: -counts.astype(float)}]
+        )
+        if not solution.success:
+            print(f"Kelly optimization did not converge: {solution.message}")
+        # Scale to the Kelly fraction first, then cap each stake
+        stakes[positive] = np.minimum(np.clip(solution.x, 0, None) * kelly_fraction, max_bet)[group]
+
+    return stakes * bankroll if bankroll is not None else stakes
@@ -0,0 +1,134 @@
+import argparse
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime
+
+# Hardcoded values (same sizing settings as main.py)
+bankroll = 41
+max_bet_percentage = 25
+max_edge = 1.3
+
+# Each command imports only the modules it needs, inside the command, so the
+# interpreter never loads PyQt5, matplotlib or the modules of the other commands.
+
+def write_frame(frame, output_format, output_file=None):
+    """
+    Writes a DataFrame as JSON records or CSV, to a file or to stdout.
+    """
+    if output_format == 'json':
+        text = frame.to_json(orient='records', indent=2, date_format='iso') + '\n'
+    else:
+        text = frame.to_csv(index=False)
+
+    if output_file:
+        with open(output_file, 'w', newline='') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+def matchup_command(args):
+    import pandas as pd
+    from pipeline import run_matchup, build_matchup_record
+
+    results = run_matchup(args.home, args.away, args.home_pitcher, args.away_pitcher, args.home_odds, args.away_odds,
+                          args.year, bankroll=args.bankroll, max_edge=args.max_edge,
+                          max_bet_percentage=args.max_bet_percentage)
+    record = build_matchup_record(datetime.now().strftime('%Y-%m-%d'), args.home, args.away, results)
+
+    if not args.no_save:
+        from matchup_log import append_matchup
+        from prediction_history import record_prediction
+        append_matchup(record)
+        record_prediction(record, game_number=args.game_number)
+    return pd.DataFrame([record])
+
+def slate_command(args):
+    from slate import load_slate, slate_from_schedules, run_slate
+
+    if args.schedule:
+        games = load_slate(args.schedule)
+    elif args.date:
+        # Schedules have no odds, so there is nothing to score yet: output the template
+        print("Schedule-built slates have no odds; fill in home_odds and away_odds and "
+              "pass the file back to the slate command to score it.")
+        return slate_from_schedules(args.date, args.year)
+    else:
+        raise ValueError("Give a schedule file or --date.")
+    return run_slate(games, args.year, save=not args.no_save, bankroll=args.bankroll, max_edge=args.max_edge,
+                     max_bet_percentage=args.max_bet_percentage, kelly=args.kelly)
+
+def backtest_command(args):
+    from backtest import run_backtests
+    from utils import TEAM_ABBRS
+
+    teams = TEAM_ABBRS if args.teams == ['all'] else args.teams
+    combined, summary = run_backtests(teams, args.seasons, args.bankroll, args.max_games, args.processes)
+    if not summary.empty and summary['Assumed Odds Games'].iloc[-1] > 0:
+        print(f"Note: {summary['Assumed Odds Games'].iloc[-1]} games had no odds and were settled at even money.")
+    return combined if args.games else summary
+
+def add_sizing_arguments(parser, default_bankroll):
+    parser.add_argument('--bankroll', type=float, default=default_bankroll)
+    parser.add_argument('--max-edge', type=float, default=max_edge)
+    parser.add_argument('--max-bet-percentage', type=float, default=max_bet_percentage)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless entry point for the MLB betting algorithm.")
+    parser.add_argument('--format', choices=['json', 'csv'], default='json', help="Output format (default json)")
+    parser.add_argument('--output', default=None, help="Write to this file instead of stdout")
+    parser.add_argument('--trace', action='store_true',
+                        help="Print the timing report to stderr and append it to the trace file")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    matchup_parser = subparsers.add_parser('matchup', help="Score a single matchup")
+    matchup_parser.add_argument('home', help="Home team abbreviation")
+    matchup_parser.add_argument('away', help="Away team abbreviation")
+    matchup_parser.add_argument('home_odds', type=float, help="Home American odds")
+    matchup_parser.add_argument('away_odds', type=float, help="Away American odds")
+    matchup_parser.add_argument('--home-pitcher', default=None)
+    matchup_parser.add_argument('--away-pitcher', default=None)
+    matchup_parser.add_argument('--year', type=int, default=None)
+    matchup_parser.add_argument('--game-number', type=int, default=1, help="2 for the second game of a doubleheader")
+    matchup_parser.add_argument('--no-save', action='store_true', help="Do not write to the matchup log or prediction history")
+    add_sizing_arguments(matchup_parser, bankroll)
+    matchup_parser.set_defaults(run=matchup_command)
+
+    slate_parser = subparsers.add_parser('slate', help="Score a full day's slate in one batch")
+    slate_parser.add_argument('schedule', nargs='?', help="CSV or JSON schedule file")
+    slate_parser.add_argument('--date', default=None, help="Output this date's games from the cached team schedules "
+                                                           "as a slate template to fill in with odds")
+    slate_parser.add_argument('--year', type=int, default=None)
+    slate_parser.add_argument('--kelly', action='store_true', help="Size stakes with the simultaneous Kelly optimizer")
+    slate_parser.add_argument('--no-save', action='store_true', help="Do not write to the matchup log or prediction history")
+    add_sizing_arguments(slate_parser, bankroll)
+    slate_parser.set_defaults(run=slate_command)
+
+    backtest_parser = subparsers.add_parser('backtest', help="Backtest over teams and seasons")
+    backtest_parser.add_argument('--teams', nargs='+', default=['NYY'], help="Team abbreviations, or 'all'")
+    backtest_parser.add_argument('--seasons', nargs='+', type=int, default=[2024])
+    backtest_parser.add_argument('--bankroll', type=float, default=103.58)
+    backtest_parser.add_argument('--max-games', type=int, default=162)
+    backtest_parser.add_argument('--processes', type=int, default=None)
+    backtest_parser.add_argument('--games', action='store_true', help="Output per-game results instead of the summary")
+    backtest_parser.set_defaults(run=backtest_command)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        # Progress messages go to stderr so stdout carries only the JSON or CSV
+        with redirect_stdout(sys.stderr):
+            frame = args.run(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    write_frame(frame, args.format, args.output)
+
+    if args.trace:
+        from tracing import format_trace_summary, write_trace
+        write_trace(args.command)
+        print(format_trace_summary(), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+import os
+import re
+import time
+import tempfile
+import threading
+import functools
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from tracing import span, record_cache
+
+# Hardcoded values (override with the VORTEX_CACHE_* environment variables)
+CACHE_DIR = os.environ.get(
+    'VORTEX_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+CACHE_TTL = float(os.environ.get('VORTEX_CACHE_TTL', 6 * 60 * 60))  # Seconds before a current-season snapshot is stale
+FORCE_REFRESH = os.environ.get('VORTEX_CACHE_REFRESH', '0') not in ('', '0')
+
+# Column used to round-trip endpoints that return a list of frames (e.g. pb.standings)
+PART_COLUMN = '__part__'
+
+# Counters for disk hits and upstream fetches
+CACHE_STATS = {'disk_hits': 0, 'fetches': 0}
+
+# In-process memo caches by function name
+MEMO_CACHES = {}
+
+def configure_cache(cache_dir=None, ttl=None, refresh=None):
+    """
+    Overrides the on-disk cache settings for the current process.
+
+    Args:
+    cache_dir (str): Directory holding the Parquet snapshots.
+    ttl (float): Seconds before a current-season snapshot is refetched.
+    refresh (bool): If True, every lookup refetches and rewrites its snapshot.
+    """
+    global CACHE_DIR, CACHE_TTL, FORCE_REFRESH
+    if cache_dir is not None:
+        CACHE_DIR = cache_dir
+    if ttl is not None:
+        CACHE_TTL = float(ttl)
+    if refresh is not None:
+        FORCE_REFRESH = bool(refresh)
+
+def _format_key_part(value):
+    return re.sub(r'[^A-Za-z0-9.=-]+', '-', str(value)).strip('-')
+
+def snapshot_path(endpoint, season, *args, **kwargs):
+    """
+    Builds the snapshot file path for an (endpoint, season, args) key.
+
+    Args:
+    endpoint (str): Name of the upstream endpoint, e.g. 'team_batting'.
+    season (int): The season the frame belongs to.
+
+    Returns:
+    str: Path of the Parquet snapshot.
+    """
+    parts = [endpoint, str(season)]
+    parts += [_format_key_part(arg) for arg in args]
+    parts += [_format_key_part(f"{k}={v}") for k, v in sorted(kwargs.items())]
+    return os.path.join(CACHE_DIR, '_'.join(parts) + '.parquet')
+
+def is_fresh(path, season, ttl=None):
+    """Completed seasons never go stale; the current season expires after the TTL."""
+    if not os.path.exists(path):
+        return False
+    if season < datetime.now().year:
+        return True
+    ttl = CACHE_TTL if ttl is None else ttl
+    return (time.time() - os.path.getmtime(path)) < ttl
+
+def read_snapshot(path):
+    frame = pd.read_parquet(path)
+    if PART_COLUMN in frame.columns:
+        return [part.drop(columns=PART_COLUMN).reset_index(drop=True)
+                for _, part in frame.groupby(PART_COLUMN, sort=True)]
+    return frame
+
+def write_snapshot(path, data):
+    """
+    Writes the frame (or list of frames) atomically so a crash never leaves a torn file.
+    Each writer gets its own temp file, so concurrent writers of one snapshot cannot tear it.
+    """
+    if isinstance(data, list):
+        if not data:
+            return
+        frame = pd.concat([part.assign(**{PART_COLUMN: i}) for i, part in enumerate(data)],
+                          ignore_index=True)
+    else:
+        frame = data
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Could not write cache snapshot {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def upstream(name):
+    """
+    Returns a stand-in for a pybaseball function that imports pybaseball on its first call.
+
+    pybaseball is slow to import, so with a warm cache it is never imported at all.
+    """
+    def fetch(*args, **kwargs):
+        import pybaseball
+        return getattr(pybaseball, name)(*args, **kwargs)
+    fetch.__name__ = name
+    return fetch
+
+def cached_frame(endpoint, season, fetch, *args, ttl=None, refresh=None, **kwargs):
+    """
+    Returns an upstream frame, reading the on-disk snapshot when it is fresh.
+
+    Args:
+    endpoint (str): Name of the upstream endpoint, used in the cache key.
+    season (int): The season the frame belongs to.
+    fetch (callable): Upstream function, called as fetch(*args, **kwargs) on a miss.
+    ttl (float): Optional TTL override in seconds.
+    refresh (bool): Optional forced-refresh override.
+
+    Returns:
+    DataFrame or list: The frame (or list of frames) returned by the endpoint.
+    """
+    path = snapshot_path(endpoint, season, *args, **kwargs)
+    refresh = FORCE_REFRESH if refresh is None else refresh
+
+    if not refresh and is_fresh(path, season, ttl):
+        try:
+            data = read_snapshot(path)
+            CACHE_STATS['disk_hits'] += 1
+            record_cache('disk', True)
+            return data
+        except Exception as e:
+            print(f"Could not read cache snapshot {path}: {e}")
+
+    record_cache('disk', False)
+    with span(f"pybaseball.{endpoint}"):
+        data = fetch(*args, **kwargs)
+    CACHE_STATS['fetches'] += 1
+    write_snapshot(path, data)
+    return data
+
+def array_store_path(name):
+    return os.path.join(CACHE_DIR, f"{name}.npz")
+
+def save_arrays(name, **arrays):
+    """Persists named NumPy arrays under the cache directory, atomically."""
+    path = array_store_path(name)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp.npz')
+    os.close(fd)
+    try:
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Could not write array store {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def load_arrays(name):
+    """Loads arrays saved with save_arrays, or returns None if the store is missing or unreadable."""
+    path = array_store_path(name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as store:
+            return {key: store[key] for key in store.files}
+    except Exception as e:
+        print(f"Could not read array store {path}: {e}")
+        return None
+
+def clear_cache(endpoint=None):
+    """Deletes cached snapshots, optionally only those for one endpoint."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for file_name in os.listdir(CACHE_DIR):
+        if endpoint is None or file_name.startswith(f"{endpoint}_"):
+            os.remove(os.path.join(CACHE_DIR, file_name))
+
+def is_cacheable(value):
+    """
+    Failed lookups are not cached, so the next call retries them: None, and tuples of
+    Nones such as the (None, None) returned by get_head_to_head on an error.
+    """
+    if value is None:
+        return False
+    if isinstance(value, tuple) and value and all(part is None for part in value):
+        return False
+    return True
+
+class MemoCache:
+    """Bounded LRU cache with a per-entry TTL and hit/miss counters."""
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> lock held while the value is being computed
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached value for key, computing it once on a miss.
+
+        Concurrent callers asking for the same key wait for the first one
+        instead of repeating the upstream call.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                record_cache('memo', True)
+                return value
+            key_lock = self._pending.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                found, value = self._lookup(key)
+                if found:
+                    self.hits += 1
+                    record_cache('memo', True)
+                    return value
+                self.misses += 1
+                record_cache('memo', False)
+            try:
+                value = compute()
+                if is_cacheable(value):
+                    ttl = CACHE_TTL if self.ttl is None else self.ttl
+                    with self._lock:
+                        self._entries[key] = (time.monotonic() + ttl, value)
+                        self._entries.move_to_end(key)
+                        while len(self._entries) > self.maxsize:
+                            self._entries.popitem(last=False)
+                return value
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+
+    def info(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+def memoize(maxsize=128, ttl=None):
+    """
+    Memoizes a function in-process with LRU eviction and a per-entry TTL.
+
+    Args:
+    maxsize (int): Maximum number of cached results.
+    ttl (float): Seconds an entry stays valid; defaults to CACHE_TTL.
+
+    Returns:
+    callable: Decorator exposing cache_info() and cache_clear() on the wrapped function.
+    """
+    def decorator(func):
+        cache = MemoCache(maxsize, ttl)
+        MEMO_CACHES[f"{func.__module__}.{func.__name__}"] = cache
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            return cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+def memo_cache_info():
+    """Returns hit/miss counters for every memoized function."""
+    return {name: cache.info() for name, cache in MEMO_CACHES.items()}
+
+def clear_memo_caches():
+    for cache in MEMO_CACHES.values():
+        cache.clear()
@@ -1,40 +1,156 @@
-import pybaseball as pb
 import pandas as pd
+import re
+import threading
 import warnings
+import numpy as np
+from difflib import SequenceMatcher, get_close_matches
 from unidecode import unidecode
 from datetime import datetime
-from utils import TEAM_ABBR_TO_NAME
+from output_capture import ContextThreadPoolExecutor
+from utils import TEAM_ABBR_TO_NAME, TEAM_ABBRS, TEAM_STAT_COLUMNS, team_index, get_standings_row
+from data_cache import cached_frame, upstream, memoize, save_arrays, load_arrays
+from tracing import traced
+from stats_history import get_team_stats_history
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
-def format_name_for_search(name):
-    name_normalized = unidecode(name)
-    full_name_format = name_normalized
-    last_name_format = name_normalized.split()[-1]
-    return [full_name_format, last_name_format]
+# Hardcoded values
+SCHEDULE_FETCH_WORKERS = 6
 
+@traced()
+@memoize(maxsize=16)
+def fetch_team_batting(year):
+    return cached_frame('team_batting', year, upstream('team_batting'), year, year)
+
+@traced()
+@memoize(maxsize=16)
+def fetch_team_pitching(year):
+    return cached_frame('team_pitching', year, upstream('team_pitching'), year, year)
+
+@traced()
+@memoize(maxsize=16)
+def fetch_pitching_stats(year):
+    return cached_frame('pitching_stats', year, upstream('pitching_stats'), year, year, qual=0)
+
+@traced()
+@memoize(maxsize=128)
+def fetch_schedule(year, team):
+    return cached_frame('schedule_and_record', year, upstream('schedule_and_record'), year, team)
+
+# Name suffixes ignored when building the last-name index
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv'}
+
+# Minimum similarity for a fuzzy pitcher match, and the lead the best match needs over the next one
+FUZZY_MATCH_CUTOFF = 0.8
+FUZZY_MATCH_MARGIN = 0.05
+
+def normalize_name(name):
+    """Unidecodes and lowercases a name and drops punctuation, e.g. 'José Berríos' -> 'jose berrios'."""
+    name_normalized = unidecode(str(name)).lower()
+    name_normalized = re.sub(r"[^a-z\s]", '', name_normalized.replace('-', ' '))
+    return ' '.join(name_normalized.split())
+
+def last_name_of(normalized_name):
+    tokens = [token for token in normalized_name.split() if token not in NAME_SUFFIXES]
+    return tokens[-1] if tokens else normalized_name
+
+class PitcherIndex:
+    """Hash-map index over one season's pitching_stats table, built once and reused."""
+
+    def __init__(self, pitcher_stats):
+        self.stats = pitcher_stats.reset_index(drop=True)
+        # Normalized once here so lookups never normalize the table again
+        self.normalized_names = [normalize_name(name) if isinstance(name, str) else '' for name in self.stats['Name']]
+        self.by_full_name = {}  # normalized full name -> row positions
+        self.by_last_name = {}  # normalized last name -> row positions
+        for position, full_name in enumerate(self.normalized_names):
+            if not full_name:
+                continue
+            self.by_full_name.setdefault(full_name, []).append(position)
+            self.by_last_name.setdefault(last_name_of(full_name), []).append(position)
+        self.full_names = list(self.by_full_name)  # Distinct normalized names, for the fuzzy fallback
+
+    def _names(self, positions):
+        return [self.stats.at[position, 'Name'] for position in positions]
+
+    def _fuzzy_match(self, query, names):
+        """Ranks normalized names by similarity to the query; returns (position, ranked candidate names)."""
+        matches = get_close_matches(query, names, n=5, cutoff=FUZZY_MATCH_CUTOFF)
+        candidates = [self.stats.at[self.by_full_name[name][0], 'Name'] for name in matches]
+        if not matches:
+            return None, candidates
+        if len(matches) > 1:
+            best, runner_up = (SequenceMatcher(None, name, query).ratio() for name in matches[:2])
+            if best - runner_up < FUZZY_MATCH_MARGIN:
+                return None, candidates
+        return self.by_full_name[matches[0]][0], candidates
+
+    def lookup(self, pitcher_name):
+        """
+        Finds a pitcher's row by exact normalized name, then by unique last name,
+        then by ranked fuzzy match.
+
+        Args:
+        pitcher_name (str): The pitcher's name as typed.
+
+        Returns:
+        tuple: (row, candidates) where row is a Series or None when there is no
+        unambiguous match, and candidates lists the names that were considered.
+        """
+        query = normalize_name(pitcher_name)
+        if not query:
+            return None, []
+
+        positions = self.by_full_name.get(query)
+        if positions:
+            if len(positions) > 1:
+                print(f"{len(positions)} pitchers named {pitcher_name}; using the first listed.")
+            return self.stats.iloc[positions[0]], self._names(positions)
+
+        positions = self.by_last_name.get(last_name_of(query), [])
+        if len(query.split()) == 1:
+            # Last name only: accept it only when no other pitcher shares it
+            if len(positions) == 1:
+                return self.stats.iloc[positions[0]], self._names(positions)
+            if positions:
+                return None, self._names(positions)
+
+        # Fuzzy fallback: rank pitchers sharing the last name, or everyone if none do
+        if positions:
+            names = list(dict.fromkeys(self.normalized_names[position] for position in positions))
+        else:
+            names = self.full_names
+        position, candidates = self._fuzzy_match(query, names)
+        if position is None:
+            return None, candidates
+        return self.stats.iloc[position], candidates
+
+@traced()
+@memoize(maxsize=16)
+def get_pitcher_index(year):
+    """Returns the season's pitcher name index, building it on first use."""
+    return PitcherIndex(fetch_pitching_stats(year))
+
+@memoize(maxsize=256)
 def get_pitcher_stats(pitcher_name, year):
     try:
-        search_names = format_name_for_search(pitcher_name)
-        pitcher_stats = pb.pitching_stats(year, year, qual=0)
-        pitcher_data = None
-        for name in search_names:
-            pitcher_data = pitcher_stats[pitcher_stats['Name'].str.contains(name, case=False, na=False)].copy()
-            if not pitcher_data.empty:
-                break
-
-        if pitcher_data.empty:
-            print(f"Stats not found for {pitcher_name} using name-based search.")
+        pitcher_row, candidates = get_pitcher_index(year).lookup(pitcher_name)
+
+        if pitcher_row is None:
+            if len(candidates) > 1:
+                print(f"Ambiguous pitcher name {pitcher_name}; candidates: {', '.join(candidates)}")
+            else:
+                print(f"Stats not found for {pitcher_name} using name-based search.")
             return None
 
-        era_minus = pitcher_data.iloc[0]['ERA-']
-        fip_minus = pitcher_data.iloc[0]['FIP-']
-        runs = pitcher_data.iloc[0]['R']
-        earned_runs = pitcher_data.iloc[0]['ER']
-        era = pitcher_data.iloc[0]['ERA']
-        fip = pitcher_data.iloc[0]['FIP']
-        whip = pitcher_data.iloc[0]['WHIP']
-        lob_percentage = pitcher_data.iloc[0]['LOB%']
+        era_minus = pitcher_row['ERA-']
+        fip_minus = pitcher_row['FIP-']
+        runs = pitcher_row['R']
+        earned_runs = pitcher_row['ER']
+        era = pitcher_row['ERA']
+        fip = pitcher_row['FIP']
+        whip = pitcher_row['WHIP']
+        lob_percentage = pitcher_row['LOB%']
 
         return {
             'ERA-': era_minus,
@@ -50,40 +166,76 @@ def get_pitcher_stats(pitcher_name, year):
         print(f"Error retrieving pitcher stats: {e}")
         return None
 
-def get_team_stats(team, year, pitcher_name=None):
-    batting_stats = pb.team_batting(year, year)
-    pitching_stats = pb.team_pitching(year, year)
+def stat_column(frame, column):
+    """Returns a column of a team stats frame, or zeros when the upstream frame lacks it."""
+    if column in frame.columns:
+        return frame[column]
+    return pd.Series(0, index=frame.index)
 
-    if team not in batting_stats['Team'].values:
-        raise ValueError(f"Team {team} not found in the batting stats for {year}.")
-    
-    if team not in pitching_stats['Team'].values:
-        raise ValueError(f"Team {team} not found in the pitching stats for {year}.")
-    
-    team_batting = batting_stats[batting_stats['Team'] == team].iloc[0]
-    team_pitching = pitching_stats[pitching_stats['Team'] == team].iloc[0]
-    
-    runs_scored = team_batting.get('R', 0)
-    runs_allowed = team_pitching.get('R', 0)
-    
-    stats = {
+@traced()
+@memoize(maxsize=16)
+def get_league_team_stats(year):
+    """
+    Builds the league-wide team stats table in one vectorized pass over
+    team_batting and team_pitching.
+
+    Returns:
+    DataFrame: One row per team (indexed by abbreviation), one column per TEAM_STAT_COLUMNS metric.
+    """
+    batting_stats = fetch_team_batting(year).drop_duplicates('Team').set_index('Team')
+    pitching_stats = fetch_team_pitching(year).drop_duplicates('Team').set_index('Team')
+
+    teams = batting_stats.index.intersection(pitching_stats.index, sort=False)
+    team_batting = batting_stats.loc[teams]
+    team_pitching = pitching_stats.loc[teams]
+
+    runs_scored = stat_column(team_batting, 'R')
+    runs_allowed = stat_column(team_pitching, 'R')
+
+    league_stats = pd.DataFrame({
         'run_differential': runs_scored - runs_allowed,
-        'OPS': team_batting.get('OPS', 0),
-        'SLG': team_batting.get('SLG', 0),
-        'OBP': team_batting.get('OBP', 0),
-        'XBH': team_batting.get('2B', 0) + team_batting.get('3B', 0) + team_batting.get('HR', 0),
-        'Hits': team_batting.get('H', 0),
-        'ISO': team_batting.get('ISO', 0),
-        'RAR': team_batting.get('RAR', 0),
-        'RBI': team_batting.get('RBI', 0),
-        'LOB%': team_pitching.get('LOB%', 0),
+        'OPS': stat_column(team_batting, 'OPS'),
+        'SLG': stat_column(team_batting, 'SLG'),
+        'OBP': stat_column(team_batting, 'OBP'),
+        'XBH': stat_column(team_batting, '2B') + stat_column(team_batting, '3B') + stat_column(team_batting, 'HR'),
+        'Hits': stat_column(team_batting, 'H'),
+        'ISO': stat_column(team_batting, 'ISO'),
+        'RAR': stat_column(team_batting, 'RAR'),
+        'RBI': stat_column(team_batting, 'RBI'),
+        'LOB%': stat_column(team_pitching, 'LOB%'),
         'RunsScored': runs_scored,
         'RunsAllowed': runs_allowed
-    }
+    }, index=teams)
+    league_stats.index.name = 'Team'
+    return league_stats[TEAM_STAT_COLUMNS]
+
+@memoize(maxsize=256)
+def get_team_stats(team, year, pitcher_name=None, as_of=None):
+    """
+    Returns a team's stats dict and whether starting pitcher stats were applied.
+
+    With as_of, team stats are read from the point-in-time store as they stood that
+    morning, and the pitcher line comes from the previous season so that no games on
+    or after as_of leak into the result.
+    """
+    if as_of is not None:
+        stats = get_team_stats_history(year).get(team, as_of)
+        if stats is None:
+            raise ValueError(f"Team {team} not found in the {year} game logs.")
+        pitcher_year = year - 1
+    else:
+        league_stats = get_league_team_stats(year)
+
+        if team not in league_stats.index:
+            raise ValueError(f"Team {team} not found in the team stats for {year}.")
+
+        # Row slice of the league table; to_dict keeps each column's dtype
+        stats = league_stats.loc[[team]].to_dict('records')[0]
+        pitcher_year = year
 
     used_pitcher_stats = False
     if pitcher_name:
-        pitcher_stats = get_pitcher_stats(pitcher_name, year)
+        pitcher_stats = get_pitcher_stats(pitcher_name, pitcher_year)
         if pitcher_stats is not None:
             stats.update({
                 'ERA': pitcher_stats['ERA'],
@@ -101,37 +253,159 @@ def get_team_stats(team, year, pitcher_name=None):
     
     return stats, used_pitcher_stats
 
+@memoize(maxsize=256)
 def get_team_rank(team, year):
     """Retrieve a team's rank within their division."""
-    standings_list = pb.standings(year)
-    standings = pd.concat(standings_list)
-    team_name = TEAM_ABBR_TO_NAME.get(team, team)
-    
-    team_row = standings[standings['Tm'] == team_name]
-    if not team_row.empty:
-        rank = team_row.index[0] + 1  # Use index +1 for rank
-        return rank
+    team_row = get_standings_row(team, year)
+    if team_row is not None:
+        return team_row['division_rank']
     else:
-        print(f"Team '{team}' ({team_name}) not found in standings.")
+        print(f"Team '{team}' ({TEAM_ABBR_TO_NAME.get(team, team)}) not found in standings.")
+        return None
+
+def completed_games(schedule):
+    """Returns the rows of a schedule_and_record frame for games that have been played."""
+    if schedule is None or schedule.empty or 'W/L' not in schedule.columns:
+        return schedule.iloc[0:0] if schedule is not None else pd.DataFrame()
+    return schedule[schedule['W/L'].notna()]
+
+# Guards the in-memory head-to-head matrices while rows are applied and persisted
+_head_to_head_lock = threading.Lock()
+
+def new_head_to_head_matrix():
+    team_count = len(TEAM_ABBRS)
+    return {
+        'wins': np.zeros((team_count, team_count), dtype=np.int32),
+        'games': np.zeros((team_count, team_count), dtype=np.int32),
+        'processed': np.zeros(team_count, dtype=np.int32),
+        'stale': np.ones(team_count, dtype=bool)
+    }
+
+@memoize(maxsize=8)
+def head_to_head_store(year):
+    """Returns the season's persisted head-to-head matrix, shared by every row lookup in the process."""
+    matrix = load_arrays(f"head_to_head_{year}")
+    if matrix is None:
+        return new_head_to_head_matrix()
+    if 'stale' not in matrix:
+        matrix['stale'] = matrix['processed'] == 0
+    return matrix
+
+def fetch_schedule_or_none(year, team):
+    """Fetches a team's schedule, reporting a failure (e.g. a renamed Baseball-Reference code) as None."""
+    try:
+        return fetch_schedule(year, team)
+    except Exception as e:
+        print(f"Could not fetch the {year} schedule for {team}: {e}")
+        return None
+
+@traced()
+def update_head_to_head_matrix(year, matrix=None, teams=None):
+    """
+    Adds newly completed games from the teams' schedules to the season's
+    head-to-head matrix and persists it.
+
+    Each team's row is filled only from its own schedule, and processed[i] counts
+    the completed games of team i already added, so updates are incremental. A team
+    whose schedule cannot be fetched keeps its previous row and is flagged in
+    stale[i]; the other teams are still updated.
+
+    Args:
+    year (int): The season.
+    matrix (dict): The matrix to update; defaults to head_to_head_store(year).
+    teams (list): Teams whose rows to update; defaults to every team.
+
+    Returns:
+    dict: 'wins' and 'games' (30x30, row team vs column team), 'processed' (30,) and 'stale' (30,).
+    """
+    if matrix is None:
+        matrix = head_to_head_store(year)
+    if teams is None:
+        teams = TEAM_ABBRS
+
+    with ContextThreadPoolExecutor(max_workers=SCHEDULE_FETCH_WORKERS) as executor:
+        schedules = list(executor.map(lambda team: fetch_schedule_or_none(year, team), teams))
+
+    with _head_to_head_lock:
+        for team, schedule in zip(teams, schedules):
+            i = team_index(team)
+            if i is None:
+                continue
+            if schedule is None:
+                matrix['stale'][i] = True
+                continue
+            played = completed_games(schedule)
+            new_games = played.iloc[int(matrix['processed'][i]):]
+            for opponent, result in zip(new_games['Opp'], new_games['W/L']):
+                j = team_index(opponent)
+                if j is None:
+                    continue
+                matrix['games'][i, j] += 1
+                if str(result).startswith('W'):  # 'W' and walk-off 'W-wo'
+                    matrix['wins'][i, j] += 1
+            matrix['processed'][i] = len(played)
+            matrix['stale'][i] = False
+
+        save_arrays(f"head_to_head_{year}", **matrix)
+    return matrix
+
+def head_to_head_row_is_final(matrix, i, year):
+    """Completed seasons never change once a team's row has been filled."""
+    return year < datetime.now().year and matrix['processed'][i] > 0 and not matrix['stale'][i]
+
+@traced()
+@memoize(maxsize=8)
+def get_head_to_head_matrix(year):
+    """
+    Returns the season's 30x30 head-to-head wins and games matrices, indexed by TEAM_ABBRS.
+
+    Completed seasons are read straight from the persisted matrix once every
+    row has been filled; otherwise every team's row is brought up to date.
+    Rows of teams whose schedule could not be fetched are flagged in 'stale'.
+    """
+    matrix = head_to_head_store(year)
+    if all(head_to_head_row_is_final(matrix, i, year) for i in range(len(TEAM_ABBRS))):
+        return matrix
+    return update_head_to_head_matrix(year, matrix)
+
+@memoize(maxsize=256)
+def get_head_to_head_row(team, year):
+    """
+    Returns a team's head-to-head (wins, games) rows against every team, fetching only
+    that team's schedule. Returns None when the schedule could not be fetched.
+    """
+    i = team_index(team)
+    if i is None:
         return None
+    matrix = head_to_head_store(year)
+    if not head_to_head_row_is_final(matrix, i, year):
+        update_head_to_head_matrix(year, matrix, [team])
+    with _head_to_head_lock:
+        if matrix['stale'][i]:
+            return None
+        return matrix['wins'][i].copy(), matrix['games'][i].copy()
 
+@memoize(maxsize=256)
 def get_head_to_head(team1, team2, year):
     current_year = datetime.now().year
     if year > current_year:
         year = current_year
 
     try:
-        schedule1 = pb.schedule_and_record(year, team1)
-        if schedule1.empty and year == current_year:
-            schedule1 = pb.schedule_and_record(year - 1, team1)
-        
-        if schedule1.empty:
+        i, j = team_index(team1), team_index(team2)
+        if i is None or j is None:
+            print(f"Unknown team in head-to-head lookup: {team1} vs {team2}")
+            return None, None
+
+        row = get_head_to_head_row(team1, year)
+        if (row is None or row[1].sum() == 0) and year == current_year:
+            row = get_head_to_head_row(team1, year - 1)
+
+        if row is None or row[1].sum() == 0:
             return None, None
 
-        h2h_games = schedule1[schedule1['Opp'] == team2]
-        team1_wins = h2h_games['W/L'].value_counts().get('W', 0)
-        total_games = len(h2h_games)
-        return team1_wins, total_games
+        wins, games = row
+        return int(wins[j]), int(games[j])
     except Exception as e:
         print(f"Error getting head-to-head record: {e}")
         return None, None
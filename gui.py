@@ -2,16 +2,42 @@ import sys
 import pandas as pd
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLabel, QLineEdit, QPushButton, QVBoxLayout,
-    QWidget, QHBoxLayout, QProgressBar, QGridLayout, QSpacerItem, QSizePolicy, QScrollArea
+    QWidget, QHBoxLayout, QProgressBar, QGridLayout, QSpacerItem, QSizePolicy, QScrollArea, QFileDialog
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThreadPool
 from PyQt5.QtGui import QFont
 from data_collection import get_team_stats, get_head_to_head
 from prediction_models import original_method
-from odds_calculations import american_to_decimal, calculate_adjusted_odds, calculate_edge
+from odds_calculations import calculate_adjusted_odds, calculate_edge
+from odds_normalization import remove_vig
 from betting_strategies import suggested_bet_size
+from utils import get_standings_row
+from pipeline import PipelineCancelled
+from slate import load_slate, run_slate
+from qt_tables import frame_to_table
+from qt_workers import PipelineWorker
 from datetime import datetime
-import pybaseball as pb
+
+# Hardcoded values
+close_wait_ms = 5000  # On close, wait this long for a running slate to reach a stage boundary
+
+class SlateWorker(PipelineWorker):
+    """Scores and saves a slate off the GUI thread."""
+
+    def __init__(self, job_id, games, year):
+        super().__init__(job_id, f"Slate of {len(games)} games")
+        self.games = games
+        self.year = year
+
+    def run(self):
+        try:
+            table = run_slate(self.games, self.year, progress=self.progress, is_cancelled=self.cancel_event.is_set)
+        except PipelineCancelled:
+            self.signals.cancelled.emit(self.job_id)
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, f"Error: {e}\nUnable to score the slate.")
+        else:
+            self.signals.finished.emit(self.job_id, {'slate': table})
 
 class MLBAIPredictor(QMainWindow):
     def __init__(self):
@@ -92,6 +118,29 @@ class MLBAIPredictor(QMainWindow):
         self.predict_button.clicked.connect(self.run_algorithm)
         self.predict_button.setFixedWidth(200)  # Set a fixed width for the button
 
+        # Slate Button
+        self.slate_button = QPushButton("Run Slate")
+        self.slate_button.setFont(QFont("Arial", 12, QFont.Bold))
+        self.slate_button.setStyleSheet("background-color: #6426fd; color: white; border-radius: 5px; padding: 10px;")
+        self.slate_button.clicked.connect(self.run_slate)
+        self.slate_button.setFixedWidth(200)
+
+        # Cancel Button (stops a running slate at its next stage)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setFont(QFont("Arial", 12, QFont.Bold))
+        self.cancel_button.setStyleSheet("background-color: #333333; color: white; border-radius: 5px; padding: 10px;")
+        self.cancel_button.clicked.connect(self.cancel_slate)
+        self.cancel_button.setFixedWidth(200)
+        self.cancel_button.setEnabled(False)
+
+        # Stage of the running slate
+        self.status_label = QLabel("")
+        self.status_label.setFont(input_font)
+
+        # Slates run on the thread pool so the window stays responsive
+        self.thread_pool = QThreadPool()
+        self.slate_worker = None
+
         # Adding widgets to the grid
         self.input_layout.addWidget(self.team1_label, 0, 0)
         self.input_layout.addWidget(self.team1_input, 0, 1)
@@ -106,6 +155,9 @@ class MLBAIPredictor(QMainWindow):
         self.input_layout.addWidget(self.team2_odds_label, 5, 0)
         self.input_layout.addWidget(self.team2_odds_input, 5, 1)
         self.input_layout.addWidget(self.predict_button, 6, 0, 1, 2, alignment=Qt.AlignCenter)
+        self.input_layout.addWidget(self.slate_button, 7, 0, 1, 2, alignment=Qt.AlignCenter)
+        self.input_layout.addWidget(self.cancel_button, 8, 0, 1, 2, alignment=Qt.AlignCenter)
+        self.input_layout.addWidget(self.status_label, 9, 0, 1, 2, alignment=Qt.AlignCenter)
 
         self.scroll_layout.addLayout(self.input_layout)
 
@@ -173,8 +225,7 @@ class MLBAIPredictor(QMainWindow):
 
         win_prob = original_method(team1_stats, team2_stats)
 
-        implied_prob_team1 = 1 / american_to_decimal(team1_odds)
-        implied_prob_team2 = 1 / american_to_decimal(team2_odds)
+        implied_prob_team1, implied_prob_team2 = remove_vig(team1_odds, team2_odds)
 
         team1_adjusted_odds = calculate_adjusted_odds(team1_odds, win_prob, implied_prob_team1)
         team2_adjusted_odds = calculate_adjusted_odds(team2_odds, 1 - win_prob, implied_prob_team2)
@@ -193,38 +244,20 @@ class MLBAIPredictor(QMainWindow):
                              edge_team1, edge_team2)
 
     def get_team_win_percentage(self, team, year):
+        team_name = self.TEAM_ABBR_TO_NAME.get(team, team)
         try:
-            standings_list = pb.standings(year)
-            # Combine all DataFrames in the list into a single DataFrame
-            standings = pd.concat(standings_list)
-            
-            # Convert team abbreviation to full name
-            team_name = self.TEAM_ABBR_TO_NAME.get(team, team)
-            
-            team_row = standings[standings['Tm'] == team_name]
-            if not team_row.empty:
-                wins = int(team_row['W'].values[0])
-                losses = int(team_row['L'].values[0])
-                games = wins + losses
-                if games > 0:
-                    win_pct = wins / games
-                    print(f"{team} ({team_name}) current win%: {win_pct:.3f}")
-                    return win_pct
-                else:
-                    print(f"{team} ({team_name}) has not played any games yet.")
-                    return 0.000
-            else:
-                print(f"Team '{team}' ({team_name}) not found in standings.")
-                print("Available teams:")
-                print(standings['Tm'].tolist())
-                return None
+            team_row = get_standings_row(team, year)
         except Exception as e:
             print(f"Error fetching win percentage: {e}")
-            print("Standings data:")
-            print(standings.to_string())
-            import traceback
-            traceback.print_exc()
             return None
+        if team_row is None:
+            print(f"Team '{team}' ({team_name}) not found in standings.")
+            return None
+        if team_row['W'] + team_row['L'] > 0:
+            print(f"{team} ({team_name}) current win%: {team_row['win_pct']:.3f}")
+        else:
+            print(f"{team} ({team_name}) has not played any games yet.")
+        return team_row['win_pct']
 
     def display_results(self, team1, team2, win_prob, team1_stats, team2_stats, h2h_wins, h2h_games, 
                         team1_win_pct, team2_win_pct, team1_adjusted_odds, team2_adjusted_odds, 
@@ -409,6 +442,72 @@ class MLBAIPredictor(QMainWindow):
         team1_metric_label.setStyleSheet("color: #12f37e;" if team1_better_metrics > team2_better_metrics else "color: #eb0d48;")
         team2_metric_label.setStyleSheet("color: #12f37e;" if team2_better_metrics > team1_better_metrics else "color: #eb0d48;")
 
+    def run_slate(self):
+        if self.slate_worker is not None:
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Open Slate", "", "Schedule files (*.csv *.json)")
+        if not path:
+            return
+
+        # Clear previous results
+        while self.result_area.count():
+            widget = self.result_area.takeAt(0).widget()
+            if widget:
+                widget.deleteLater()
+
+        try:
+            games = load_slate(path)
+        except Exception as e:
+            self.display_error(f"Error: {e}\nUnable to read the slate.")
+            return
+
+        worker = SlateWorker(0, games, datetime.now().year)
+        worker.signals.stage.connect(self.on_slate_stage)
+        worker.signals.finished.connect(self.on_slate_finished)
+        worker.signals.failed.connect(self.on_slate_failed)
+        worker.signals.cancelled.connect(self.on_slate_cancelled)
+        self.slate_worker = worker
+        self.slate_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.status_label.setText(f"{worker.label}: queued")
+        self.thread_pool.start(worker)
+
+    def cancel_slate(self):
+        if self.slate_worker is not None:
+            self.slate_worker.cancel()
+            self.status_label.setText(f"{self.slate_worker.label}: cancelling")
+
+    def on_slate_stage(self, job_id, stage):
+        if self.slate_worker is not None and not self.slate_worker.cancel_event.is_set():
+            self.status_label.setText(f"{self.slate_worker.label}: {stage}")
+
+    def on_slate_done(self, message=""):
+        self.slate_worker = None
+        self.slate_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText(message)
+
+    def on_slate_failed(self, job_id, message):
+        self.on_slate_done()
+        self.display_error(message)
+
+    def on_slate_cancelled(self, job_id):
+        self.on_slate_done("Slate cancelled.")
+
+    def on_slate_finished(self, job_id, result):
+        self.on_slate_done()
+        slate_table = frame_to_table(result['slate'])
+        slate_table.setStyleSheet("background-color: #333333; color: white;")
+        slate_table.setMinimumHeight(400)
+        self.result_area.addWidget(slate_table)
+
+    def closeEvent(self, event):
+        # Cancel the slate first, so the wait is only for its current stage
+        self.cancel_slate()
+        if not self.thread_pool.waitForDone(close_wait_ms):
+            print("Closing with the slate still running; it stops at its next stage boundary.")
+        super().closeEvent(event)
+
     def display_error(self, message):
         error_label = QLabel(message)
         error_label.setFont(QFont("Arial", 14))
@@ -1,31 +1,15 @@
 # main-2.py
 
-import sys
-from data_collection import (
-    get_team_stats,
-    get_team_rank,
-    get_head_to_head,
-    calculate_pythagorean_winning_percentage,
-)
-from prediction_models import original_method
-from odds_calculations import (
-    american_to_decimal,
-    calculate_adjusted_odds,
-    calculate_edge,
-)
+from pipeline import prefetch_matchup, run_matchup, get_win_probability_matrix, PIPELINE_STAGES
+from slate import load_slate, run_slate
+from output_capture import capture_output
+from data_cache import CACHE_TTL
 from utils import (
-    get_team_win_percentage,
     GOOD_METRICS,
     INVERSE_METRICS,
 )
-from data_processings import (
-    compare_metrics,
-    prepare_matchup_data,
-    calculate_team_score,
-)
 from datetime import datetime
 import os
-import time
 import io
 
 # Streamlit imports
@@ -42,6 +26,15 @@ bankroll = 41
 max_bet_percentage = 25
 max_edge = 1.3
 
+# Progress bar text for each pipeline stage
+STAGE_LABELS = {
+    'fetch': 'Pulling game data...',
+    'model': 'Running data through Vortex algorithm...',
+    'odds': 'Computing odds and edges...',
+    'save': 'Saving results...'
+}
+MATCHUP_STAGES = PIPELINE_STAGES[:-1]  # Single matchups are not saved from this app
+
 # Hardcoded chart size in pixels
 chart_width = 500  # Width in pixels
 chart_height = 500  # Height in pixels
@@ -193,6 +186,27 @@ code {
 # Inject the custom CSS styles
 st.markdown(component_style, unsafe_allow_html=True)
 
+@st.cache_resource(ttl=CACHE_TTL, show_spinner="Loading season data...")
+def load_season(year):
+    """
+    Loads a season's tables, pitcher index and standings into the
+    process-wide caches. Streamlit runs it once per season for all sessions and reruns,
+    so concurrent users share one upstream fetch.
+    """
+    prefetch_matchup(year)
+    return datetime.now()
+
+def stage_progress(progress_bar, stages):
+    """Returns a pipeline progress hook that advances the progress bar at each stage."""
+    def progress(stage):
+        progress_bar.progress(stages.index(stage) / len(stages), text=STAGE_LABELS[stage])
+    return progress
+
+def show_terminal_output(terminal_output):
+    if terminal_output:
+        st.sidebar.subheader("Terminal Output")
+        st.sidebar.text(terminal_output)
+
 # Function to plot radar chart
 def plot_radar_chart(home_team, away_team, home_stats, away_stats):
     metrics = [
@@ -250,7 +264,7 @@ def plot_radar_chart(home_team, away_team, home_stats, away_stats):
 
     # Save the figure to a BytesIO buffer and display it using st.image
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0, dpi=dpi)
+    fig.savefig(buf, format='png', bbox_inches='tight', pad_inches=0, dpi=dpi)
     plt.close(fig)
     st.image(buf, width=chart_width, use_column_width=False)
 
@@ -319,101 +333,98 @@ def main():
     away_odds_text = st.sidebar.text_input("Away Team Moneyline Odds (e.g., +130)")
 
     if st.sidebar.button("Run Algorithm"):
-        status_text = st.empty()
-        with st.spinner('Processing...'):
-            # Capture terminal output
-            buffer = io.StringIO()
-            sys.stdout = buffer  # Redirect stdout to buffer
+        # Validate inputs
+        try:
+            home_odds = float(home_odds_text)
+            away_odds = float(away_odds_text)
+        except ValueError:
+            st.error("Please enter valid numeric odds.")
+            return
+
+        if not all([home_team, away_team, pitcher_home, pitcher_away]):
+            st.error("Please fill in all fields.")
+            return
+
+        year = datetime.now().year
+        load_season(year)
+
+        progress_bar = st.progress(0.0, text=STAGE_LABELS['fetch'])
+        results = None
+        # Capture terminal output for this session only
+        with capture_output() as buffer:
             try:
-                year = datetime.now().year
-                date_today = datetime.now().strftime('%Y-%m-%d')
-
-                # Display 'Pulling game data'
-                status_text.text('Pulling game data...')
-                time.sleep(1)
-
-                # Validate inputs
-                try:
-                    home_odds = float(home_odds_text)
-                    away_odds = float(away_odds_text)
-                except ValueError:
-                    st.error("Please enter valid numeric odds.")
-                    status_text.empty()
-                    return
-
-                if not all([home_team, away_team, pitcher_home, pitcher_away]):
-                    st.error("Please fill in all fields.")
-                    status_text.empty()
-                    return
-
-                try:
-                    home_team_stats, used_pitcher_stats_home = get_team_stats(home_team, year, pitcher_home)
-                    away_team_stats, used_pitcher_stats_away = get_team_stats(away_team, year, pitcher_away)
-                except ValueError as e:
-                    st.error(f"Data Error: {e}")
-                    status_text.empty()
-                    return
-
-                # Display 'Processing data'
-                status_text.text('Processing data...')
-                time.sleep(1)
-
-                # Win probability calculation
-                win_prob = original_method(away_team_stats, home_team_stats)
-
-                # Display 'Running data through Vortex algorithm'
-                status_text.text('Running data through Vortex algorithm...')
-                time.sleep(1)
-
-                # Implied probabilities from odds
-                implied_prob_home = 1 / american_to_decimal(home_odds)
-                implied_prob_away = 1 / american_to_decimal(away_odds)
-
-                # Adjusted odds
-                home_adjusted_odds = calculate_adjusted_odds(home_odds, 1 - win_prob, implied_prob_home)
-                away_adjusted_odds = calculate_adjusted_odds(away_odds, win_prob, implied_prob_away)
-
-                # Current season win percentages
-                home_win_pct = get_team_win_percentage(home_team, year)
-                away_win_pct = get_team_win_percentage(away_team, year)
-
-                # Get team rankings
-                home_rank = get_team_rank(home_team, year)
-                away_rank = get_team_rank(away_team, year)
-
-                # Metrics comparison
-                better_metrics_home, better_metrics_away = compare_metrics(home_team_stats, away_team_stats)
-
-                # Calculate Pythagorean Winning Percentage
-                home_pythag = calculate_pythagorean_winning_percentage(
-                    home_team_stats['RunsScored'], home_team_stats['RunsAllowed']
-                )
-                away_pythag = calculate_pythagorean_winning_percentage(
-                    away_team_stats['RunsScored'], away_team_stats['RunsAllowed']
-                )
-                pythag_diff = home_pythag - away_pythag
-
-                # Display results
-                display_results(
-                    better_metrics_home, better_metrics_away, home_team, away_team,
-                    win_prob, home_win_pct, away_win_pct, home_team_stats, away_team_stats,
-                    home_odds, away_odds, implied_prob_home, implied_prob_away,
-                    home_adjusted_odds, away_adjusted_odds,
-                    home_rank, away_rank, home_pythag, away_pythag, pythag_diff
-                )
-            finally:
-                sys.stdout = sys.__stdout__  # Reset stdout
-
-            status_text.empty()
+                results = run_matchup(home_team, away_team, pitcher_home, pitcher_away, home_odds, away_odds, year,
+                                      progress=stage_progress(progress_bar, MATCHUP_STAGES))
+            except ValueError as e:
+                st.error(f"Data Error: {e}")
+        progress_bar.empty()
+
+        if results is not None:
+            display_results(
+                results['better_metrics_home'], results['better_metrics_away'], home_team, away_team,
+                results['win_prob'], results['home_win_pct'], results['away_win_pct'],
+                results['home_team_stats'], results['away_team_stats'],
+                home_odds, away_odds, results['implied_prob_home'], results['implied_prob_away'],
+                results['home_adjusted_odds'], results['away_adjusted_odds'],
+                results['home_rank'], results['away_rank'],
+                results['home_pythag'], results['away_pythag'], results['pythag_diff']
+            )
             st.success("Algorithm run successfully!")
 
         # Display terminal output in sidebar
-        terminal_output = buffer.getvalue()
-        st.sidebar.subheader("Terminal Output")
-        st.sidebar.text(terminal_output)
+        show_terminal_output(buffer.getvalue())
+
+    if st.sidebar.button("League Win Probability Matrix"):
+        show_win_probability_matrix(home_team, away_team, pitcher_home, pitcher_away)
+
+    # Slate mode: score a whole schedule file in one batch
+    st.sidebar.header("Slate")
+    slate_file = st.sidebar.file_uploader("Schedule file (home_team, away_team, pitchers, odds)", type=['csv', 'json'])
+    if st.sidebar.button("Run Slate") and slate_file is not None:
+        show_slate(slate_file)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+def show_win_probability_matrix(home_team, away_team, pitcher_home, pitcher_away):
+    pitchers = {team: pitcher for team, pitcher in [(home_team, pitcher_home), (away_team, pitcher_away)]
+                if team and pitcher}
+    try:
+        matrix = get_win_probability_matrix(datetime.now().year, pitchers=pitchers)
+    except Exception as e:
+        st.error(f"Data Error: {e}")
+        return
+
+    st.header("League Win Probability Matrix")
+    st.caption("Row team's probability of beating the column team.")
+    st.dataframe(matrix.style.format("{:.1%}"), use_container_width=True)
+
+def show_slate(slate_file):
+    year = datetime.now().year
+    try:
+        games = load_slate(slate_file)
+    except Exception as e:
+        st.error(f"Slate Error: {e}")
+        return
+
+    load_season(year)
+    progress_bar = st.progress(0.0, text=f"Scoring {len(games)} games...")
+    table = None
+    with capture_output() as buffer:
+        try:
+            table = run_slate(games, year, bankroll=bankroll, max_edge=max_edge,
+                              max_bet_percentage=max_bet_percentage,
+                              progress=stage_progress(progress_bar, PIPELINE_STAGES))
+        except Exception as e:
+            st.error(f"Slate Error: {e}")
+    progress_bar.empty()
+    show_terminal_output(buffer.getvalue())
+    if table is None:
+        return
+
+    st.header(f"Slate ({len(table)} games)")
+    st.caption("Click a column header to sort.")
+    st.dataframe(table, use_container_width=True, hide_index=True)
+
 def display_results(
     better_metrics_home, better_metrics_away, home_team, away_team,
     win_prob, home_win_pct, away_win_pct, home_team_stats, away_team_stats,
@@ -1,11 +1,17 @@
 # main.py
 
 import sys
-from data_collection import get_team_stats, get_team_rank, get_head_to_head, calculate_pythagorean_winning_percentage
-from prediction_models import original_method
-from odds_calculations import american_to_decimal, calculate_adjusted_odds, calculate_edge
-from utils import save_to_excel, get_team_win_percentage, GOOD_METRICS, INVERSE_METRICS  # Imported GOOD_METRICS and INVERSE_METRICS
-from data_processings import compare_metrics, prepare_matchup_data, calculate_team_score
+from pipeline import (
+    fetch_matchup_data, compute_matchup, build_matchup_record, get_win_probability_matrix,
+    prefetch_matchup, report_stage, PipelineCancelled, PIPELINE_STAGES
+)
+from matchup_log import append_matchup
+from prediction_history import record_prediction
+from slate import load_slate, score_slate, save_slate
+from qt_tables import frame_to_table
+from qt_workers import PipelineWorker
+from tracing import trace_summary, reset_trace, write_trace, TRACE_FILE
+from utils import GOOD_METRICS, INVERSE_METRICS  # Imported GOOD_METRICS and INVERSE_METRICS
 from datetime import datetime
 import os
 
@@ -13,10 +19,10 @@ import os
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QLineEdit, QPushButton,
     QVBoxLayout, QHBoxLayout, QMessageBox, QGridLayout, QProgressBar,
-    QTableWidget, QTableWidgetItem, QHeaderView
+    QTableWidget, QTableWidgetItem, QHeaderView, QDialog, QFileDialog
 )
 from PyQt5.QtGui import QFont, QColor, QPalette, QPixmap, QBrush
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QThreadPool
 
 # PyQt5 Circular Progress Bar imports
 from PyQt5.QtWidgets import QFrame
@@ -33,7 +39,87 @@ from matplotlib.figure import Figure
 bankroll = 41
 max_bet_percentage = 25
 max_edge = 1.3
-output_file = "mlb_matchup_data.xlsx"  # Excel output file name
+output_file = "mlb_matchup_log.csv"  # Append-only matchup log (export to Excel with matchup_log.py export)
+max_matchup_workers = 2  # Queued matchups run at most this many at a time
+close_wait_ms = 5000  # On close, wait this long for running jobs to reach a stage boundary
+
+class MatchupWorker(PipelineWorker):
+    """Runs one matchup through the pipeline."""
+
+    def __init__(self, job_id, matchup):
+        super().__init__(job_id, f"{matchup['away_team']} @ {matchup['home_team']}")
+        self.matchup = matchup
+
+    def run(self):
+        matchup = self.matchup
+        is_cancelled = self.cancel_event.is_set
+        try:
+            data = fetch_matchup_data(matchup['home_team'], matchup['away_team'], matchup['pitcher_home'],
+                                      matchup['pitcher_away'], matchup['year'], self.progress, is_cancelled)
+
+            # Win probability, odds, edges, scores and Pythagorean win%
+            results = compute_matchup(data, matchup['home_odds'], matchup['away_odds'],
+                                      progress=self.progress, is_cancelled=is_cancelled)
+
+            # Append the matchup to the log and the prediction history
+            report_stage('save', self.progress, is_cancelled)
+            record = build_matchup_record(matchup['date_today'], matchup['home_team'], matchup['away_team'], results)
+            append_matchup(record, output_file)
+            record_prediction(record)
+        except PipelineCancelled:
+            self.signals.cancelled.emit(self.job_id)
+        except ValueError as e:
+            self.signals.failed.emit(self.job_id, f"Error: {e}")
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, f"Unexpected error: {e}")
+        else:
+            self.signals.finished.emit(self.job_id, dict(matchup, results=results))
+
+class SlateWorker(PipelineWorker):
+    """Scores a whole slate in one batch and saves it in one bulk write."""
+
+    def __init__(self, job_id, games, year, date_today):
+        super().__init__(job_id, f"Slate of {len(games)} games")
+        self.games = games
+        self.year = year
+        self.date_today = date_today
+
+    def run(self):
+        is_cancelled = self.cancel_event.is_set
+        try:
+            table, results = score_slate(self.games, self.year, bankroll, max_edge, max_bet_percentage,
+                                         progress=self.progress, is_cancelled=is_cancelled)
+            save_slate(self.games, results, self.date_today, output_file, self.progress, is_cancelled)
+        except PipelineCancelled:
+            self.signals.cancelled.emit(self.job_id)
+        except ValueError as e:
+            self.signals.failed.emit(self.job_id, f"Error: {e}")
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, f"Unexpected error: {e}")
+        else:
+            self.signals.finished.emit(self.job_id, {'slate': table})
+
+class MatrixWorker(PipelineWorker):
+    """Computes the league win probability matrix."""
+
+    def __init__(self, job_id, year, pitchers):
+        super().__init__(job_id, "League matrix")
+        self.year = year
+        self.pitchers = pitchers
+
+    def run(self):
+        is_cancelled = self.cancel_event.is_set
+        try:
+            report_stage('fetch', self.progress, is_cancelled)
+            prefetch_matchup(self.year, is_cancelled=is_cancelled)
+            report_stage('model', self.progress, is_cancelled)
+            matrix = get_win_probability_matrix(self.year, pitchers=self.pitchers)
+        except PipelineCancelled:
+            self.signals.cancelled.emit(self.job_id)
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, f"Error: {e}")
+        else:
+            self.signals.finished.emit(self.job_id, {'matrix': matrix})
 
 class CircularProgress(QFrame):
     def __init__(self, value=0, max_value=17, color=QColor(0, 255, 0), parent=None):
@@ -83,6 +169,11 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle("MLB Betting Algorithm")
         self.setGeometry(100, 100, 1200, 900)
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(max_matchup_workers)
+        self.jobs = {}  # job id -> MatchupWorker, queued or running
+        self.job_stages = {}  # job id -> current stage
+        self.next_job_id = 0
         self.initUI()
 
     def initUI(self):
@@ -160,13 +251,56 @@ class MainWindow(QMainWindow):
         self.run_button.clicked.connect(self.run_algorithm)
         self.run_button.setFixedSize(QSize(200, 40))
 
+        # League Win Probability Matrix Button
+        self.matrix_button = QPushButton("League Matrix")
+        self.matrix_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.matrix_button.clicked.connect(self.show_win_probability_matrix)
+        self.matrix_button.setFixedSize(QSize(200, 40))
+
+        # Cancel Button (cancels every queued and running matchup)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.cancel_button.clicked.connect(self.cancel_jobs)
+        self.cancel_button.setFixedSize(QSize(200, 40))
+        self.cancel_button.setEnabled(False)
+
+        # Slate Button (scores a whole schedule file in one batch)
+        self.slate_button = QPushButton("Run Slate")
+        self.slate_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.slate_button.clicked.connect(self.run_slate)
+        self.slate_button.setFixedSize(QSize(200, 40))
+
+        # Timing Button (per-stage timing report for this session)
+        self.timing_button = QPushButton("Timing")
+        self.timing_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.timing_button.clicked.connect(self.show_timing_report)
+        self.timing_button.setFixedSize(QSize(200, 40))
+
         button_layout = QHBoxLayout()
         button_layout.addStretch()
         button_layout.addWidget(self.run_button)
+        button_layout.addWidget(self.slate_button)
+        button_layout.addWidget(self.matrix_button)
+        button_layout.addWidget(self.timing_button)
+        button_layout.addWidget(self.cancel_button)
         button_layout.addStretch()
 
+        # Pipeline progress for the queued matchups
+        self.stage_progress = QProgressBar()
+        self.stage_progress.setMaximum(len(PIPELINE_STAGES))
+        self.stage_progress.setAlignment(Qt.AlignCenter)
+        self.stage_progress.setFixedSize(QSize(620, 24))
+        self.stage_progress.setFormat("Idle")
+        self.stage_progress.setValue(0)
+
+        progress_layout = QHBoxLayout()
+        progress_layout.addStretch()
+        progress_layout.addWidget(self.stage_progress)
+        progress_layout.addStretch()
+
         main_layout.addWidget(input_container)
         main_layout.addLayout(button_layout)
+        main_layout.addLayout(progress_layout)
 
         # Visual Comparisons
         comparison_group = QWidget()
@@ -267,8 +401,8 @@ class MainWindow(QMainWindow):
         # Set the primary color to a blue-purple
         primary_color = "#6a0dad"  # Dark violet
 
-        # Style the Run Algorithm button
-        self.run_button.setStyleSheet(f"""
+        # Style the Run Algorithm and League Matrix buttons
+        button_style = f"""
             QPushButton {{
                 background-color: {primary_color};
                 color: white;
@@ -278,7 +412,12 @@ class MainWindow(QMainWindow):
             QPushButton:hover {{
                 background-color: #7a1dad;
             }}
-        """)
+        """
+        self.run_button.setStyleSheet(button_style)
+        self.matrix_button.setStyleSheet(button_style)
+        self.slate_button.setStyleSheet(button_style)
+        self.timing_button.setStyleSheet(button_style)
+        self.cancel_button.setStyleSheet(button_style)
 
         # Style input fields and labels
         self.setStyleSheet("""
@@ -343,72 +482,191 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Input Error", "Please fill in all fields.")
             return
 
+        # Queue the matchup; the pipeline runs on the thread pool so the window stays responsive
+        matchup = {
+            'year': year, 'date_today': date_today, 'home_team': home_team, 'away_team': away_team,
+            'pitcher_home': pitcher_home, 'pitcher_away': pitcher_away,
+            'home_odds': home_odds, 'away_odds': away_odds
+        }
+        self.start_job(MatchupWorker(self.take_job_id(), matchup))
+
+    def run_slate(self):
+        """Scores every game in a schedule file (home_team, away_team, pitchers, odds) in one batch."""
+        path, _ = QFileDialog.getOpenFileName(self, "Open Slate", "", "Schedule files (*.csv *.json)")
+        if not path:
+            return
         try:
-            home_team_stats, used_pitcher_stats_home = get_team_stats(home_team, year, pitcher_home)
-            away_team_stats, used_pitcher_stats_away = get_team_stats(away_team, year, pitcher_away)
-        except ValueError as e:
-            QMessageBox.warning(self, "Data Error", f"Error: {e}")
+            games = load_slate(path)
+        except Exception as e:
+            QMessageBox.warning(self, "Input Error", f"Could not read the slate: {e}")
             return
-
-        # Win probability calculation
-        win_prob = original_method(away_team_stats, home_team_stats)
-
-        # Implied probabilities from odds
-        implied_prob_home = 1 / american_to_decimal(home_odds)
-        implied_prob_away = 1 / american_to_decimal(away_odds)
-
-        # Adjusted odds
-        home_adjusted_odds = calculate_adjusted_odds(home_odds, 1 - win_prob, implied_prob_home)
-        away_adjusted_odds = calculate_adjusted_odds(away_odds, win_prob, implied_prob_away)
-
-        # Edge calculation
-        edge_home = calculate_edge(home_adjusted_odds, home_odds)
-        edge_away = calculate_edge(away_adjusted_odds, away_odds)
-
-        # Head-to-head data
-        h2h_wins, h2h_games = get_head_to_head(away_team, home_team, year)
-
-        # Current season win percentages
-        home_win_pct = get_team_win_percentage(home_team, year)
-        away_win_pct = get_team_win_percentage(away_team, year)
-
-        # Get team rankings
-        home_rank = get_team_rank(home_team, year)
-        away_rank = get_team_rank(away_team, year)
-
-        # Metrics comparison
-        better_metrics_home, better_metrics_away = compare_metrics(home_team_stats, away_team_stats)
-
-        # Calculate team scores
-        home_score = calculate_team_score(1 - win_prob, implied_prob_home, home_win_pct, home_rank, better_metrics_home)
-        away_score = calculate_team_score(win_prob, implied_prob_away, away_win_pct, away_rank, better_metrics_away)
-
-        # Calculate Pythagorean Winning Percentage
-        home_pythag = calculate_pythagorean_winning_percentage(home_team_stats['RunsScored'], home_team_stats['RunsAllowed'])
-        away_pythag = calculate_pythagorean_winning_percentage(away_team_stats['RunsScored'], away_team_stats['RunsAllowed'])
-        pythag_diff = home_pythag - away_pythag
-
-        # Prepare matchup data for saving
-        matchup_data = prepare_matchup_data(
-            date_today, home_team, away_team, home_rank, away_rank, home_odds, away_odds,
-            home_adjusted_odds, away_adjusted_odds, win_prob, edge_home, edge_away,
-            None, None, better_metrics_home, better_metrics_away,
-            implied_prob_home, implied_prob_away, home_win_pct, away_win_pct,
-            home_pythag, away_pythag, pythag_diff
-        )
-
-        # Save data to Excel
-        save_to_excel(matchup_data, output_file)
+        self.start_job(SlateWorker(self.take_job_id(), games, datetime.now().year,
+                                   datetime.now().strftime('%Y-%m-%d')))
+
+    def take_job_id(self):
+        job_id = self.next_job_id
+        self.next_job_id += 1
+        return job_id
+
+    def start_job(self, worker):
+        job_id = worker.job_id
+        worker.signals.stage.connect(self.on_job_stage)
+        worker.signals.finished.connect(self.on_job_finished)
+        worker.signals.failed.connect(self.on_job_failed)
+        worker.signals.cancelled.connect(self.on_job_cancelled)
+        self.jobs[job_id] = worker
+        self.job_stages[job_id] = 'queued'
+        self.thread_pool.start(worker)
+        self.update_job_status()
+
+    def cancel_jobs(self):
+        """Drops queued matchups and stops running ones at their next stage boundary."""
+        for job_id, worker in list(self.jobs.items()):
+            if self.thread_pool.tryTake(worker):
+                self.on_job_cancelled(job_id)
+            else:
+                worker.cancel()
+        self.update_job_status()
+
+    def on_job_stage(self, job_id, stage):
+        if job_id in self.jobs:
+            self.job_stages[job_id] = stage
+            self.update_job_status()
+
+    def on_job_finished(self, job_id, matchup):
+        self.remove_job(job_id)
+        if 'slate' in matchup:
+            self.show_slate_table(matchup['slate'])
+            return
+        if 'matrix' in matchup:
+            self.show_matrix_table(matchup['matrix'])
+            return
+        results = matchup['results']
 
         # Update the visual comparisons
         self.update_visual_comparisons(
-            better_metrics_home, better_metrics_away, home_team, away_team,
-            win_prob, home_win_pct, away_win_pct, home_team_stats, away_team_stats,
-            home_odds, away_odds, implied_prob_home, implied_prob_away,
-            home_adjusted_odds, away_adjusted_odds, edge_home, edge_away,
-            home_rank, away_rank, home_pythag, away_pythag, pythag_diff
+            results['better_metrics_home'], results['better_metrics_away'], matchup['home_team'], matchup['away_team'],
+            results['win_prob'], results['home_win_pct'], results['away_win_pct'],
+            results['home_team_stats'], results['away_team_stats'],
+            matchup['home_odds'], matchup['away_odds'], results['implied_prob_home'], results['implied_prob_away'],
+            results['home_adjusted_odds'], results['away_adjusted_odds'], results['edge_home'], results['edge_away'],
+            results['home_rank'], results['away_rank'], results['home_pythag'], results['away_pythag'],
+            results['pythag_diff']
         )
 
+    def show_slate_table(self, table):
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Slate ({len(table)} games, click a header to sort)")
+        dialog.resize(1300, 600)
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(frame_to_table(table, dialog))
+        dialog.show()
+
+    def show_timing_report(self):
+        """Shows wall time, call counts and cache hits per span for everything run so far."""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Timing Report (click a header to sort)")
+        dialog.resize(1100, 600)
+        layout = QVBoxLayout(dialog)
+        dialog.table = frame_to_table(trace_summary(), dialog, float_format="{:.3f}")
+        layout.addWidget(dialog.table)
+
+        def refresh():
+            table = frame_to_table(trace_summary(), dialog, float_format="{:.3f}")
+            layout.replaceWidget(dialog.table, table)
+            dialog.table.deleteLater()
+            dialog.table = table
+
+        def save():
+            spans = write_trace('gui')
+            QMessageBox.information(dialog, "Timing Report", f"Appended {spans} spans to {TRACE_FILE}.")
+
+        def reset():
+            reset_trace()
+            refresh()
+
+        action_layout = QHBoxLayout()
+        action_layout.addStretch()
+        for text, action in [("Refresh", refresh), ("Save", save), ("Reset", reset)]:
+            button = QPushButton(text)
+            button.clicked.connect(action)
+            action_layout.addWidget(button)
+        layout.addLayout(action_layout)
+        dialog.show()
+
+    def on_job_failed(self, job_id, message):
+        self.remove_job(job_id)
+        QMessageBox.warning(self, "Data Error", message)
+
+    def on_job_cancelled(self, job_id):
+        self.remove_job(job_id)
+
+    def remove_job(self, job_id):
+        self.jobs.pop(job_id, None)
+        self.job_stages.pop(job_id, None)
+        self.update_job_status()
+
+    def update_job_status(self):
+        """Shows the stage of the oldest running matchup and how many are waiting."""
+        self.cancel_button.setEnabled(bool(self.jobs))
+        if not self.jobs:
+            self.stage_progress.setFormat("Idle")
+            self.stage_progress.setValue(0)
+            return
+
+        queued = sum(1 for stage in self.job_stages.values() if stage == 'queued')
+        running = [job_id for job_id, stage in self.job_stages.items() if stage != 'queued']
+        if not running:
+            self.stage_progress.setFormat(f"{queued} queued")
+            self.stage_progress.setValue(0)
+            return
+
+        job_id = min(running)
+        stage = self.job_stages[job_id]
+        worker = self.jobs[job_id]
+        cancelling = " (cancelling)" if worker.cancel_event.is_set() else ""
+        self.stage_progress.setValue(PIPELINE_STAGES.index(stage) + 1)
+        self.stage_progress.setFormat(
+            f"{worker.label}: {stage}{cancelling}" + (f" | {queued} queued" if queued else ""))
+
+    def show_win_probability_matrix(self):
+        """Shows every team's win probability against every other team, using any pitchers entered."""
+        pitchers = {}
+        for team_input, pitcher_input in [(self.home_team_input, self.pitcher_home_input),
+                                          (self.away_team_input, self.pitcher_away_input)]:
+            team = team_input.text().strip()
+            pitcher = pitcher_input.text().strip()
+            if team and pitcher:
+                pitchers[team] = pitcher
+
+        # Fetching the season tables can take a while on a cold cache, so it runs on the thread pool
+        self.start_job(MatrixWorker(self.take_job_id(), datetime.now().year, pitchers))
+
+    def show_matrix_table(self, matrix):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("League Win Probability Matrix (row team vs column team)")
+        dialog.resize(1100, 800)
+        table = QTableWidget(len(matrix.index), len(matrix.columns), dialog)
+        table.setFont(QFont("Arial", 9))
+        table.setHorizontalHeaderLabels(list(matrix.columns))
+        table.setVerticalHeaderLabels(list(matrix.index))
+        for row, team in enumerate(matrix.index):
+            for col, opponent in enumerate(matrix.columns):
+                probability = matrix.at[team, opponent]
+                item = QTableWidgetItem("" if team == opponent else f"{probability:.1%}")
+                if team != opponent:
+                    # Green when the row team is favored, red when it is the underdog
+                    if probability > 0.5:
+                        item.setBackground(QColor(0, 100, 0, int(300 * (probability - 0.5))))
+                    else:
+                        item.setBackground(QColor(139, 0, 0, int(300 * (0.5 - probability))))
+                table.setItem(row, col, item)
+        table.resizeColumnsToContents()
+
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(table)
+        dialog.show()
+
     def update_visual_comparisons(self, better_metrics_home, better_metrics_away, home_team, away_team,
                                   win_prob, home_win_pct, away_win_pct, home_team_stats, away_team_stats,
                                   home_odds, away_odds, implied_prob_home, implied_prob_away,
@@ -635,6 +893,13 @@ class MainWindow(QMainWindow):
         self.metrics_table.resizeColumnsToContents()
         self.metrics_table.resizeRowsToContents()
 
+    def closeEvent(self, event):
+        # Drop queued jobs and signal running ones first, so the wait is only for the current stage
+        self.cancel_jobs()
+        if not self.thread_pool.waitForDone(close_wait_ms):
+            print("Closing with a job still running; it stops at its next stage boundary.")
+        super().closeEvent(event)
+
     def keyPressEvent(self, event):
         # Override to prevent closing the application with Esc key
         if event.key() == Qt.Key_Escape:
@@ -0,0 +1,238 @@
+import argparse
+import csv
+import io
+import os
+import tempfile
+import threading
+import pandas as pd
+from tracing import traced
+
+# Hardcoded values
+MATCHUP_LOG_FILE = "mlb_matchup_log.csv"  # Append-only matchup history
+EXCEL_EXPORT_FILE = "mlb_matchup_export.xlsx"  # Formatted workbook regenerated from the log
+LEGACY_EXCEL_FILE = "mlb_matchup_data.xlsx"  # Workbook written by the old save_to_excel
+
+# Serializes appends from background workers
+_log_lock = threading.Lock()
+
+# Columns of a prepare_matchup_data record, in log order
+MATCHUP_LOG_COLUMNS = [
+    'Date', 'Home Team', 'Away Team', 'Home Rank', 'Away Rank', 'Home Odds', 'Away Odds',
+    'Home Adjusted Odds', 'Away Adjusted Odds', 'Home Win Probability %', 'Away Win Probability %',
+    'Home Edge', 'Away Edge', 'Home Kelly Bet Size', 'Away Kelly Bet Size',
+    'Home Metrics Better', 'Away Metrics Better', 'Home Implied Win %', 'Away Implied Win %',
+    'Home Season Win %', 'Away Season Win %', 'Home Score', 'Away Score',
+    'Home Pythagorean Win %', 'Away Pythagorean Win %', 'Pythagorean Win % Difference'
+]
+
+# Columns every complete row has; a row missing any of them was cut short
+REQUIRED_LOG_COLUMNS = [
+    'Date', 'Home Team', 'Away Team', 'Home Odds', 'Away Odds',
+    'Home Win Probability %', 'Away Win Probability %', 'Home Edge', 'Away Edge'
+]
+
+# Hand-edited headers in the legacy workbook that map onto log columns
+LEGACY_COLUMN_NAMES = {
+    'Home Pythagorean win%': 'Home Pythagorean Win %',
+    'Away Pythagorean win%': 'Away Pythagorean Win %',
+    'Difference': 'Pythagorean Win % Difference'
+}
+
+def log_header(log_file):
+    """Returns the header of an existing log, or None if the log is missing or empty."""
+    if not os.path.exists(log_file) or os.path.getsize(log_file) == 0:
+        return None
+    with open(log_file, 'r', newline='') as f:
+        return next(csv.reader(f), None)
+
+@traced()
+def append_matchups(records, log_file=MATCHUP_LOG_FILE):
+    """
+    Appends matchup records to the log. Only the new rows are written, so the cost per
+    row stays constant however long the history gets, and earlier rows are never rewritten.
+
+    Each row goes out as one write of a complete line, and the file is fsynced before
+    returning, so a crash can at worst leave the last line unterminated; read_matchup_log
+    drops such a line.
+
+    Args:
+    records (list): Matchup dicts from build_matchup_record / prepare_matchup_data.
+    log_file (str): The CSV log file.
+    """
+    if not records:
+        return
+    with _log_lock:
+        write_records(records, log_file)
+
+def format_row(writer, buffer, values):
+    """Formats one CSV row, line terminator included."""
+    buffer.seek(0)
+    buffer.truncate()
+    writer.writerow(values)
+    return buffer.getvalue()
+
+def write_records(records, log_file):
+    header = log_header(log_file)
+    new_file = header is None
+    if new_file:
+        header = MATCHUP_LOG_COLUMNS + [key for key in records[0] if key not in MATCHUP_LOG_COLUMNS]
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=header, restval='', extrasaction='ignore')
+    lines = [format_row(writer, buffer, record) for record in records]
+    if new_file:
+        lines.insert(0, format_row(csv.writer(buffer), buffer, header))
+
+    fd = os.open(log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if not new_file:
+            # Start on a fresh line if a crash left the last row half written
+            with open(log_file, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    os.write(fd, b'\n')
+        for line in lines:
+            os.write(fd, line.encode('utf-8'))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def append_matchup(record, log_file=MATCHUP_LOG_FILE):
+    """Appends a single matchup record to the log."""
+    append_matchups([record], log_file)
+
+def read_matchup_log(log_file=MATCHUP_LOG_FILE):
+    """
+    Reads the matchup log into a DataFrame.
+
+    Rows torn by a crash mid-write are dropped: an unterminated last line, rows with
+    fewer fields than the header, and rows missing any of REQUIRED_LOG_COLUMNS.
+    """
+    if log_header(log_file) is None:
+        return pd.DataFrame(columns=MATCHUP_LOG_COLUMNS)
+
+    with open(log_file, 'r', newline='') as f:
+        text = f.read()
+    if not text.endswith('\n'):
+        text = text[:text.rfind('\n') + 1]
+
+    rows = list(csv.reader(io.StringIO(text)))
+    if not rows:
+        return pd.DataFrame(columns=MATCHUP_LOG_COLUMNS)
+    header = rows[0]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(row for row in rows[1:] if len(row) == len(header))
+    buffer.seek(0)
+
+    log = pd.read_csv(buffer)
+    required = [column for column in REQUIRED_LOG_COLUMNS if column in log.columns]
+    return log.dropna(subset=required).reset_index(drop=True)
+
+def export_to_excel(log_file=MATCHUP_LOG_FILE, output_file=EXCEL_EXPORT_FILE, sheet_name='Matchups'):
+    """
+    Regenerates the formatted workbook from the log with openpyxl's write-only mode,
+    streaming rows instead of loading an existing workbook. The file is replaced atomically.
+
+    Returns:
+    int: Number of rows exported.
+    """
+    # openpyxl is only needed here, so appending to the log does not pay for importing it
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    log = read_matchup_log(log_file)
+    log['Date'] = pd.to_datetime(log['Date'], format='mixed', errors='coerce').fillna(log['Date'])
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.freeze_panes = 'A2'
+    for position, column in enumerate(log.columns):
+        sheet.column_dimensions[get_column_letter(position + 1)].width = max(10, len(str(column)) + 2)
+
+    header_font = Font(bold=True)
+    header = []
+    for column in log.columns:
+        cell = WriteOnlyCell(sheet, value=column)
+        cell.font = header_font
+        header.append(cell)
+    sheet.append(header)
+
+    for row in log.itertuples(index=False):
+        cells = []
+        for value in row:
+            if pd.isna(value):
+                value = None
+            elif hasattr(value, 'item'):
+                value = value.item()  # NumPy scalars to plain Python values
+            cell = WriteOnlyCell(sheet, value=value)
+            if isinstance(value, float):
+                cell.number_format = '#,##0.00'
+            elif isinstance(value, pd.Timestamp):
+                cell.number_format = 'yyyy-mm-dd'
+            cells.append(cell)
+        sheet.append(cells)
+
+    directory = os.path.dirname(os.path.abspath(output_file))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.xlsx')
+    os.close(fd)
+    try:
+        workbook.save(temp_path)
+        os.replace(temp_path, output_file)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return len(log)
+
+def import_excel_history(excel_file=LEGACY_EXCEL_FILE, log_file=MATCHUP_LOG_FILE):
+    """
+    Seeds a new log with the rows of the legacy workbook. The workbook itself is left untouched.
+
+    Hand-added named columns (such as 'BETS') are carried over after the standard columns;
+    unnamed ones are dropped.
+
+    Returns:
+    int: Number of rows imported, or 0 if the log already has rows.
+    """
+    if log_header(log_file) is not None:
+        print(f"{log_file} already exists; not importing {excel_file} over it.")
+        return 0
+
+    history = pd.read_excel(excel_file)
+    history = history.rename(columns=LEGACY_COLUMN_NAMES)
+    history = history.loc[:, [not str(column).startswith('Unnamed') for column in history.columns]]
+    history = history.astype(object).where(history.notna(), None)
+
+    extra_columns = [column for column in history.columns if column not in MATCHUP_LOG_COLUMNS]
+    records = history.to_dict('records')
+
+    with open(log_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=MATCHUP_LOG_COLUMNS + extra_columns, restval='')
+        writer.writeheader()
+        writer.writerows(records)
+        f.flush()
+        os.fsync(f.fileno())
+    return len(records)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the append-only matchup log.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Regenerate the formatted Excel workbook from the log")
+    export_parser.add_argument('--log', default=MATCHUP_LOG_FILE)
+    export_parser.add_argument('--output', default=EXCEL_EXPORT_FILE)
+
+    import_parser = subparsers.add_parser('import', help="Seed a new log from the legacy Excel workbook")
+    import_parser.add_argument('--excel', default=LEGACY_EXCEL_FILE)
+    import_parser.add_argument('--log', default=MATCHUP_LOG_FILE)
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        rows = export_to_excel(args.log, args.output)
+        print(f"Exported {rows} matchups to {args.output}")
+    else:
+        rows = import_excel_history(args.excel, args.log)
+        print(f"Imported {rows} matchups into {args.log}")
@@ -1,3 +1,6 @@
+import numpy as np
+import pandas as pd
+
 def american_to_decimal(odds):
     """
     Converts American odds to decimal odds.
@@ -62,3 +65,80 @@ def calculate_edge(adjusted_odds, original_odds):
     else:
         edge = (original_odds / adjusted_odds)
     return edge
+
+def wrap_like(result, values):
+    """Returns result as a Series with the input's index when values was a Series."""
+    if isinstance(values, pd.Series):
+        return pd.Series(result, index=values.index, name=values.name)
+    return result
+
+def american_to_decimal_array(odds):
+    """
+    Converts an array of American odds to decimal odds.
+
+    Args:
+    odds (ndarray or Series): The American odds.
+
+    Returns:
+    ndarray or Series: The decimal odds, matching the input type.
+    """
+    values = np.asarray(odds, dtype=float)
+    with np.errstate(divide='ignore'):
+        decimal_odds = np.where(values > 0, (values / 100) + 1, (100 / np.abs(values)) + 1)
+    return wrap_like(decimal_odds, odds)
+
+def decimal_to_american_array(decimal_odds):
+    """
+    Converts an array of decimal odds to American odds.
+
+    Args:
+    decimal_odds (ndarray or Series): The decimal odds.
+
+    Returns:
+    ndarray or Series: The American odds, matching the input type.
+    """
+    values = np.asarray(decimal_odds, dtype=float)
+    with np.errstate(divide='ignore'):
+        american_odds = np.where(values >= 2, (values - 1) * 100, -100 / (values - 1))
+    return wrap_like(american_odds, decimal_odds)
+
+def calculate_adjusted_odds_array(original_odds, predicted_prob, implied_prob):
+    """
+    Adjusts arrays of odds based on predicted and implied probabilities,
+    with the same clamping as calculate_adjusted_odds.
+
+    Args:
+    original_odds (ndarray or Series): The original American odds.
+    predicted_prob (ndarray or Series): The predicted win probabilities.
+    implied_prob (ndarray or Series): The implied probabilities from the odds.
+
+    Returns:
+    ndarray or Series: The adjusted odds, matching the type of original_odds.
+    """
+    odds = np.asarray(original_odds, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.asarray(predicted_prob, dtype=float) / np.asarray(implied_prob, dtype=float)
+    adjustment_factor = np.clip(ratio, 0.01, 100)  # Clamp the adjustment factor
+
+    adjusted_odds = np.where(odds > 0, odds / adjustment_factor, odds * adjustment_factor)
+
+    # Clamp adjusted odds
+    adjusted_odds = np.clip(adjusted_odds, -500, 500)
+    return wrap_like(adjusted_odds, original_odds)
+
+def calculate_edge_array(adjusted_odds, original_odds):
+    """
+    Calculates edges for arrays of adjusted and original odds.
+
+    Args:
+    adjusted_odds (ndarray or Series): The adjusted odds.
+    original_odds (ndarray or Series): The original American odds.
+
+    Returns:
+    ndarray or Series: The edges, matching the type of original_odds.
+    """
+    adjusted = np.asarray(adjusted_odds, dtype=float)
+    odds = np.asarray(original_odds, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        edge = np.where(odds < 0, adjusted / odds, odds / adjusted)
+    return wrap_like(edge, original_odds)
@@ -0,0 +1,297 @@
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import time
+from collections import deque
+import pandas as pd
+from odds_calculations import american_to_decimal, calculate_adjusted_odds_array, calculate_edge_array
+from odds_normalization import remove_vig, consensus_fair_line, NO_VIG_METHOD
+
+# Hardcoded values
+LINE_HISTORY_SIZE = 64  # Line moves kept per game
+FEED_POLL_INTERVAL = 2.0  # Seconds between polls when following a live feed
+FEED_COLUMNS = ['game', 'book', 'side', 'price', 'timestamp']
+
+def game_key(home_team, away_team):
+    """Returns the feed's game identifier for a matchup, e.g. 'NYY@BOS'."""
+    return f"{away_team}@{home_team}"
+
+def matchup_teams(game):
+    """Splits a game identifier into (home_team, away_team)."""
+    away_team, home_team = game.split('@', 1)
+    return home_team, away_team
+
+def parse_quote(quote):
+    """
+    Normalizes one raw feed record into a quote dict, or returns None if it is malformed.
+
+    American prices are at least 100 in magnitude; anything else (0, NaN, inf, decimal
+    odds sent by mistake) is rejected rather than poisoning the best price and edges.
+    """
+    try:
+        side = str(quote['side']).strip().lower()
+        if side not in ('home', 'away'):
+            return None
+        price = float(quote['price'])
+        if not math.isfinite(price) or abs(price) < 100:
+            return None
+        return {
+            'game': str(quote['game']).strip(),
+            'book': str(quote['book']).strip(),
+            'side': side,
+            'price': price,
+            'timestamp': pd.Timestamp(quote['timestamp'])
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+
+class OddsFeed:
+    """
+    Tails a JSON-lines or CSV odds feed file, one quote per line
+    (game, book, side, price, timestamp).
+
+    Keeps every book's latest price per game and side, the best available price per
+    side, and a bounded ring buffer of best-line moves per game.
+    """
+
+    def __init__(self, path, history_size=LINE_HISTORY_SIZE):
+        self.path = path
+        self.history_size = history_size
+        self.is_csv = path.lower().endswith('.csv')
+        self.position = 0
+        self.header = None
+        self.quotes = {}  # game -> {(book, side): (price, timestamp)}
+        self.best = {}  # game -> (best home price, best away price)
+        self.history = {}  # game -> deque of (timestamp, best home price, best away price)
+
+    def read_lines(self):
+        """Reads the complete lines appended since the last poll."""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.position)
+            chunk = f.read()
+        # Leave a partially written last line for the next poll
+        end = chunk.rfind(b'\n') + 1
+        self.position += end
+        return chunk[:end].decode('utf-8').splitlines()
+
+    def parse_lines(self, lines):
+        """Parses raw feed lines into quote dicts, skipping malformed ones."""
+        records = []
+        if self.is_csv:
+            if self.header is None and lines:
+                self.header = next(csv.reader([lines[0]]))
+                lines = lines[1:]
+            records = list(csv.DictReader(io.StringIO('\n'.join(lines)), fieldnames=self.header)) if lines else []
+        else:
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Skipping malformed feed line: {line}")
+
+        quotes = [parse_quote(record) for record in records]
+        return [quote for quote in quotes if quote is not None]
+
+    def apply(self, quotes):
+        """
+        Applies quotes in order and returns the set of games whose best line moved.
+        """
+        touched = set()
+        for quote in quotes:
+            game_quotes = self.quotes.setdefault(quote['game'], {})
+            game_quotes[(quote['book'], quote['side'])] = (quote['price'], quote['timestamp'])
+            touched.add(quote['game'])
+
+        moved = set()
+        for game in touched:
+            best = (self.best_price(game, 'home'), self.best_price(game, 'away'))
+            if best == self.best.get(game):
+                continue
+            self.best[game] = best
+            timestamp = max(timestamp for _, timestamp in self.quotes[game].values())
+            self.history.setdefault(game, deque(maxlen=self.history_size)).append((timestamp,) + best)
+            moved.add(game)
+        return moved
+
+    def poll(self):
+        """Ingests any new lines in the feed file and returns the games whose best line moved."""
+        return self.apply(self.parse_lines(self.read_lines()))
+
+    def best_price(self, game, side):
+        """Returns the best (highest payout) American price any book offers on a side, or None."""
+        prices = [price for (_, quote_side), (price, _) in self.quotes.get(game, {}).items() if quote_side == side]
+        if not prices:
+            return None
+        return max(prices, key=american_to_decimal)
+
+    def best_prices(self, games=None):
+        """
+        Returns the latest best price per side.
+
+        Returns:
+        DataFrame: Indexed by game, with 'home_odds' and 'away_odds'.
+        """
+        games = list(self.best) if games is None else list(games)
+        rows = [self.best.get(game, (None, None)) for game in games]
+        return pd.DataFrame(rows, index=pd.Index(games, name='game'), columns=['home_odds', 'away_odds'], dtype=float)
+
+    def line_history(self, game):
+        """Returns a game's best-line moves, oldest first."""
+        return pd.DataFrame(list(self.history.get(game, [])), columns=['timestamp', 'home_odds', 'away_odds'])
+
+    def book_quotes(self):
+        """
+        Returns every book's two-way market, one row per (game, book) quoting both sides,
+        in the layout consensus_fair_line expects.
+        """
+        rows = []
+        for game, game_quotes in self.quotes.items():
+            for book in {book for book, _ in game_quotes}:
+                home = game_quotes.get((book, 'home'))
+                away = game_quotes.get((book, 'away'))
+                if home is not None and away is not None:
+                    rows.append({'game': game, 'book': book, 'home_odds': home[0], 'away_odds': away[0]})
+        return pd.DataFrame(rows, columns=['game', 'book', 'home_odds', 'away_odds'])
+
+    def consensus(self, method=NO_VIG_METHOD):
+        """Returns the multi-book consensus fair line for every game in the feed."""
+        return consensus_fair_line(self.book_quotes(), method=method)
+
+def compute_edges(prices, home_win_probs):
+    """
+    Computes edges for both sides of each game from the best prices, the same way
+    compute_matchup does for a single matchup.
+
+    Args:
+    prices (DataFrame): Indexed by game with 'home_odds' and 'away_odds' (from OddsFeed.best_prices).
+    home_win_probs (dict or Series): Game -> the model's home win probability.
+
+    Returns:
+    DataFrame: Indexed by game, with the prices, model and no-vig probabilities and edges.
+    Games without a probability or a two-way price are dropped.
+    """
+    edges = prices.copy()
+    edges['home_win_prob'] = pd.Series(home_win_probs, dtype=float).reindex(edges.index)
+    edges = edges.dropna(subset=['home_odds', 'away_odds', 'home_win_prob'])
+    if edges.empty:
+        return edges
+
+    implied_prob_home, implied_prob_away = remove_vig(edges['home_odds'], edges['away_odds'])
+    edges['implied_prob_home'] = implied_prob_home
+    edges['implied_prob_away'] = implied_prob_away
+    edges['edge_home'] = calculate_edge_array(
+        calculate_adjusted_odds_array(edges['home_odds'], edges['home_win_prob'], implied_prob_home), edges['home_odds'])
+    edges['edge_away'] = calculate_edge_array(
+        calculate_adjusted_odds_array(edges['away_odds'], 1 - edges['home_win_prob'], implied_prob_away), edges['away_odds'])
+    return edges
+
+def win_probabilities_for(games, matrix):
+    """
+    Looks up each game's home win probability in a get_win_probability_matrix table.
+    Games with a team outside the matrix are skipped.
+    """
+    probabilities = {}
+    for game in games:
+        home_team, away_team = matchup_teams(game)
+        if home_team in matrix.index and away_team in matrix.index:
+            # Same orientation as compute_matchup: the away team is scored first
+            probabilities[game] = 1 - matrix.at[away_team, home_team]
+    return probabilities
+
+def follow_feed(feed, home_win_probs, on_update, interval=FEED_POLL_INTERVAL, max_polls=None):
+    """
+    Polls a feed and calls on_update(edges) with recomputed edges for the games
+    whose best line moved. Games that did not move are not recomputed.
+
+    Args:
+    feed (OddsFeed): The feed to tail.
+    home_win_probs (dict or callable): Game -> home win probability, or a function taking
+    the moved games and returning that mapping.
+    on_update (callable): Receives the edges DataFrame of the moved games.
+    interval (float): Seconds between polls.
+    max_polls (int): Stop after this many polls; None follows until interrupted.
+    """
+    polls = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            moved = feed.poll()
+            if moved:
+                probabilities = home_win_probs(moved) if callable(home_win_probs) else home_win_probs
+                edges = compute_edges(feed.best_prices(sorted(moved)), probabilities)
+                if not edges.empty:
+                    on_update(edges)
+            polls += 1
+            if max_polls is None or polls < max_polls:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped following the odds feed.")
+
+def replay_feed(path, home_win_probs=None, history_size=LINE_HISTORY_SIZE):
+    """
+    Replays a recorded feed file in timestamp order, as a local stand-in for a live feed.
+
+    Args:
+    home_win_probs (dict or callable): As for follow_feed; None skips the edges.
+
+    Yields:
+    tuple: (timestamp, edges) for each timestamp at which a line moved; edges covers only
+    the moved games and is None when no home_win_probs are given.
+    """
+    feed = OddsFeed(path, history_size)
+    quotes = feed.parse_lines(feed.read_lines())
+    quotes.sort(key=lambda quote: quote['timestamp'])
+
+    start = 0
+    while start < len(quotes):
+        timestamp = quotes[start]['timestamp']
+        end = start
+        while end < len(quotes) and quotes[end]['timestamp'] == timestamp:
+            end += 1
+        moved = feed.apply(quotes[start:end])
+        start = end
+        if not moved:
+            continue
+        if home_win_probs is None:
+            yield timestamp, None
+        else:
+            probabilities = home_win_probs(moved) if callable(home_win_probs) else home_win_probs
+            yield timestamp, compute_edges(feed.best_prices(sorted(moved)), probabilities)
+
+def format_edges(edges):
+    """Formats an edges table for printing, one row per game."""
+    columns = ['home_odds', 'away_odds', 'home_win_prob', 'implied_prob_home', 'edge_home', 'edge_away']
+    return edges[columns].to_string(float_format=lambda value: f"{value:.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay or follow an odds feed and print the edges as lines move.")
+    parser.add_argument('feed', help="JSON lines or CSV feed file (game, book, side, price, timestamp)")
+    parser.add_argument('--follow', action='store_true', help="Tail the file as a live feed instead of replaying it")
+    parser.add_argument('--year', type=int, default=None)
+    parser.add_argument('--interval', type=float, default=FEED_POLL_INTERVAL, help="Seconds between polls with --follow")
+    parser.add_argument('--max-polls', type=int, default=None, help="Stop following after this many polls")
+    args = parser.parse_args()
+
+    # Imported here so the feed classes stay usable without loading the model's data modules
+    from pipeline import get_win_probability_matrix
+    matrix = get_win_probability_matrix(args.year)
+
+    def home_win_probs(games):
+        return win_probabilities_for(games, matrix)
+
+    if args.follow:
+        def on_update(edges):
+            print(f"\n{pd.Timestamp.now():%H:%M:%S} lines moved:")
+            print(format_edges(edges))
+        follow_feed(OddsFeed(args.feed), home_win_probs, on_update, args.interval, args.max_polls)
+    else:
+        for timestamp, edges in replay_feed(args.feed, home_win_probs):
+            if not edges.empty:
+                print(f"\n{timestamp} lines moved:")
+                print(format_edges(edges))
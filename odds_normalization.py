@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+from odds_calculations import american_to_decimal_array, decimal_to_american_array, wrap_like
+
+# Hardcoded values
+NO_VIG_METHOD = 'multiplicative'  # 'multiplicative', 'additive' or 'shin'
+SHIN_ITERATIONS = 60  # Bisection steps when solving for Shin's insider-trading share z
+
+def remove_vig(home_odds, away_odds, method=NO_VIG_METHOD):
+    """
+    Removes the bookmaker's overround from two-way moneyline markets.
+
+    Args:
+    home_odds (float, ndarray or Series): Home team American odds.
+    away_odds (float, ndarray or Series): Away team American odds, aligned with home_odds.
+    method (str): 'multiplicative' (scale both sides by the booksum), 'additive'
+    (subtract half the overround from each side) or 'shin' (Shin's model, which
+    shades longshots more than favorites).
+
+    Returns:
+    tuple: (fair_prob_home, fair_prob_away), matching the type of home_odds.
+    """
+    implied_home = 1 / np.asarray(american_to_decimal_array(home_odds), dtype=float)
+    implied_away = 1 / np.asarray(american_to_decimal_array(away_odds), dtype=float)
+    booksum = implied_home + implied_away
+
+    if method == 'multiplicative':
+        fair_home = implied_home / booksum
+    elif method == 'additive':
+        fair_home = np.clip(implied_home - (booksum - 1) / 2, 0, 1)
+    elif method == 'shin':
+        fair_home = shin_probabilities(implied_home, implied_away)
+    else:
+        raise ValueError(f"Unknown no-vig method '{method}'.")
+
+    fair_away = 1 - fair_home
+    if np.ndim(home_odds) == 0:
+        return float(fair_home), float(fair_away)
+    return wrap_like(fair_home, home_odds), wrap_like(fair_away, home_odds)
+
+def shin_probabilities(implied_home, implied_away):
+    """
+    Solves Shin's model for two-way markets, vectorized with a bisection on z.
+
+    Returns:
+    ndarray: Fair home win probabilities. Markets without overround fall back to
+    the multiplicative method. With only two outcomes the solution coincides with
+    the additive method, which makes a handy sanity check.
+    """
+    implied_home = np.asarray(implied_home, dtype=float)
+    implied_away = np.asarray(implied_away, dtype=float)
+    booksum = implied_home + implied_away
+
+    def shin_total(z):
+        total = np.zeros_like(booksum)
+        for implied in (implied_home, implied_away):
+            total += (np.sqrt(z ** 2 + 4 * (1 - z) * implied ** 2 / booksum) - z) / (2 * (1 - z))
+        return total
+
+    # The fair probabilities sum to more than 1 at z = 0 and fall as z grows
+    low = np.zeros_like(booksum)
+    high = np.full_like(booksum, 0.99)
+    for _ in range(SHIN_ITERATIONS):
+        mid = (low + high) / 2
+        too_high = shin_total(mid) > 1
+        low = np.where(too_high, mid, low)
+        high = np.where(too_high, high, mid)
+    z = (low + high) / 2
+
+    fair_home = (np.sqrt(z ** 2 + 4 * (1 - z) * implied_home ** 2 / booksum) - z) / (2 * (1 - z))
+    return np.where(booksum > 1, fair_home, implied_home / booksum)
+
+def consensus_fair_line(quotes, method=NO_VIG_METHOD, aggregate='median'):
+    """
+    Builds a consensus fair line per game from many books' two-way quotes.
+
+    Args:
+    quotes (DataFrame): One row per (game, book) with 'game', 'book', 'home_odds' and 'away_odds'.
+    method (str): No-vig method applied to each book's market.
+    aggregate (str): How books are combined, 'median' or 'mean'.
+
+    Returns:
+    DataFrame: Indexed by game, with the number of books, the consensus fair
+    probabilities and American odds, the mean overround and the best available price per side.
+    """
+    quotes = quotes.dropna(subset=['home_odds', 'away_odds'])
+    home_odds = quotes['home_odds'].to_numpy(dtype=float)
+    away_odds = quotes['away_odds'].to_numpy(dtype=float)
+    home_decimal = american_to_decimal_array(home_odds)
+    away_decimal = american_to_decimal_array(away_odds)
+    fair_home, _ = remove_vig(home_odds, away_odds, method)
+
+    books = pd.DataFrame({
+        'game': quotes['game'].to_numpy(),
+        'fair_prob_home': fair_home,
+        'overround': 1 / home_decimal + 1 / away_decimal - 1,
+        'home_decimal': home_decimal,
+        'away_decimal': away_decimal
+    })
+    grouped = books.groupby('game', sort=False)
+
+    consensus = pd.DataFrame({
+        'books': grouped.size(),
+        'fair_prob_home': grouped['fair_prob_home'].agg(aggregate),
+        'overround': grouped['overround'].mean(),
+        'best_home_decimal': grouped['home_decimal'].max(),
+        'best_away_decimal': grouped['away_decimal'].max()
+    })
+    consensus['fair_prob_away'] = 1 - consensus['fair_prob_home']
+    consensus['fair_home_odds'] = decimal_to_american_array(1 / consensus['fair_prob_home'])
+    consensus['fair_away_odds'] = decimal_to_american_array(1 / consensus['fair_prob_away'])
+    consensus['best_home_odds'] = decimal_to_american_array(consensus.pop('best_home_decimal'))
+    consensus['best_away_odds'] = decimal_to_american_array(consensus.pop('best_away_decimal'))
+    return consensus
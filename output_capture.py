@@ -0,0 +1,67 @@
+import contextvars
+import io
+import sys
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# Buffer receiving print output in the current context, or None to write to the real stdout
+_output_buffer = contextvars.ContextVar('output_buffer', default=None)
+_install_lock = threading.Lock()
+
+class ContextStdout(io.TextIOBase):
+    """
+    Stand-in for sys.stdout that writes to the buffer of the current context.
+
+    Installed once for the whole process, so concurrent sessions each capture their
+    own output instead of swapping sys.stdout from under one another.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def current(self):
+        buffer = _output_buffer.get()
+        return self.stream if buffer is None else buffer
+
+    def write(self, text):
+        return self.current().write(text)
+
+    def flush(self):
+        self.current().flush()
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+def install_stdout_proxy():
+    """Replaces sys.stdout with a ContextStdout, once per process."""
+    with _install_lock:
+        if not isinstance(sys.stdout, ContextStdout):
+            sys.stdout = ContextStdout(sys.stdout)
+
+@contextmanager
+def capture_output():
+    """
+    Captures print output from the current context, including work it hands to a
+    ContextThreadPoolExecutor, into a StringIO.
+
+    Yields:
+    StringIO: The buffer; read it with getvalue() after the block.
+    """
+    install_stdout_proxy()
+    buffer = io.StringIO()
+    token = _output_buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _output_buffer.reset(token)
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in a copy of the submitting thread's context."""
+
+    def submit(self, fn, *args, **kwargs):
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
@@ -0,0 +1,267 @@
+import pandas as pd
+from datetime import datetime
+from output_capture import ContextThreadPoolExecutor
+from data_collection import (
+    fetch_team_batting, fetch_team_pitching, get_head_to_head_row, get_pitcher_index,
+    get_team_stats, get_team_rank, get_head_to_head, get_league_team_stats, get_pitcher_stats,
+    calculate_pythagorean_winning_percentage
+)
+from stats_history import get_team_stats_history
+from data_cache import memoize
+from tracing import traced
+from prediction_models import original_method, pairwise_win_probabilities, MODEL_METRICS
+from odds_calculations import calculate_adjusted_odds, calculate_edge
+from odds_normalization import remove_vig
+from betting_strategies import calculate_bet_size
+from utils import get_standings_table, get_team_win_percentage
+from data_processings import compare_metrics, calculate_team_score, prepare_matchup_data
+
+# Hardcoded values
+MAX_FETCH_WORKERS = 6
+PIPELINE_STAGES = ('fetch', 'model', 'odds', 'save')
+
+class PipelineCancelled(Exception):
+    """Raised at a stage boundary when the caller has cancelled the run."""
+
+def check_cancelled(is_cancelled):
+    if is_cancelled is not None and is_cancelled():
+        raise PipelineCancelled()
+
+def report_stage(stage, progress=None, is_cancelled=None):
+    """
+    Marks the start of a pipeline stage: raises PipelineCancelled if the run was cancelled,
+    otherwise calls progress(stage).
+    """
+    check_cancelled(is_cancelled)
+    if progress is not None:
+        progress(stage)
+
+@traced()
+def prefetch_matchup(year, max_workers=MAX_FETCH_WORKERS, is_cancelled=None, teams=()):
+    """
+    Runs every independent upstream fetch for a matchup concurrently on a bounded thread pool.
+
+    The season tables land in the in-process caches, so the lookups that follow
+    are memory reads. Failures are reported and left for the lookup stage to surface.
+
+    Args:
+    year (int): The season.
+    max_workers (int): Maximum number of concurrent fetches.
+    is_cancelled (callable): Checked as each fetch finishes; fetches not yet started are dropped on cancel.
+    teams (iterable): Teams whose head-to-head rows to load; only their schedules are fetched.
+    """
+    h2h_year = min(year, datetime.now().year)
+    fetches = [
+        (fetch_team_batting, (year,)),
+        (fetch_team_pitching, (year,)),
+        (get_pitcher_index, (year,)),
+        (get_standings_table, (year,)),
+    ]
+    fetches += [(get_head_to_head_row, (team, h2h_year)) for team in dict.fromkeys(teams)]
+
+    executor = ContextThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [(fetch.__name__, executor.submit(fetch, *args)) for fetch, args in fetches]
+        for name, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Prefetch {name} failed: {e}")
+            check_cancelled(is_cancelled)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+@traced()
+def lookup_matchup_data(home_team, away_team, pitcher_home, pitcher_away, year):
+    """
+    Reads a matchup's data from the season tables, which prefetch_matchup has already loaded.
+    Raises ValueError if a team's stats are missing.
+
+    Returns:
+    dict: Team stats, pitcher usage flags, head-to-head record, season win% and ranks.
+    """
+    home_team_stats, used_pitcher_stats_home = get_team_stats(home_team, year, pitcher_home)
+    away_team_stats, used_pitcher_stats_away = get_team_stats(away_team, year, pitcher_away)
+    h2h_wins, h2h_games = get_head_to_head(away_team, home_team, year)
+
+    return {
+        'home_team_stats': home_team_stats,
+        'away_team_stats': away_team_stats,
+        'used_pitcher_stats_home': used_pitcher_stats_home,
+        'used_pitcher_stats_away': used_pitcher_stats_away,
+        'h2h_wins': h2h_wins,
+        'h2h_games': h2h_games,
+        'home_win_pct': get_team_win_percentage(home_team, year),
+        'away_win_pct': get_team_win_percentage(away_team, year),
+        'home_rank': get_team_rank(home_team, year),
+        'away_rank': get_team_rank(away_team, year)
+    }
+
+def fetch_matchup_data(home_team, away_team, pitcher_home, pitcher_away, year, progress=None, is_cancelled=None):
+    """
+    Collects all upstream data for a matchup. Raises ValueError if a team's stats are missing.
+
+    progress and is_cancelled are the optional stage hooks described in report_stage.
+
+    Returns:
+    dict: Team stats, pitcher usage flags, head-to-head record, season win% and ranks.
+    """
+    report_stage('fetch', progress, is_cancelled)
+    prefetch_matchup(year, is_cancelled=is_cancelled, teams=(home_team, away_team))
+    check_cancelled(is_cancelled)
+    return lookup_matchup_data(home_team, away_team, pitcher_home, pitcher_away, year)
+
+def score_matchup(data, win_prob, implied_prob_home, implied_prob_away):
+    """
+    Computes the metric comparison, team scores and Pythagorean win% for a matchup.
+
+    Returns:
+    dict: better_metrics_home/away, home/away_score, home/away_pythag and pythag_diff.
+    """
+    home_team_stats = data['home_team_stats']
+    away_team_stats = data['away_team_stats']
+
+    # Metrics comparison and team scores
+    better_metrics_home, better_metrics_away = compare_metrics(home_team_stats, away_team_stats)
+    home_score = calculate_team_score(1 - win_prob, implied_prob_home, data['home_win_pct'],
+                                      data['home_rank'], better_metrics_home)
+    away_score = calculate_team_score(win_prob, implied_prob_away, data['away_win_pct'],
+                                      data['away_rank'], better_metrics_away)
+
+    # Pythagorean winning percentage
+    home_pythag = calculate_pythagorean_winning_percentage(home_team_stats['RunsScored'], home_team_stats['RunsAllowed'])
+    away_pythag = calculate_pythagorean_winning_percentage(away_team_stats['RunsScored'], away_team_stats['RunsAllowed'])
+
+    return {
+        'better_metrics_home': better_metrics_home,
+        'better_metrics_away': better_metrics_away,
+        'home_score': home_score,
+        'away_score': away_score,
+        'home_pythag': home_pythag,
+        'away_pythag': away_pythag,
+        'pythag_diff': home_pythag - away_pythag
+    }
+
+@traced()
+def compute_matchup(data, home_odds, away_odds, bankroll=None, max_edge=None, max_bet_percentage=None,
+                    progress=None, is_cancelled=None):
+    """
+    Runs the pure-compute stages (model, odds, edges, scores) on fetched matchup data.
+
+    Args:
+    data (dict): Output of fetch_matchup_data.
+    home_odds (float): Home team American odds.
+    away_odds (float): Away team American odds.
+    bankroll (float): If given with max_edge and max_bet_percentage, bet sizes are suggested.
+    progress, is_cancelled: Optional stage hooks, see report_stage.
+
+    Returns:
+    dict: The fetched data plus win_prob, no-vig implied probabilities, adjusted odds, edges,
+    bet sizes, metric comparison, team scores and Pythagorean win%.
+    """
+    home_team_stats = data['home_team_stats']
+    away_team_stats = data['away_team_stats']
+
+    # Win probability calculation (away team's probability of winning)
+    report_stage('model', progress, is_cancelled)
+    win_prob = original_method(away_team_stats, home_team_stats)
+
+    # No-vig implied probabilities from the two-way moneyline
+    report_stage('odds', progress, is_cancelled)
+    implied_prob_home, implied_prob_away = remove_vig(home_odds, away_odds)
+
+    # Adjusted odds and edges
+    home_adjusted_odds = calculate_adjusted_odds(home_odds, 1 - win_prob, implied_prob_home)
+    away_adjusted_odds = calculate_adjusted_odds(away_odds, win_prob, implied_prob_away)
+    edge_home = calculate_edge(home_adjusted_odds, home_odds)
+    edge_away = calculate_edge(away_adjusted_odds, away_odds)
+
+    bet_size_home = bet_size_away = None
+    if bankroll is not None:
+        bet_size_home = calculate_bet_size(edge_home, max_edge, max_bet_percentage, bankroll)
+        bet_size_away = calculate_bet_size(edge_away, max_edge, max_bet_percentage, bankroll)
+
+    results = dict(data)
+    results.update({
+        'home_odds': home_odds,
+        'away_odds': away_odds,
+        'win_prob': win_prob,
+        'implied_prob_home': implied_prob_home,
+        'implied_prob_away': implied_prob_away,
+        'home_adjusted_odds': home_adjusted_odds,
+        'away_adjusted_odds': away_adjusted_odds,
+        'edge_home': edge_home,
+        'edge_away': edge_away,
+        'bet_size_home': bet_size_home,
+        'bet_size_away': bet_size_away
+    })
+    results.update(score_matchup(data, win_prob, implied_prob_home, implied_prob_away))
+    return results
+
+def build_matchup_record(date_today, home_team, away_team, results):
+    """Formats computed matchup results as the row saved to the matchup log."""
+    return prepare_matchup_data(
+        date_today, home_team, away_team, results['home_rank'], results['away_rank'],
+        results['home_odds'], results['away_odds'],
+        results['home_adjusted_odds'], results['away_adjusted_odds'], results['win_prob'],
+        results['edge_home'], results['edge_away'], results['bet_size_home'], results['bet_size_away'],
+        results['better_metrics_home'], results['better_metrics_away'],
+        results['implied_prob_home'], results['implied_prob_away'],
+        results['home_win_pct'], results['away_win_pct'],
+        results['home_pythag'], results['away_pythag'], results['pythag_diff']
+    )
+
+def run_matchup(home_team, away_team, pitcher_home, pitcher_away, home_odds, away_odds, year=None,
+                progress=None, is_cancelled=None, **sizing):
+    """
+    Runs the full matchup pipeline: concurrent fetch, then model, odds and edge computation.
+
+    Extra keyword arguments (bankroll, max_edge, max_bet_percentage) are passed to compute_matchup.
+    """
+    if year is None:
+        year = datetime.now().year
+    data = fetch_matchup_data(home_team, away_team, pitcher_home, pitcher_away, year, progress, is_cancelled)
+    return compute_matchup(data, home_odds, away_odds, progress=progress, is_cancelled=is_cancelled, **sizing)
+
+@memoize(maxsize=64)
+def _win_probability_matrix(year, as_of, pitchers):
+    if as_of is not None:
+        team_stats = get_team_stats_history(year).frame(as_of)
+        pitcher_year = year - 1  # Same no-leak rule as get_team_stats(as_of=...)
+    else:
+        team_stats = get_league_team_stats(year)
+        pitcher_year = year
+
+    team_stats = team_stats.reindex(columns=MODEL_METRICS).astype(float)
+    for team, pitcher_name in pitchers:
+        if team not in team_stats.index:
+            continue
+        pitcher_stats = get_pitcher_stats(pitcher_name, pitcher_year)
+        if pitcher_stats is None:
+            continue
+        for metric in ('ERA', 'FIP', 'WHIP', 'LOB%'):
+            team_stats.at[team, metric] = pitcher_stats[metric]
+
+    probabilities = pairwise_win_probabilities(team_stats.to_numpy(), MODEL_METRICS)
+    return pd.DataFrame(probabilities, index=team_stats.index, columns=team_stats.index)
+
+@traced()
+def get_win_probability_matrix(year=None, as_of=None, pitchers=None):
+    """
+    Returns every team's win probability against every other team, from the league stats
+    table in one vectorized computation. Cached per (season, as-of date, pitcher context).
+
+    Args:
+    year (int): The season; defaults to the current year.
+    as_of (date): If given, use point-in-time stats from the morning of this date.
+    pitchers (dict): Optional team abbreviation -> starting pitcher name overrides.
+
+    Returns:
+    DataFrame: [row team, column team] is the row team's probability of beating the column team.
+    """
+    if year is None:
+        year = datetime.now().year
+    if as_of is not None:
+        as_of = pd.Timestamp(as_of).normalize()
+    pitcher_context = tuple(sorted((pitchers or {}).items()))
+    return _win_probability_matrix(year, as_of, pitcher_context)
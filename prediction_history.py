@@ -0,0 +1,323 @@
+import sqlite3
+import pandas as pd
+from datetime import datetime
+from tracing import traced
+from data_collection import fetch_schedule
+from utils import TEAM_ABBR_ALIASES, parse_game_date, schedule_game_number
+
+# Hardcoded values
+PREDICTION_DB_FILE = "mlb_predictions.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    home_team TEXT NOT NULL,
+    away_team TEXT NOT NULL,
+    game_number INTEGER NOT NULL DEFAULT 1,
+    home_rank INTEGER,
+    away_rank INTEGER,
+    home_odds REAL,
+    away_odds REAL,
+    home_adjusted_odds REAL,
+    away_adjusted_odds REAL,
+    home_win_prob REAL,
+    away_win_prob REAL,
+    home_edge REAL,
+    away_edge REAL,
+    home_bet_size REAL,
+    away_bet_size REAL,
+    home_metrics_better INTEGER,
+    away_metrics_better INTEGER,
+    home_implied_prob REAL,
+    away_implied_prob REAL,
+    home_season_win_pct REAL,
+    away_season_win_pct REAL,
+    home_score REAL,
+    away_score REAL,
+    home_pythag REAL,
+    away_pythag REAL,
+    pythag_diff REAL,
+    recorded_at TEXT NOT NULL,
+    superseded INTEGER NOT NULL DEFAULT 0,
+    home_won INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_date ON predictions (date);
+CREATE INDEX IF NOT EXISTS idx_predictions_home ON predictions (home_team, date);
+CREATE INDEX IF NOT EXISTS idx_predictions_away ON predictions (away_team, date);
+CREATE INDEX IF NOT EXISTS idx_predictions_home_edge ON predictions (home_edge, home_won);
+CREATE INDEX IF NOT EXISTS idx_predictions_away_edge ON predictions (away_edge, home_won);
+CREATE INDEX IF NOT EXISTS idx_predictions_game ON predictions (date, home_team, away_team, game_number) WHERE superseded = 0;
+
+CREATE TABLE IF NOT EXISTS outcomes (
+    date TEXT NOT NULL,
+    home_team TEXT NOT NULL,
+    away_team TEXT NOT NULL,
+    game_number INTEGER NOT NULL DEFAULT 1,
+    home_runs INTEGER,
+    away_runs INTEGER,
+    home_won INTEGER NOT NULL,
+    PRIMARY KEY (date, home_team, away_team, game_number)
+);
+
+-- The most recent prediction of each settled game
+CREATE VIEW IF NOT EXISTS settled_predictions AS
+SELECT * FROM predictions WHERE superseded = 0 AND home_won IS NOT NULL;
+
+-- One row per side of each settled prediction
+CREATE VIEW IF NOT EXISTS settled_sides AS
+SELECT date, home_team AS team, away_team AS opponent, 'home' AS side, home_win_prob AS win_prob,
+       home_odds AS odds, home_edge AS edge, home_bet_size AS bet_size, home_won AS won
+FROM settled_predictions
+UNION ALL
+SELECT date, away_team AS team, home_team AS opponent, 'away' AS side, away_win_prob AS win_prob,
+       away_odds AS odds, away_edge AS edge, away_bet_size AS bet_size, 1 - home_won AS won
+FROM settled_predictions;
+"""
+
+# Matchup record keys (prepare_matchup_data) -> (column, scale); percentages are stored as fractions
+RECORD_COLUMNS = {
+    'Home Rank': ('home_rank', 1), 'Away Rank': ('away_rank', 1),
+    'Home Odds': ('home_odds', 1), 'Away Odds': ('away_odds', 1),
+    'Home Adjusted Odds': ('home_adjusted_odds', 1), 'Away Adjusted Odds': ('away_adjusted_odds', 1),
+    'Home Win Probability %': ('home_win_prob', 0.01), 'Away Win Probability %': ('away_win_prob', 0.01),
+    'Home Edge': ('home_edge', 1), 'Away Edge': ('away_edge', 1),
+    'Home Kelly Bet Size': ('home_bet_size', 1), 'Away Kelly Bet Size': ('away_bet_size', 1),
+    'Home Metrics Better': ('home_metrics_better', 1), 'Away Metrics Better': ('away_metrics_better', 1),
+    'Home Implied Win %': ('home_implied_prob', 0.01), 'Away Implied Win %': ('away_implied_prob', 0.01),
+    'Home Season Win %': ('home_season_win_pct', 0.01), 'Away Season Win %': ('away_season_win_pct', 0.01),
+    'Home Score': ('home_score', 1), 'Away Score': ('away_score', 1),
+    'Home Pythagorean Win %': ('home_pythag', 0.01), 'Away Pythagorean Win %': ('away_pythag', 0.01),
+    'Pythagorean Win % Difference': ('pythag_diff', 0.01)
+}
+
+# Copies settled results onto the predictions they belong to, so analyses read one table
+SETTLE_SQL = """
+UPDATE predictions SET home_won = (
+    SELECT o.home_won FROM outcomes o
+    WHERE o.date = predictions.date AND o.home_team = predictions.home_team
+        AND o.away_team = predictions.away_team AND o.game_number = predictions.game_number
+)
+WHERE home_won IS NULL AND superseded = 0
+"""
+
+# American odds to decimal odds, in SQL
+DECIMAL_ODDS_SQL = "CASE WHEN odds > 0 THEN odds / 100.0 + 1 ELSE 100.0 / ABS(odds) + 1 END"
+
+_initialized = set()
+
+def connect(db_path=PREDICTION_DB_FILE):
+    """Opens the prediction database, creating the schema on first use in this process."""
+    connection = sqlite3.connect(db_path)
+    if db_path not in _initialized:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        _initialized.add(db_path)
+    return connection
+
+def iso_date(value):
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+def prediction_row(record, game_number=1):
+    """Converts a matchup record into a predictions row."""
+    row = {
+        'date': iso_date(record['Date']),
+        'home_team': record['Home Team'],
+        'away_team': record['Away Team'],
+        'game_number': game_number,
+        'recorded_at': datetime.now().isoformat(timespec='seconds')
+    }
+    for key, (column, scale) in RECORD_COLUMNS.items():
+        value = record.get(key)
+        row[column] = None if value is None or pd.isna(value) else float(value) * scale
+    return row
+
+@traced()
+def record_predictions(records, db_path=PREDICTION_DB_FILE, game_numbers=None):
+    """
+    Stores matchup records (from build_matchup_record / prepare_matchup_data) in one transaction.
+    Re-running a game adds a new row and marks the earlier ones superseded, so queries see
+    only the latest prediction per game.
+
+    game_numbers gives each record's game of a doubleheader (1 or 2), aligned with records;
+    by default every record is game 1.
+    """
+    if game_numbers is None:
+        game_numbers = [1] * len(records)
+    rows = [prediction_row(record, int(game_number)) for record, game_number in zip(records, game_numbers)]
+    if not rows:
+        return
+    columns = list(rows[0])
+    statement = f"INSERT INTO predictions ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"
+    with connect(db_path) as connection:
+        for row in rows:
+            connection.execute(
+                "UPDATE predictions SET superseded = 1 WHERE date = :date AND home_team = :home_team "
+                "AND away_team = :away_team AND game_number = :game_number AND superseded = 0", row)
+            connection.execute(statement, row)
+        # Results recorded before the prediction are joined in straight away
+        connection.execute(SETTLE_SQL)
+    connection.close()
+
+def record_prediction(record, db_path=PREDICTION_DB_FILE, game_number=1):
+    """Stores a single matchup record as the given game of the day between the two teams."""
+    record_predictions([record], db_path, [game_number])
+
+@traced()
+def record_outcomes(outcomes, db_path=PREDICTION_DB_FILE):
+    """
+    Stores settled results, replacing any earlier result for the same game.
+
+    Args:
+    outcomes (list or DataFrame): Rows with date, home_team, away_team, home_won and
+    optionally game_number, home_runs and away_runs.
+    """
+    if isinstance(outcomes, pd.DataFrame):
+        outcomes = outcomes.to_dict('records')
+    rows = [{
+        'date': iso_date(outcome['date']),
+        'home_team': outcome['home_team'],
+        'away_team': outcome['away_team'],
+        'game_number': int(outcome.get('game_number', 1)),
+        'home_runs': outcome.get('home_runs'),
+        'away_runs': outcome.get('away_runs'),
+        'home_won': int(outcome['home_won'])
+    } for outcome in outcomes]
+    with connect(db_path) as connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO outcomes (date, home_team, away_team, game_number, home_runs, away_runs, home_won) "
+            "VALUES (:date, :home_team, :away_team, :game_number, :home_runs, :away_runs, :home_won)", rows)
+        connection.execute(SETTLE_SQL)
+    connection.close()
+    return len(rows)
+
+def schedule_outcomes(team, year):
+    """Returns the completed home games of a team's schedule as outcome rows."""
+    schedule = fetch_schedule(year, team)
+    outcomes = []
+    for _, game in schedule[schedule['W/L'].notna()].iterrows():
+        if game.get('Home_Away') == '@':
+            continue
+        game_date = parse_game_date(game['Date'], year)
+        if pd.isna(game_date):
+            continue
+        outcomes.append({
+            'date': game_date,
+            'home_team': team,
+            'away_team': TEAM_ABBR_ALIASES.get(game['Opp'], game['Opp']),
+            'game_number': schedule_game_number(game['Date']),
+            'home_runs': int(game['R']) if pd.notna(game.get('R')) else None,
+            'away_runs': int(game['RA']) if pd.notna(game.get('RA')) else None,
+            'home_won': str(game['W/L']).startswith('W')
+        })
+    return outcomes
+
+def settle_predictions(db_path=PREDICTION_DB_FILE):
+    """
+    Joins in the results of every unsettled prediction from the home teams' schedules.
+
+    Returns:
+    int: Number of outcome rows stored.
+    """
+    connection = connect(db_path)
+    pending = connection.execute("""
+        SELECT DISTINCT home_team, CAST(substr(date, 1, 4) AS INTEGER)
+        FROM predictions
+        WHERE home_won IS NULL AND superseded = 0 AND date < date('now', 'localtime')
+    """).fetchall()
+    connection.close()
+
+    outcomes = []
+    for team, year in pending:
+        try:
+            outcomes.extend(schedule_outcomes(team, year))
+        except Exception as e:
+            print(f"Error settling {team} {year}: {e}")
+    return record_outcomes(outcomes, db_path) if outcomes else 0
+
+def run_query(sql, params=(), db_path=PREDICTION_DB_FILE):
+    connection = connect(db_path)
+    try:
+        return pd.read_sql_query(sql, connection, params=params)
+    finally:
+        connection.close()
+
+def date_filter(start_date, end_date):
+    clauses, params = [], []
+    if start_date is not None:
+        clauses.append("date >= ?")
+        params.append(iso_date(start_date))
+    if end_date is not None:
+        clauses.append("date <= ?")
+        params.append(iso_date(end_date))
+    return clauses, params
+
+def hit_rate_by_edge_bucket(bucket_size=0.05, min_edge=1.0, start_date=None, end_date=None, db_path=PREDICTION_DB_FILE):
+    """
+    Win rate of the sides the model favored, grouped by edge bucket.
+
+    Returns:
+    DataFrame: edge_from, edge_to, bets, wins, hit_rate and the mean model win probability.
+    """
+    clauses, params = date_filter(start_date, end_date)
+    clauses.append("edge > ?")
+    params.append(min_edge)
+    sql = f"""
+        SELECT ? + bucket * ? AS edge_from, ? + (bucket + 1) * ? AS edge_to,
+               COUNT(*) AS bets, SUM(won) AS wins, AVG(won) AS hit_rate, AVG(win_prob) AS mean_win_prob
+        FROM (SELECT CAST((edge - ?) / ? AS INTEGER) AS bucket, won, win_prob
+              FROM settled_sides WHERE {' AND '.join(clauses)})
+        GROUP BY bucket ORDER BY bucket
+    """
+    return run_query(sql, [min_edge, bucket_size, min_edge, bucket_size, min_edge, bucket_size] + params, db_path)
+
+def roi_by_team(min_edge=1.0, start_date=None, end_date=None, db_path=PREDICTION_DB_FILE):
+    """
+    Return on the sides with an edge above min_edge, per team bet on.
+
+    Returns:
+    DataFrame: bets, wins, flat-stake units won and ROI, plus the Kelly-sized stake, profit and ROI.
+    """
+    clauses, params = date_filter(start_date, end_date)
+    clauses.append("edge > ?")
+    params.append(min_edge)
+    sql = f"""
+        SELECT team, COUNT(*) AS bets, SUM(won) AS wins,
+               SUM(CASE WHEN won = 1 THEN decimal_odds - 1 ELSE -1 END) AS units,
+               AVG(CASE WHEN won = 1 THEN decimal_odds - 1 ELSE -1 END) AS flat_roi,
+               SUM(bet_size) AS staked,
+               SUM(CASE WHEN won = 1 THEN bet_size * (decimal_odds - 1) ELSE -bet_size END) AS profit,
+               SUM(CASE WHEN won = 1 THEN bet_size * (decimal_odds - 1) ELSE -bet_size END)
+                   / NULLIF(SUM(bet_size), 0) AS roi
+        FROM (SELECT team, won, COALESCE(bet_size, 0) AS bet_size, {DECIMAL_ODDS_SQL} AS decimal_odds
+              FROM settled_sides WHERE {' AND '.join(clauses)})
+        GROUP BY team ORDER BY units DESC
+    """
+    return run_query(sql, params, db_path)
+
+def calibration_by_probability_bin(bins=10, start_date=None, end_date=None, db_path=PREDICTION_DB_FILE):
+    """
+    Compares predicted and observed home win rates in equal-width probability bins.
+
+    Returns:
+    DataFrame: prob_from, prob_to, games, mean predicted probability and observed win rate.
+    """
+    clauses, params = date_filter(start_date, end_date)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"""
+        SELECT bin * 1.0 / ? AS prob_from, (bin + 1) * 1.0 / ? AS prob_to, COUNT(*) AS games,
+               AVG(home_win_prob) AS predicted, AVG(home_won) AS observed
+        FROM (SELECT MIN(CAST(home_win_prob * ? AS INTEGER), ? - 1) AS bin, home_win_prob, home_won
+              FROM settled_predictions {where})
+        GROUP BY bin ORDER BY bin
+    """
+    return run_query(sql, [bins, bins, bins, bins] + params, db_path)
+
+if __name__ == "__main__":
+    print(f"Settled {settle_predictions()} games.")
+    print("\nHit rate by edge bucket:")
+    print(hit_rate_by_edge_bucket().to_string(index=False))
+    print("\nROI by team:")
+    print(roi_by_team().to_string(index=False))
+    print("\nCalibration by probability bin:")
+    print(calibration_by_probability_bin().to_string(index=False))
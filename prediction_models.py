@@ -1,30 +1,39 @@
 import math
+import numpy as np
+from tracing import traced
 
-def original_method(team1_stats, team2_stats):
-    # Updated metrics with RBI and LOB%
-    metrics = {
-        'run_differential': 0.8884, 'OPS': 0.8321, 'SLG': 0.7997, 'OBP': 0.7663,
-        'ERA+': 0.7644, 'XBH': 0.7492, 'LOB%': 0.718, 'RAR': 0.6902, 'Hits': 0.687,
-        'ISO': 0.6832, 'ERA': 0.6446, 'FIP': 0.6393, 'WHIP': 0.6176, 'RBI': 0.575
-    }
+# Updated metrics with RBI and LOB%
+METRIC_R_SQUARED = {
+    'run_differential': 0.8884, 'OPS': 0.8321, 'SLG': 0.7997, 'OBP': 0.7663,
+    'ERA+': 0.7644, 'XBH': 0.7492, 'LOB%': 0.718, 'RAR': 0.6902, 'Hits': 0.687,
+    'ISO': 0.6832, 'ERA': 0.6446, 'FIP': 0.6393, 'WHIP': 0.6176, 'RBI': 0.575
+}
+
+# Apply exponential weighting to the R-squared values
+WEIGHT_POWER = 2  # You can adjust the power to control the degree of weighting
+_transformed_metrics = {k: v ** WEIGHT_POWER for k, v in METRIC_R_SQUARED.items()}
 
-    # Apply exponential weighting to the R-squared values
-    power = 2  # You can adjust the power to control the degree of weighting
-    transformed_metrics = {k: v ** power for k, v in metrics.items()}
+# Normalize the transformed metrics so the weights sum to 1, heaviest first
+_total_transformed = sum(_transformed_metrics.values())
+MODEL_WEIGHTS = sorted(
+    ((k, v / _total_transformed) for k, v in _transformed_metrics.items()),
+    key=lambda x: x[1], reverse=True
+)
+MODEL_METRICS = [metric for metric, _ in MODEL_WEIGHTS]
 
-    # Normalize the transformed metrics so the weights sum to 1
-    total_transformed = sum(transformed_metrics.values())
-    normalized_metrics = {k: v / total_transformed for k, v in transformed_metrics.items()}
+# Metrics that can be negative or zero and are shifted to make them positive
+SHIFTED_METRICS = ['run_differential', 'XBH', 'Hits', 'RBI']
 
-    # List of inverse metrics where lower values are better
-    inverse_metrics = ['ERA', 'FIP', 'WHIP']
+# List of inverse metrics where lower values are better
+MODEL_INVERSE_METRICS = ['ERA', 'FIP', 'WHIP']
 
+def original_method(team1_stats, team2_stats):
     # Initialize team1 and team2 scores
     team1_score = 0
     team2_score = 0
 
     # Iterate over each metric and calculate its contribution for both teams
-    for metric, weight in sorted(normalized_metrics.items(), key=lambda x: x[1], reverse=True):
+    for metric, weight in MODEL_WEIGHTS:
         if metric not in team1_stats or metric not in team2_stats:
             continue  # Skip this metric if it's missing from either team's stats
 
@@ -35,7 +44,7 @@ def original_method(team1_stats, team2_stats):
         if team1_value == 0 and team2_value == 0:
             team1_metric_value = 0.5
             team2_metric_value = 0.5
-        elif metric in ['run_differential', 'XBH', 'Hits', 'RBI']:
+        elif metric in SHIFTED_METRICS:
             # For metrics that can be negative or zero, shift the values to make them positive
             min_value = min(team1_value, team2_value)
             team1_shifted_value = team1_value - min_value + 1  # Add 1 to avoid division by zero
@@ -44,7 +53,7 @@ def original_method(team1_stats, team2_stats):
 
             team1_metric_value = team1_shifted_value / total_shifted_value
             team2_metric_value = team2_shifted_value / total_shifted_value
-        elif metric in inverse_metrics:
+        elif metric in MODEL_INVERSE_METRICS:
             # For inverse metrics, where lower values are better
             total = team1_value + team2_value
             if total == 0:
@@ -77,5 +86,89 @@ def original_method(team1_stats, team2_stats):
         team1_win_prob = 0.5
     else:
         team1_win_prob = max(0.01, min(0.99, team1_score / total_score))
-    
-    return team1_win_prob
\ No newline at end of file
+
+    return team1_win_prob
+
+def metric_matrix(stats_list, metrics=MODEL_METRICS):
+    """
+    Stacks stats dicts into an (N, M) array aligned with metrics; NaN marks a missing metric.
+    """
+    return np.array([[stats.get(metric, np.nan) for metric in metrics] for stats in stats_list], dtype=float)
+
+@traced()
+def original_method_batch(team1_values, team2_values, metrics=MODEL_METRICS):
+    """
+    Vectorized original_method over N matchups.
+
+    Applies the same shift, inverse and ratio rules with the precomputed MODEL_WEIGHTS,
+    accumulating metrics in the same order, so results match the scalar function exactly.
+
+    Args:
+    team1_values (ndarray): (N, M) metric values for the first team of each matchup.
+    team2_values (ndarray): (N, M) metric values for the second team, aligned with team1_values.
+    metrics (list): The M metric names of the columns. NaN marks a metric missing from a team's stats.
+
+    Returns:
+    ndarray: (N,) win probabilities for the first team.
+    """
+    team1_values = np.asarray(team1_values, dtype=float)
+    team2_values = np.asarray(team2_values, dtype=float)
+    columns = {metric: i for i, metric in enumerate(metrics)}
+
+    team1_score = np.zeros(team1_values.shape[0])
+    team2_score = np.zeros(team1_values.shape[0])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for metric, weight in MODEL_WEIGHTS:
+            if metric not in columns:
+                continue
+            team1_value = team1_values[:, columns[metric]]
+            team2_value = team2_values[:, columns[metric]]
+            present = ~(np.isnan(team1_value) | np.isnan(team2_value))
+            neutral = (team1_value == 0) & (team2_value == 0)
+
+            if metric in SHIFTED_METRICS:
+                min_value = np.minimum(team1_value, team2_value)
+                team1_shifted_value = team1_value - min_value + 1
+                team2_shifted_value = team2_value - min_value + 1
+                total_shifted_value = team1_shifted_value + team2_shifted_value
+                team1_metric_value = team1_shifted_value / total_shifted_value
+                team2_metric_value = team2_shifted_value / total_shifted_value
+            else:
+                total = team1_value + team2_value
+                neutral |= total == 0
+                if metric in MODEL_INVERSE_METRICS:
+                    team1_metric_value = 1 - (team1_value / total)
+                    team2_metric_value = 1 - (team2_value / total)
+                else:
+                    team1_metric_value = team1_value / total
+                    team2_metric_value = team2_value / total
+
+            team1_metric_value = np.where(neutral, 0.5, team1_metric_value)
+            team2_metric_value = np.where(neutral, 0.5, team2_metric_value)
+
+            team1_score += np.where(present, weight * team1_metric_value, 0.0)
+            team2_score += np.where(present, weight * team2_metric_value, 0.0)
+
+        total_score = team1_score + team2_score
+        team1_win_prob = np.clip(team1_score / total_score, 0.01, 0.99)
+
+    return np.where(total_score == 0, 0.5, team1_win_prob)
+
+@traced()
+def pairwise_win_probabilities(team_values, metrics=MODEL_METRICS):
+    """
+    Computes original_method for every ordered pair of teams in one batch.
+
+    Args:
+    team_values (ndarray): (T, M) metric values, one row per team.
+    metrics (list): The M metric names of the columns.
+
+    Returns:
+    ndarray: (T, T) matrix where [i, j] is team i's win probability against team j.
+    """
+    team_values = np.asarray(team_values, dtype=float)
+    team_count = team_values.shape[0]
+    team1_values = np.repeat(team_values, team_count, axis=0)
+    team2_values = np.tile(team_values, (team_count, 1))
+    return original_method_batch(team1_values, team2_values, metrics).reshape(team_count, team_count)
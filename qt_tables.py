@@ -0,0 +1,42 @@
+import numbers
+import pandas as pd
+from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt
+
+class NumericItem(QTableWidgetItem):
+    """Table cell that shows formatted text but sorts by its numeric value."""
+
+    def __init__(self, value, text):
+        super().__init__(text)
+        self.value = value
+
+    def __lt__(self, other):
+        if isinstance(other, NumericItem):
+            return self.value < other.value
+        return super().__lt__(other)
+
+def frame_to_table(frame, parent=None, float_format="{:.2f}"):
+    """
+    Builds a read-only, sortable QTableWidget from a DataFrame. Numeric columns sort
+    by value rather than by their formatted text; empty cells sort first.
+    """
+    table = QTableWidget(len(frame.index), len(frame.columns), parent)
+    table.setFont(QFont("Arial", 10))
+    table.setHorizontalHeaderLabels([str(column) for column in frame.columns])
+
+    for row, values in enumerate(frame.itertuples(index=False)):
+        for col, value in enumerate(values):
+            if value is None or (not isinstance(value, str) and pd.isna(value)):
+                item = NumericItem(float('-inf'), "")
+            elif isinstance(value, numbers.Number) and not isinstance(value, bool):
+                text = float_format.format(value) if isinstance(value, numbers.Real) and value != int(value) else str(int(value))
+                item = NumericItem(float(value), text)
+            else:
+                item = QTableWidgetItem(str(value))
+            item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            table.setItem(row, col, item)
+
+    table.setSortingEnabled(True)
+    table.resizeColumnsToContents()
+    return table
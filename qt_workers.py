@@ -0,0 +1,25 @@
+import threading
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+class MatchupSignals(QObject):
+    stage = pyqtSignal(int, str)  # job id, pipeline stage
+    finished = pyqtSignal(int, dict)  # job id, matchup inputs and results
+    failed = pyqtSignal(int, str)  # job id, error message
+    cancelled = pyqtSignal(int)  # job id
+
+class PipelineWorker(QRunnable):
+    """Base for pipeline jobs run off the GUI thread; reports each stage and can be cancelled."""
+
+    def __init__(self, job_id, label):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.job_id = job_id
+        self.label = label
+        self.signals = MatchupSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def progress(self, stage):
+        self.signals.stage.emit(self.job_id, stage)
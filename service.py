@@ -0,0 +1,273 @@
+import argparse
+import json
+import math
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+from pipeline import prefetch_matchup, lookup_matchup_data, compute_matchup, build_matchup_record
+from data_cache import memoize, memo_cache_info, CACHE_STATS
+from slate import score_slate
+from tracing import trace_rows
+from utils import TEAM_ABBRS, TEAM_ABBR_ALIASES, team_index
+
+# Hardcoded values
+HOST = "127.0.0.1"
+PORT = 8765
+LATENCY_WINDOW = 2048  # Recent request latencies kept per endpoint for the /metrics percentiles
+
+# Same sizing settings as main.py
+bankroll = 41
+max_bet_percentage = 25
+max_edge = 1.3
+
+@memoize(maxsize=8)
+def warm_season(year):
+    """
+    Loads a season's tables, pitcher index and standings into memory.
+
+    Memoized, so concurrent first requests for the same season share one prefetch and
+    every later request skips it. Every team's head-to-head row is loaded too, so
+    requests never fetch a schedule.
+    """
+    prefetch_matchup(year, teams=TEAM_ABBRS)
+    return datetime.now().isoformat(timespec='seconds')
+
+class RequestMetrics:
+    """Request counts, errors and recent latencies per endpoint."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.time()
+        self.counts = {}
+        self.errors = {}
+        self.latencies = {}
+        self.window = window
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, failed=False):
+        with self._lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            if failed:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            self.latencies.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+
+    def summary(self):
+        with self._lock:
+            endpoints = {}
+            for endpoint, latencies in self.latencies.items():
+                p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+                endpoints[endpoint] = {
+                    'requests': self.counts[endpoint],
+                    'errors': self.errors.get(endpoint, 0),
+                    'p50_ms': round(float(p50), 3),
+                    'p99_ms': round(float(p99), 3)
+                }
+        return {
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'endpoints': endpoints,
+            'disk_cache': dict(CACHE_STATS),
+            'memo_caches': memo_cache_info(),
+            'spans': trace_rows()
+        }
+
+METRICS = RequestMetrics()
+
+def record_to_json(record):
+    """Serializes a matchup record, with NumPy scalars as plain values and NaN as null."""
+    values = {}
+    for key, value in record.items():
+        if hasattr(value, 'item'):
+            value = value.item()
+        if isinstance(value, float) and math.isnan(value):
+            value = None
+        values[key] = value
+    return json.dumps(values)
+
+class BadRequest(Exception):
+    """A request field is missing or malformed; answered with 400."""
+
+def float_field(params, name, default=None):
+    """Reads a numeric request field, or default when it is absent."""
+    value = params.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"{name} must be a number, got {value!r}")
+
+def year_field(params):
+    value = params.get('year')
+    if value is None or value == '':
+        return datetime.now().year
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"year must be an integer, got {value!r}")
+
+def team_field(params, name):
+    """Reads a team abbreviation, accepting other seasons' codes (e.g. ATH for OAK)."""
+    team = str(params.get(name) or '').strip().upper()
+    if team_index(team) is None:
+        raise BadRequest(f"Unknown team for {name}: {params.get(name)!r}")
+    return TEAM_ABBR_ALIASES.get(team, team)
+
+def matchup(params):
+    """
+    Scores one matchup from request parameters.
+
+    Args:
+    params (dict): home, away, home_odds, away_odds; optional home_pitcher, away_pitcher,
+    year, bankroll, max_edge and max_bet_percentage.
+
+    Returns:
+    dict: The matchup record, as saved to the matchup log.
+    """
+    if not isinstance(params, dict):
+        raise BadRequest("Expected the matchup parameters as a JSON object.")
+    missing = [name for name in ('home', 'away', 'home_odds', 'away_odds') if params.get(name) in (None, '')]
+    if missing:
+        raise BadRequest(f"Missing parameters: {', '.join(missing)}")
+
+    home_team = team_field(params, 'home')
+    away_team = team_field(params, 'away')
+    home_odds = float_field(params, 'home_odds')
+    away_odds = float_field(params, 'away_odds')
+    sizing = {name: float_field(params, name, default)
+              for name, default in [('bankroll', bankroll), ('max_edge', max_edge),
+                                    ('max_bet_percentage', max_bet_percentage)]}
+    year = year_field(params)
+    warm_season(year)
+
+    data = lookup_matchup_data(home_team, away_team, params.get('home_pitcher') or None,
+                               params.get('away_pitcher') or None, year)
+    results = compute_matchup(data, home_odds, away_odds, **sizing)
+    return build_matchup_record(datetime.now().strftime('%Y-%m-%d'), home_team, away_team, results)
+
+def slate(payload):
+    """
+    Scores a list of games in one batch.
+
+    Args:
+    payload (dict or list): Either a list of games or {"games": [...], "year": ..., "kelly": ...}
+    with the optional sizing settings; each game has the load_slate columns.
+
+    Returns:
+    DataFrame: One row per game, as from score_slate.
+    """
+    if isinstance(payload, list):
+        payload = {'games': payload}
+    if not isinstance(payload, dict):
+        raise BadRequest("Expected a JSON list of games or an object with a games list.")
+    games = payload.get('games')
+    if not games or not isinstance(games, list):
+        raise BadRequest("No games in the slate.")
+    for number, game in enumerate(games, start=1):
+        if not isinstance(game, dict):
+            raise BadRequest(f"Game {number} is not a JSON object.")
+        game['home_team'] = team_field(game, 'home_team')
+        game['away_team'] = team_field(game, 'away_team')
+        for name in ('home_odds', 'away_odds'):
+            game[name] = float_field(game, name)
+
+    sizing = {name: float_field(payload, name, default)
+              for name, default in [('bankroll', bankroll), ('max_edge', max_edge),
+                                    ('max_bet_percentage', max_bet_percentage)]}
+    year = year_field(payload)
+    warm_season(year)
+    # warm_season holds the season tables, so skip score_slate's own prefetch
+    table, _ = score_slate(pd.DataFrame(games), year, kelly=bool(payload.get('kelly', False)),
+                           prefetch=False, **sizing)
+    return table
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    GET /matchup?home=NYY&away=BOS&home_odds=-150&away_odds=130 (or POST the same as JSON),
+    POST /slate with a JSON list of games, GET /metrics.
+    """
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so clients reuse one connection
+    disable_nagle_algorithm = True  # Headers and body are separate writes; don't hold the body back
+    quiet = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.dispatch(url.path, params)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self.send_json(400, json.dumps({'error': f"Invalid JSON: {e}"}))
+            return
+        self.dispatch(url.path, payload)
+
+    def dispatch(self, path, params):
+        start = time.perf_counter()
+        status = 200
+        try:
+            if path == '/matchup':
+                body = record_to_json(matchup(params))
+            elif path == '/slate':
+                body = slate(params).to_json(orient='records')
+            elif path == '/metrics':
+                body = json.dumps(METRICS.summary())
+            else:
+                status, body = 404, json.dumps({'error': f"Unknown endpoint {path}"})
+        except BadRequest as e:
+            status, body = 400, json.dumps({'error': str(e)})
+        except Exception as e:
+            print(f"Error handling {path}: {e}\n{traceback.format_exc()}")
+            status, body = 500, json.dumps({'error': str(e)})
+
+        self.send_json(status, body)
+        if path != '/metrics':
+            METRICS.record(path, time.perf_counter() - start, failed=status != 200)
+
+    def send_json(self, status, body):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+def serve(host=HOST, port=PORT, years=(), verbose=False):
+    """
+    Runs the prediction service until interrupted, warming the given seasons first.
+    """
+    for year in years:
+        print(f"Warming the {year} season...")
+        warm_season(year)
+
+    PredictionHandler.quiet = not verbose
+    server = ThreadingHTTPServer((host, port), PredictionHandler)
+    server.daemon_threads = True
+    print(f"Serving predictions on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve matchup and slate predictions over HTTP.")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--warm', nargs='*', type=int, default=[datetime.now().year],
+                        help="Seasons to load into memory at startup")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.warm, args.verbose)
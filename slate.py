@@ -0,0 +1,266 @@
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from output_capture import ContextThreadPoolExecutor
+from pipeline import (
+    prefetch_matchup, lookup_matchup_data, score_matchup, build_matchup_record,
+    report_stage, check_cancelled, MAX_FETCH_WORKERS
+)
+from prediction_models import metric_matrix, original_method_batch, MODEL_METRICS
+from odds_calculations import american_to_decimal_array, calculate_adjusted_odds_array, calculate_edge_array
+from odds_normalization import remove_vig
+from betting_strategies import calculate_bet_size_array, simultaneous_kelly
+from data_collection import fetch_schedule
+from matchup_log import append_matchups, MATCHUP_LOG_FILE
+from prediction_history import record_predictions
+from tracing import traced
+from utils import TEAM_ABBRS, TEAM_ABBR_ALIASES, parse_game_date, schedule_game_number
+
+# Hardcoded values (same sizing settings as main.py)
+bankroll = 41
+max_bet_percentage = 25
+max_edge = 1.3
+
+SLATE_COLUMNS = ['home_team', 'away_team', 'pitcher_home', 'pitcher_away', 'home_odds', 'away_odds', 'game_number']
+
+def normalize_slate(games):
+    """Fills in the optional slate columns and normalizes team abbreviations."""
+    games = pd.DataFrame(games).copy()
+    missing = {'home_team', 'away_team'} - set(games.columns)
+    if missing:
+        raise ValueError(f"Slate is missing columns: {', '.join(sorted(missing))}")
+    for column in SLATE_COLUMNS:
+        if column not in games.columns:
+            games[column] = None
+    for column in ('home_team', 'away_team'):
+        games[column] = games[column].str.strip().str.upper().map(lambda team: TEAM_ABBR_ALIASES.get(team, team))
+    for column in ('pitcher_home', 'pitcher_away'):
+        names = games[column].astype(object)
+        games[column] = names.where(names.notna() & (names.astype(str).str.strip() != ''), None)
+    for column in ('home_odds', 'away_odds'):
+        games[column] = pd.to_numeric(games[column], errors='coerce')
+    games['game_number'] = pd.to_numeric(games['game_number'], errors='coerce').fillna(1).astype(int)
+    return games.reset_index(drop=True)
+
+def load_slate(source):
+    """
+    Loads a day's games from a CSV or JSON schedule file (a path or an uploaded file object).
+
+    The file needs home_team and away_team columns; pitcher_home, pitcher_away,
+    home_odds, away_odds and game_number (2 for the second game of a doubleheader) are optional.
+    """
+    name = str(getattr(source, 'name', source))
+    if name.lower().endswith('.json'):
+        games = pd.read_json(source)
+    else:
+        games = pd.read_csv(source)
+    return normalize_slate(games)
+
+def slate_from_schedules(date, year=None):
+    """
+    Builds a day's slate from the cached team schedules, without pitchers or odds.
+
+    The result is a template: games without odds are not scored or saved, so fill in
+    home_odds and away_odds (and optionally the pitchers) before scoring it.
+    """
+    date = pd.Timestamp(date).normalize()
+    if year is None:
+        year = date.year
+
+    with ContextThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+        schedules = list(executor.map(lambda team: fetch_schedule(year, team), TEAM_ABBRS))
+
+    games = []
+    for team, schedule in zip(TEAM_ABBRS, schedules):
+        if schedule is None or schedule.empty:
+            continue
+        for _, game in schedule.iterrows():
+            if game.get('Home_Away') == '@' or parse_game_date(game['Date'], year) != date:
+                continue
+            games.append({'home_team': team, 'away_team': game['Opp'],
+                          'game_number': schedule_game_number(game['Date'])})
+    return normalize_slate(pd.DataFrame(games, columns=['home_team', 'away_team', 'game_number']))
+
+@traced()
+def score_slate(games, year=None, bankroll=bankroll, max_edge=max_edge, max_bet_percentage=max_bet_percentage,
+                kelly=False, progress=None, is_cancelled=None, prefetch=True):
+    """
+    Scores every game on a slate in one batch over the shared season tables.
+
+    The season tables are fetched once for the whole slate; win probabilities, no-vig
+    probabilities, edges and stakes are then computed as arrays across all games.
+
+    Args:
+    games (DataFrame): Output of load_slate or slate_from_schedules.
+    year (int): The season; defaults to the current year.
+    bankroll (float): Bankroll used to size stakes; None skips sizing.
+    kelly (bool): Size the slate with simultaneous_kelly instead of the per-bet ramp.
+    progress, is_cancelled: Optional stage hooks, see pipeline.report_stage.
+    prefetch (bool): Fetch the season tables first; callers that keep them warm pass False.
+
+    Returns:
+    tuple: (table, results) where table is one row per game and results is a list of
+    per-game results dicts (None for games that could not be scored).
+    """
+    if year is None:
+        year = datetime.now().year
+    games = normalize_slate(games)
+
+    report_stage('fetch', progress, is_cancelled)
+    if prefetch:
+        prefetch_matchup(year, is_cancelled=is_cancelled,
+                         teams=list(games['home_team']) + list(games['away_team']))
+        check_cancelled(is_cancelled)
+
+    data = []
+    errors = []
+    for game in games.itertuples(index=False):
+        try:
+            data.append(lookup_matchup_data(game.home_team, game.away_team, game.pitcher_home, game.pitcher_away, year))
+            errors.append(None)
+        except ValueError as e:
+            data.append(None)
+            errors.append(str(e))
+    scored = np.array([entry is not None for entry in data], dtype=bool)
+
+    # Away team first, as in compute_matchup
+    report_stage('model', progress, is_cancelled)
+    win_prob = np.full(len(games), np.nan)
+    if scored.any():
+        away_values = metric_matrix([entry['away_team_stats'] for entry in data if entry is not None], MODEL_METRICS)
+        home_values = metric_matrix([entry['home_team_stats'] for entry in data if entry is not None], MODEL_METRICS)
+        win_prob[scored] = original_method_batch(away_values, home_values, MODEL_METRICS)
+
+    report_stage('odds', progress, is_cancelled)
+    home_odds = games['home_odds'].to_numpy(dtype=float)
+    away_odds = games['away_odds'].to_numpy(dtype=float)
+    implied_prob_home, implied_prob_away = remove_vig(home_odds, away_odds)
+    home_adjusted_odds = calculate_adjusted_odds_array(home_odds, 1 - win_prob, implied_prob_home)
+    away_adjusted_odds = calculate_adjusted_odds_array(away_odds, win_prob, implied_prob_away)
+    edge_home = calculate_edge_array(home_adjusted_odds, home_odds)
+    edge_away = calculate_edge_array(away_adjusted_odds, away_odds)
+
+    stake_home = np.zeros(len(games))
+    stake_away = np.zeros(len(games))
+    if bankroll is not None:
+        if kelly:
+            # One candidate per game, the side with the higher expected return: the two sides of a
+            # game are mutually exclusive, while simultaneous_kelly treats its bets as independent
+            priced = scored & ~np.isnan(home_odds) & ~np.isnan(away_odds)
+            home_win_prob = 1 - win_prob[priced]
+            home_decimal = american_to_decimal_array(home_odds[priced])
+            away_decimal = american_to_decimal_array(away_odds[priced])
+            home_side = home_win_prob * home_decimal >= win_prob[priced] * away_decimal
+            stakes = simultaneous_kelly(
+                np.where(home_side, home_win_prob, win_prob[priced]),
+                np.where(home_side, home_decimal, away_decimal),
+                bankroll, max_bet_percentage=max_bet_percentage)
+            stake_home[priced] = np.where(home_side, stakes, 0.0)
+            stake_away[priced] = np.where(home_side, 0.0, stakes)
+        else:
+            stake_home = calculate_bet_size_array(np.nan_to_num(edge_home), max_edge, max_bet_percentage, bankroll)
+            stake_away = calculate_bet_size_array(np.nan_to_num(edge_away), max_edge, max_bet_percentage, bankroll)
+
+    results = []
+    for i, entry in enumerate(data):
+        if entry is None or np.isnan(home_odds[i]) or np.isnan(away_odds[i]):
+            if entry is not None:
+                errors[i] = "Missing odds; not scored or saved"
+            results.append(None)
+            continue
+        result = dict(entry)
+        result.update({
+            'home_odds': home_odds[i],
+            'away_odds': away_odds[i],
+            'win_prob': win_prob[i],
+            'implied_prob_home': implied_prob_home[i],
+            'implied_prob_away': implied_prob_away[i],
+            'home_adjusted_odds': home_adjusted_odds[i],
+            'away_adjusted_odds': away_adjusted_odds[i],
+            'edge_home': edge_home[i],
+            'edge_away': edge_away[i],
+            'bet_size_home': stake_home[i] if bankroll is not None else None,
+            'bet_size_away': stake_away[i] if bankroll is not None else None
+        })
+        result.update(score_matchup(entry, win_prob[i], implied_prob_home[i], implied_prob_away[i]))
+        results.append(result)
+
+    best_side = np.where(np.nan_to_num(edge_home) >= np.nan_to_num(edge_away), games['home_team'], games['away_team'])
+    best_edge = np.fmax(edge_home, edge_away)
+    table = pd.DataFrame({
+        'Home': games['home_team'],
+        'Away': games['away_team'],
+        'Home Pitcher': games['pitcher_home'],
+        'Away Pitcher': games['pitcher_away'],
+        'Home Odds': home_odds,
+        'Away Odds': away_odds,
+        'Home Win %': (1 - win_prob) * 100,
+        'Away Win %': win_prob * 100,
+        'Home Implied %': implied_prob_home * 100,
+        'Away Implied %': implied_prob_away * 100,
+        'Home Edge': edge_home,
+        'Away Edge': edge_away,
+        'Home Stake': stake_home,
+        'Away Stake': stake_away,
+        'Best Bet': np.where(best_edge > 1.00, best_side, ''),
+        'Error': [error or '' for error in errors]
+    })
+    return table, results
+
+def save_slate(games, results, date_today=None, log_file=MATCHUP_LOG_FILE, progress=None, is_cancelled=None):
+    """
+    Writes every scored game to the matchup log and the prediction history in one bulk write each.
+
+    Returns:
+    int: Number of matchups saved.
+    """
+    report_stage('save', progress, is_cancelled)
+    if date_today is None:
+        date_today = datetime.now().strftime('%Y-%m-%d')
+    games = normalize_slate(games)
+    saved = [(game, result) for game, result in zip(games.itertuples(index=False), results) if result is not None]
+    records = [build_matchup_record(date_today, game.home_team, game.away_team, result) for game, result in saved]
+    append_matchups(records, log_file)
+    record_predictions(records, game_numbers=[game.game_number for game, _ in saved])
+    return len(records)
+
+def run_slate(games, year=None, save=True, **options):
+    """
+    Scores a slate and, if save is set, writes the scored games in one bulk write.
+
+    Extra keyword arguments are passed to score_slate.
+
+    Returns:
+    DataFrame: One row per game.
+    """
+    table, results = score_slate(games, year, **options)
+    if save:
+        save_slate(games, results, progress=options.get('progress'), is_cancelled=options.get('is_cancelled'))
+    return table
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a full day's slate in one batch.")
+    parser.add_argument('schedule', nargs='?', help="CSV or JSON schedule file (home_team, away_team, "
+                                                    "pitcher_home, pitcher_away, home_odds, away_odds)")
+    parser.add_argument('--date', default=None, help="Write this date's games from the cached team schedules as a "
+                                                     "slate template to fill in with odds")
+    parser.add_argument('--year', type=int, default=None)
+    parser.add_argument('--kelly', action='store_true', help="Size stakes with the simultaneous Kelly optimizer")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    if args.schedule:
+        games = load_slate(args.schedule)
+    elif args.date:
+        games = slate_from_schedules(args.date, args.year)
+        template_file = f"slate_{pd.Timestamp(args.date):%Y-%m-%d}.csv"
+        games.to_csv(template_file, index=False)
+        print(f"Wrote {len(games)} games to {template_file}. Schedules have no odds: fill in home_odds "
+              f"and away_odds, then score the file with: python slate.py {template_file}")
+        raise SystemExit(0)
+    else:
+        parser.error("Give a schedule file or --date.")
+
+    table = run_slate(games, args.year, save=not args.no_save, kelly=args.kelly)
+    print(table.to_string(index=False))
@@ -0,0 +1,147 @@
+import re
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from output_capture import ContextThreadPoolExecutor
+from data_cache import cached_frame, upstream, memoize, save_arrays, load_arrays
+from tracing import traced
+from utils import TEAM_ABBRS, TEAM_INDEX, TEAM_STAT_COLUMNS
+
+# Hardcoded values
+GAME_LOG_FETCH_WORKERS = 6
+
+# Counting stats accumulated from the batting and pitching game logs
+BATTING_COUNTS = ['AB', 'R', 'H', '2B', '3B', 'HR', 'RBI', 'BB', 'HBP', 'SF']
+PITCHING_COUNTS = ['R', 'H', 'BB', 'HBP', 'HR']
+
+def fetch_game_logs(year, team, log_type):
+    return cached_frame('team_game_logs', year, upstream('team_game_logs'), year, team, log_type)
+
+def parse_game_dates(dates, year):
+    """Parses Baseball-Reference game log dates such as 'Apr 2 (1)' into Timestamps."""
+    cleaned = [re.sub(r'\(.*\)|susp', '', str(date)).strip() for date in dates]
+    return pd.to_datetime([f"{date} {year}" for date in cleaned], format='%b %d %Y', errors='coerce')
+
+def daily_counts(game_log, columns, year, dates):
+    """
+    Sums a game log's counting stats per calendar day and accumulates them so that
+    row d holds the totals of all games played before date d (the morning of d).
+
+    Returns:
+    ndarray: Shape (len(dates), len(columns)).
+    """
+    counts = pd.DataFrame(0.0, index=dates, columns=columns)
+    if game_log is None or game_log.empty:
+        return counts.to_numpy()
+
+    games = pd.DataFrame({
+        column: pd.to_numeric(game_log[column], errors='coerce') if column in game_log.columns else 0.0
+        for column in columns
+    }).fillna(0.0)
+    games.index = parse_game_dates(game_log['Date'], year)
+    games = games[games.index.notna()].groupby(level=0).sum()
+
+    counts = games.reindex(dates, fill_value=0.0)
+    return counts.cumsum().shift(1, fill_value=0.0).to_numpy()
+
+def safe_divide(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=float), where=denominator != 0)
+
+def team_metrics(batting, pitching):
+    """
+    Derives the TEAM_STAT_COLUMNS metrics from cumulative counting stats.
+
+    Args:
+    batting (ndarray): (..., len(BATTING_COUNTS)) cumulative batting counts.
+    pitching (ndarray): (..., len(PITCHING_COUNTS)) cumulative pitching counts.
+
+    Returns:
+    ndarray: (..., len(TEAM_STAT_COLUMNS)). RAR is not derivable from game logs and is 0,
+    which original_method treats as neutral when both teams have it.
+    """
+    ab, runs, hits, doubles, triples, homers, rbi, walks, hbp, sac_flies = np.moveaxis(batting, -1, 0)
+    runs_allowed, hits_allowed, walks_allowed, hbp_allowed, homers_allowed = np.moveaxis(pitching, -1, 0)
+
+    obp = safe_divide(hits + walks + hbp, ab + walks + hbp + sac_flies)
+    slg = safe_divide(hits + doubles + 2 * triples + 3 * homers, ab)
+    avg = safe_divide(hits, ab)
+    baserunners = hits_allowed + walks_allowed + hbp_allowed
+    lob_pct = safe_divide(baserunners - runs_allowed, baserunners - 1.4 * homers_allowed)
+
+    metrics = {
+        'run_differential': runs - runs_allowed,
+        'OPS': obp + slg,
+        'SLG': slg,
+        'OBP': obp,
+        'XBH': doubles + triples + homers,
+        'Hits': hits,
+        'ISO': slg - avg,
+        'RAR': np.zeros_like(runs),
+        'RBI': rbi,
+        'LOB%': lob_pct,
+        'RunsScored': runs,
+        'RunsAllowed': runs_allowed
+    }
+    return np.stack([metrics[column] for column in TEAM_STAT_COLUMNS], axis=-1)
+
+class TeamStatsHistory:
+    """Dense date x team x metric array of season-to-date team stats as they stood each morning."""
+
+    def __init__(self, dates, values):
+        self.dates = pd.DatetimeIndex(dates)
+        self.values = values
+
+    def date_position(self, as_of):
+        position = (pd.Timestamp(as_of).normalize() - self.dates[0]).days
+        return min(max(position, 0), len(self.dates) - 1)
+
+    def get(self, team, as_of):
+        """Returns a team's stats dict as of the morning of as_of, or None for an unknown team."""
+        team_position = TEAM_INDEX.get(team)
+        if team_position is None:
+            return None
+        row = self.values[self.date_position(as_of), team_position]
+        return dict(zip(TEAM_STAT_COLUMNS, row.tolist()))
+
+    def frame(self, as_of):
+        """Returns the league stats table (teams x metrics) as of the morning of as_of."""
+        return pd.DataFrame(self.values[self.date_position(as_of)],
+                            index=pd.Index(TEAM_ABBRS, name='Team'), columns=TEAM_STAT_COLUMNS)
+
+@traced()
+def build_team_stats_history(year):
+    """
+    Builds and persists the season's point-in-time stats array from every team's
+    batting and pitching game logs.
+    """
+    def fetch_logs(team):
+        return fetch_game_logs(year, team, 'batting'), fetch_game_logs(year, team, 'pitching')
+
+    with ContextThreadPoolExecutor(max_workers=GAME_LOG_FETCH_WORKERS) as executor:
+        logs = list(executor.map(fetch_logs, TEAM_ABBRS))
+
+    game_dates = pd.DatetimeIndex([])
+    for batting_log, _ in logs:
+        if batting_log is not None and not batting_log.empty:
+            game_dates = game_dates.append(parse_game_dates(batting_log['Date'], year).dropna())
+    if game_dates.empty:
+        raise ValueError(f"No game logs found for {year}.")
+
+    # One extra day so the morning after the last game holds the final totals
+    dates = pd.date_range(game_dates.min(), game_dates.max() + pd.Timedelta(days=1), freq='D')
+
+    batting = np.stack([daily_counts(batting_log, BATTING_COUNTS, year, dates) for batting_log, _ in logs], axis=1)
+    pitching = np.stack([daily_counts(pitching_log, PITCHING_COUNTS, year, dates) for _, pitching_log in logs], axis=1)
+    values = team_metrics(batting, pitching)
+
+    save_arrays(f"team_stats_history_{year}", dates=dates.values.astype('datetime64[D]'), values=values)
+    return TeamStatsHistory(dates, values)
+
+@memoize(maxsize=8)
+def get_team_stats_history(year):
+    """Returns the season's point-in-time stats store, loading a completed season from disk."""
+    if year < datetime.now().year:
+        store = load_arrays(f"team_stats_history_{year}")
+        if store is not None:
+            return TeamStatsHistory(store['dates'], store['values'])
+    return build_team_stats_history(year)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bankroll_simulation import simulate_seasons
+
+# An edge of 1.15 with max_edge 1.3 stakes half of the 25% maximum: 12.5% of the bankroll
+STAKE = 0.125
+
+def bets(count, win_prob, outcome=1):
+    return pd.DataFrame({'win_prob': [win_prob] * count, 'decimal_odds': [2.0] * count,
+                         'edge': [1.15] * count, 'outcome': [outcome] * count})
+
+def test_replay_of_wins_compounds_the_stake():
+    simulation = simulate_seasons(bets(10, 1.0), 100, max_edge=1.3, max_bet_percentage=25, seasons=5)
+    np.testing.assert_allclose(simulation['ending_bankroll'], 100 * (1 + STAKE) ** 10)
+    assert not simulation['max_drawdown'].any()
+    assert not simulation['ruined'].any()
+
+def test_replay_of_losses_shrinks_by_the_stake():
+    simulation = simulate_seasons(bets(10, 0.0), 100, max_edge=1.3, max_bet_percentage=25, seasons=5)
+    np.testing.assert_allclose(simulation['ending_bankroll'], 100 * (1 - STAKE) ** 10)
+
+def test_drawdown_and_ruin_on_a_losing_sequence():
+    # 0.875^17 is just above the 10% ruin line and 0.875^18 just below it
+    survived = simulate_seasons(bets(17, 0.0), 100, max_edge=1.3, max_bet_percentage=25, seasons=3)
+    ruined = simulate_seasons(bets(18, 0.0), 100, max_edge=1.3, max_bet_percentage=25, seasons=3)
+
+    np.testing.assert_allclose(survived['max_drawdown'], 1 - (1 - STAKE) ** 17)
+    np.testing.assert_allclose(ruined['max_drawdown'], 1 - (1 - STAKE) ** 18)
+    assert not survived['ruined'].any()
+    assert ruined['ruined'].all()
+
+def test_historical_outcomes_require_bootstrap_mode():
+    with pytest.raises(ValueError):
+        simulate_seasons(bets(5, 0.6), 100, seasons=5, mode='replay', outcomes='historical')
+    simulation = simulate_seasons(bets(5, 0.6, outcome=1), 100, max_edge=1.3, max_bet_percentage=25,
+                                  seasons=5, mode='bootstrap', outcomes='historical')
+    np.testing.assert_allclose(simulation['ending_bankroll'], 100 * (1 + STAKE) ** 5)
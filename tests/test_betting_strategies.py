@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from betting_strategies import simultaneous_kelly
+
+def test_single_bet_gets_half_kelly():
+    # Full Kelly for p=0.6 at even money is (0.6 * 2 - 1) / (2 - 1) = 0.2
+    np.testing.assert_allclose(simultaneous_kelly([0.6], [2.0]), [0.1], atol=1e-6)
+    np.testing.assert_allclose(simultaneous_kelly([0.6], [2.0], bankroll=200), [20.0], atol=1e-4)
+
+@pytest.mark.parametrize('bets', [2, 12, 13, 15, 20])
+def test_identical_bets_get_identical_stakes(bets):
+    stakes = simultaneous_kelly([0.6] * bets, [2.0] * bets)
+    assert np.ptp(stakes) == 0
+    assert stakes[0] > 0
+
+def test_stakes_are_continuous_across_slate_sizes():
+    # The combined stake is nearly the whole half-Kelly bankroll and shared evenly
+    per_bet = [simultaneous_kelly([0.6] * bets, [2.0] * bets)[0] for bets in range(10, 19)]
+    np.testing.assert_allclose(per_bet, [0.5 / bets for bets in range(10, 19)], rtol=0.01)
+
+def test_sampled_path_matches_exact_path():
+    rng = np.random.default_rng(1)
+    win_probs = rng.uniform(0.45, 0.65, 10)
+    decimal_odds = rng.uniform(1.8, 2.4, 10)
+    exact = simultaneous_kelly(win_probs, decimal_odds)
+    sampled = simultaneous_kelly(win_probs, decimal_odds, exact_max_scenarios=16)
+    np.testing.assert_allclose(sampled, exact, atol=2e-3)
+
+def test_combined_stakes_respect_max_total_percentage():
+    stakes = simultaneous_kelly([0.6] * 10, [2.0] * 10, max_total_percentage=20)
+    assert stakes.sum() <= 0.2 + 1e-9
+
+def test_single_stake_respects_max_bet_percentage():
+    stakes = simultaneous_kelly([0.7, 0.6], [2.0, 2.0], max_bet_percentage=5)
+    np.testing.assert_allclose(stakes, [0.05, 0.05])
+
+def test_negative_expectation_bets_get_nothing():
+    stakes = simultaneous_kelly([0.6, 0.4, 0.5], [2.0, 2.0, 2.0])
+    assert stakes[0] > 0
+    assert stakes[1] == 0
+    assert stakes[2] == 0
+    assert not simultaneous_kelly([0.3, 0.45], [2.5, 2.0]).any()
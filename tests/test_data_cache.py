@@ -0,0 +1,92 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+import data_cache
+from data_cache import cached_frame, snapshot_path, write_snapshot, save_arrays, load_arrays
+
+SEASON = 2020  # A completed season, so snapshots never go stale
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(data_cache, 'FORCE_REFRESH', False)
+    return tmp_path
+
+def counting_fetch(result):
+    calls = []
+
+    def fetch(*args, **kwargs):
+        calls.append((args, kwargs))
+        return result
+    return fetch, calls
+
+def test_frame_round_trip(cache_dir):
+    frame = pd.DataFrame({'Team': ['NYY', 'BOS'], 'W': [94, 81], 'ERA': [3.74, 4.04]})
+    fetch, calls = counting_fetch(frame)
+
+    first = cached_frame('team_batting', SEASON, fetch, SEASON)
+    second = cached_frame('team_batting', SEASON, fetch, SEASON)
+
+    assert len(calls) == 1
+    assert os.path.exists(snapshot_path('team_batting', SEASON, SEASON))
+    pd.testing.assert_frame_equal(first, frame)
+    pd.testing.assert_frame_equal(second, frame)
+
+def test_list_of_frames_round_trip(cache_dir):
+    parts = [pd.DataFrame({'Tm': ['NYY', 'BOS'], 'W': [94, 81]}),
+             pd.DataFrame({'Tm': ['CLE'], 'W': [92]})]
+    fetch, calls = counting_fetch(parts)
+
+    cached_frame('standings', SEASON, fetch, SEASON)
+    result = cached_frame('standings', SEASON, fetch, SEASON)
+
+    assert len(calls) == 1
+    assert len(result) == 2
+    for part, expected in zip(result, parts):
+        pd.testing.assert_frame_equal(part, expected)
+
+def test_arguments_are_part_of_the_key(cache_dir):
+    fetch, calls = counting_fetch(pd.DataFrame({'R': [1]}))
+    cached_frame('schedule_and_record', SEASON, fetch, SEASON, 'NYY')
+    cached_frame('schedule_and_record', SEASON, fetch, SEASON, 'BOS')
+    assert len(calls) == 2
+
+def test_refresh_refetches(cache_dir):
+    fetch, calls = counting_fetch(pd.DataFrame({'R': [1]}))
+    cached_frame('team_pitching', SEASON, fetch, SEASON)
+    cached_frame('team_pitching', SEASON, fetch, SEASON, refresh=True)
+    assert len(calls) == 2
+
+def test_current_season_snapshot_expires(cache_dir):
+    season = pd.Timestamp.now().year
+    fetch, calls = counting_fetch(pd.DataFrame({'R': [1]}))
+    cached_frame('team_pitching', season, fetch, season, ttl=0)
+    cached_frame('team_pitching', season, fetch, season, ttl=0)
+    assert len(calls) == 2
+
+def test_concurrent_writers_leave_one_readable_snapshot(cache_dir):
+    path = snapshot_path('team_batting', SEASON, SEASON)
+    frames = [pd.DataFrame({'Team': ['NYY'] * 500, 'W': [writer] * 500}) for writer in range(8)]
+    threads = [threading.Thread(target=write_snapshot, args=(path, frame)) for frame in frames]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    result = pd.read_parquet(path)
+    assert result['W'].nunique() == 1
+    assert [name for name in os.listdir(os.path.dirname(path)) if name.endswith('.tmp')] == []
+
+def test_concurrent_array_stores_leave_no_temp_files(cache_dir):
+    threads = [threading.Thread(target=save_arrays, args=('ratings',), kwargs={'values': np.full(1000, writer)})
+               for writer in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    values = load_arrays('ratings')['values']
+    assert len(set(values)) == 1
+    assert os.listdir(cache_dir) == ['ratings.npz']
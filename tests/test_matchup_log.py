@@ -0,0 +1,45 @@
+import pandas as pd
+from matchup_log import append_matchups, append_matchup, read_matchup_log, MATCHUP_LOG_COLUMNS
+
+def make_record(i):
+    record = {column: float(i) for column in MATCHUP_LOG_COLUMNS}
+    record.update({'Date': f"2024-06-{i + 1:02d}", 'Home Team': 'NYY', 'Away Team': 'BOS'})
+    return record
+
+def test_append_and_read(tmp_path):
+    log_file = str(tmp_path / 'log.csv')
+    append_matchups([make_record(0), make_record(1)], log_file)
+    append_matchup(make_record(2), log_file)
+
+    log = read_matchup_log(log_file)
+    assert list(log.columns) == MATCHUP_LOG_COLUMNS
+    assert list(log['Date']) == ['2024-06-01', '2024-06-02', '2024-06-03']
+    assert list(log['Home Edge']) == [0.0, 1.0, 2.0]
+
+def test_truncated_last_line_is_dropped(tmp_path):
+    log_file = tmp_path / 'log.csv'
+    append_matchups([make_record(0), make_record(1)], str(log_file))
+
+    # Simulate a crash halfway through writing a third row
+    with open(log_file, 'a', newline='') as f:
+        f.write('2024-06-03,NYY,BOS,4,5')
+
+    log = read_matchup_log(str(log_file))
+    assert len(log) == 2
+    assert not log[['Home Odds', 'Away Edge']].isna().any().any()
+
+def test_append_after_torn_row_starts_fresh_line(tmp_path):
+    log_file = tmp_path / 'log.csv'
+    append_matchups([make_record(0)], str(log_file))
+    with open(log_file, 'a', newline='') as f:
+        f.write('2024-06-02,NYY,BOS,4,5')
+
+    append_matchups([make_record(2)], str(log_file))
+
+    log = read_matchup_log(str(log_file))
+    assert list(log['Date']) == ['2024-06-01', '2024-06-03']
+
+def test_missing_log_reads_empty(tmp_path):
+    log = read_matchup_log(str(tmp_path / 'missing.csv'))
+    assert isinstance(log, pd.DataFrame)
+    assert log.empty
@@ -0,0 +1,92 @@
+import threading
+import time
+from data_cache import MemoCache, memoize
+
+def test_hit_after_miss():
+    cache = MemoCache(maxsize=4, ttl=60)
+    assert cache.get_or_compute('a', lambda: 1) == 1
+    assert cache.get_or_compute('a', lambda: 2) == 1
+    assert cache.info()['hits'] == 1
+    assert cache.info()['misses'] == 1
+
+def test_entries_expire_after_ttl():
+    cache = MemoCache(maxsize=4, ttl=0.05)
+    cache.get_or_compute('a', lambda: 1)
+    time.sleep(0.1)
+    assert cache.get_or_compute('a', lambda: 2) == 2
+
+def test_least_recently_used_entry_is_evicted():
+    cache = MemoCache(maxsize=2, ttl=60)
+    cache.get_or_compute('a', lambda: 'a')
+    cache.get_or_compute('b', lambda: 'b')
+    cache.get_or_compute('a', lambda: 'stale')  # 'a' becomes most recently used
+    cache.get_or_compute('c', lambda: 'c')      # evicts 'b'
+
+    assert cache.get_or_compute('a', lambda: 'new') == 'a'
+    assert cache.get_or_compute('b', lambda: 'new') == 'new'
+    assert cache.info()['size'] == 2
+
+def test_concurrent_misses_compute_once():
+    cache = MemoCache(maxsize=4, ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ['value'] * 8
+
+def test_failed_lookup_is_retried():
+    responses = [(None, None), (3, 5)]
+
+    @memoize(maxsize=4, ttl=60)
+    def head_to_head(team1, team2):
+        return responses.pop(0)
+
+    assert head_to_head('NYY', 'BOS') == (None, None)
+    assert head_to_head('NYY', 'BOS') == (3, 5)
+    assert head_to_head('NYY', 'BOS') == (3, 5)
+
+def test_none_is_not_cached():
+    responses = [None, 'frame']
+
+    @memoize(maxsize=4, ttl=60)
+    def fetch(year):
+        return responses.pop(0)
+
+    assert fetch(2024) is None
+    assert fetch(2024) == 'frame'
+
+def test_head_to_head_error_is_not_cached(monkeypatch):
+    import numpy as np
+    import data_collection
+    from utils import TEAM_ABBRS, team_index
+
+    games = np.zeros(len(TEAM_ABBRS), dtype=np.int32)
+    wins = np.zeros(len(TEAM_ABBRS), dtype=np.int32)
+    games[team_index('BOS')] = 5
+    wins[team_index('BOS')] = 3
+
+    calls = []
+    def row(team, year):
+        calls.append(team)
+        if len(calls) == 1:
+            raise ConnectionError("network down")
+        return wins, games
+
+    monkeypatch.setattr(data_collection, 'get_head_to_head_row', row)
+    data_collection.get_head_to_head.cache_clear()
+
+    assert data_collection.get_head_to_head('NYY', 'BOS', 2023) == (None, None)
+    assert data_collection.get_head_to_head('NYY', 'BOS', 2023) == (3, 5)
+    data_collection.get_head_to_head.cache_clear()
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from odds_calculations import (
+    american_to_decimal, decimal_to_american, calculate_adjusted_odds, calculate_edge,
+    american_to_decimal_array, decimal_to_american_array, calculate_adjusted_odds_array, calculate_edge_array
+)
+from betting_strategies import calculate_bet_size, calculate_bet_size_array
+
+rng = np.random.default_rng(0)
+AMERICAN_ODDS = np.concatenate([rng.uniform(-400, -100, 100), rng.uniform(100, 400, 100), [-100, 100, -110, 150]])
+PREDICTED = rng.uniform(0.05, 0.95, len(AMERICAN_ODDS))
+
+def test_american_to_decimal_array_matches_scalar():
+    expected = [american_to_decimal(odds) for odds in AMERICAN_ODDS]
+    np.testing.assert_allclose(american_to_decimal_array(AMERICAN_ODDS), expected, rtol=1e-12)
+
+def test_decimal_to_american_array_matches_scalar():
+    decimal_odds = american_to_decimal_array(AMERICAN_ODDS)
+    expected = [decimal_to_american(odds) for odds in decimal_odds]
+    np.testing.assert_allclose(decimal_to_american_array(decimal_odds), expected, rtol=1e-12)
+
+def test_adjusted_odds_and_edge_arrays_match_scalar():
+    implied = 1 / american_to_decimal_array(AMERICAN_ODDS)
+    adjusted = calculate_adjusted_odds_array(AMERICAN_ODDS, PREDICTED, implied)
+    expected_adjusted = [calculate_adjusted_odds(odds, predicted, implied_prob)
+                         for odds, predicted, implied_prob in zip(AMERICAN_ODDS, PREDICTED, implied)]
+    np.testing.assert_allclose(adjusted, expected_adjusted, rtol=1e-12)
+
+    expected_edge = [calculate_edge(adjusted_odds, odds) for adjusted_odds, odds in zip(adjusted, AMERICAN_ODDS)]
+    np.testing.assert_allclose(calculate_edge_array(adjusted, AMERICAN_ODDS), expected_edge, rtol=1e-12)
+
+def test_bet_size_array_matches_scalar():
+    edges = rng.uniform(0.5, 1.5, 200)
+    expected = [calculate_bet_size(edge, 1.3, 25, 41) or 0.0 for edge in edges]
+    np.testing.assert_allclose(calculate_bet_size_array(edges, 1.3, 25, 41), expected, rtol=1e-12)
+
+def test_array_functions_keep_series_index():
+    odds = pd.Series([-150.0, 130.0], index=['NYY', 'BOS'], name='odds')
+    result = american_to_decimal_array(odds)
+    assert isinstance(result, pd.Series)
+    assert list(result.index) == ['NYY', 'BOS']
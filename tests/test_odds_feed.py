@@ -0,0 +1,79 @@
+import json
+import math
+import pandas as pd
+from odds_feed import OddsFeed, parse_quote, LINE_HISTORY_SIZE
+
+def quote(game='BOS@NYY', book='book1', side='home', price=-150, timestamp='2024-04-04 12:00'):
+    return {'game': game, 'book': book, 'side': side, 'price': price, 'timestamp': timestamp}
+
+def write_jsonl(path, quotes, mode='a'):
+    with open(path, mode) as f:
+        for record in quotes:
+            f.write(json.dumps(record) + '\n')
+
+def test_parse_quote_rejects_bad_prices():
+    assert parse_quote(quote(price=-150))['price'] == -150
+    for price in (0, 50, -99.5, 'nan', 'inf', float('nan'), 'abc', None):
+        assert parse_quote(quote(price=price)) is None
+
+def test_zero_price_line_is_skipped(tmp_path):
+    path = str(tmp_path / 'feed.jsonl')
+    write_jsonl(path, [quote(price=0), quote(side='away', price='nan'), quote(book='book2', price=-140)])
+    with open(path, 'a') as f:
+        f.write('{"game": "BOS@NYY", "book"\n')  # Malformed JSON
+
+    feed = OddsFeed(path)
+    assert feed.poll() == {'BOS@NYY'}
+    assert feed.best['BOS@NYY'] == (-140.0, None)
+    assert not any(math.isnan(price) for price in feed.best_prices()['home_odds'])
+
+def test_partial_last_line_is_left_for_the_next_poll(tmp_path):
+    path = str(tmp_path / 'feed.jsonl')
+    line = json.dumps(quote(price=-150))
+    with open(path, 'w') as f:
+        f.write(line + '\n' + line[:20])
+
+    feed = OddsFeed(path)
+    assert len(feed.read_lines()) == 1
+    assert feed.read_lines() == []
+
+    with open(path, 'a') as f:
+        f.write(line[20:] + '\n')
+    assert feed.read_lines() == [line]
+
+def test_apply_reports_only_games_whose_line_moved(tmp_path):
+    feed = OddsFeed(str(tmp_path / 'feed.jsonl'))
+    first = [parse_quote(quote(game=game, side=side, price=price))
+             for game in ('BOS@NYY', 'LAD@SFG') for side, price in (('home', -150), ('away', 130))]
+    assert feed.apply(first) == {'BOS@NYY', 'LAD@SFG'}
+
+    # A worse price from another book leaves the best line unchanged
+    assert feed.apply([parse_quote(quote(game='LAD@SFG', book='book2', price=-170))]) == set()
+    assert feed.apply([parse_quote(quote(game='BOS@NYY', book='book2', price=-140))]) == {'BOS@NYY'}
+    assert feed.best['BOS@NYY'] == (-140.0, 130.0)
+
+def test_line_history_is_bounded(tmp_path):
+    feed = OddsFeed(str(tmp_path / 'feed.jsonl'))
+    moves = LINE_HISTORY_SIZE + 10
+    for move in range(moves):
+        feed.apply([parse_quote(quote(price=-1000 + move, timestamp=pd.Timestamp('2024-04-04') + pd.Timedelta(minutes=move)))])
+
+    history = feed.line_history('BOS@NYY')
+    assert len(history) == LINE_HISTORY_SIZE
+    assert history['home_odds'].iloc[0] == -1000 + moves - LINE_HISTORY_SIZE
+    assert history['home_odds'].iloc[-1] == -1000 + moves - 1
+
+def test_csv_header_is_read_once_across_polls(tmp_path):
+    path = str(tmp_path / 'feed.csv')
+    with open(path, 'w') as f:
+        f.write('game,book,side,price,timestamp\n')
+        f.write('BOS@NYY,book1,home,-150,2024-04-04 12:00\n')
+
+    feed = OddsFeed(path)
+    assert feed.poll() == {'BOS@NYY'}
+
+    with open(path, 'a') as f:
+        f.write('BOS@NYY,book1,away,130,2024-04-04 12:01\n')
+    assert feed.poll() == {'BOS@NYY'}
+    assert feed.best['BOS@NYY'] == (-150.0, 130.0)
+    assert feed.header == ['game', 'book', 'side', 'price', 'timestamp']
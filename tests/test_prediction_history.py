@@ -0,0 +1,63 @@
+import sqlite3
+import pandas as pd
+import prediction_history
+from prediction_history import record_prediction, record_outcomes, settle_predictions
+
+def prediction(date, home_team, away_team, home_win_prob):
+    return {'Date': date, 'Home Team': home_team, 'Away Team': away_team,
+            'Home Odds': -120, 'Away Odds': 110,
+            'Home Win Probability %': home_win_prob, 'Away Win Probability %': 100 - home_win_prob,
+            'Home Edge': 1.1, 'Away Edge': 0.9}
+
+def settled(db_path):
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute(
+            "SELECT date, home_team, away_team, game_number, home_won FROM predictions "
+            "WHERE superseded = 0 ORDER BY date, game_number").fetchall()
+    finally:
+        connection.close()
+
+def test_outcome_settles_matching_prediction(tmp_path):
+    db_path = str(tmp_path / 'predictions.sqlite')
+    record_prediction(prediction('2024-04-04', 'NYY', 'BOS', 60), db_path)
+    record_prediction(prediction('2024-04-05', 'NYY', 'BOS', 55), db_path)
+
+    record_outcomes([{'date': '2024-04-04', 'home_team': 'NYY', 'away_team': 'BOS', 'home_won': True}], db_path)
+
+    assert settled(db_path) == [('2024-04-04', 'NYY', 'BOS', 1, 1), ('2024-04-05', 'NYY', 'BOS', 1, None)]
+
+def test_rerun_prediction_supersedes_earlier_one(tmp_path):
+    db_path = str(tmp_path / 'predictions.sqlite')
+    record_prediction(prediction('2024-04-04', 'NYY', 'BOS', 60), db_path)
+    record_prediction(prediction('2024-04-04', 'NYY', 'BOS', 52), db_path)
+    record_outcomes([{'date': '2024-04-04', 'home_team': 'NYY', 'away_team': 'BOS', 'home_won': False}], db_path)
+
+    calibration = prediction_history.calibration_by_probability_bin(db_path=db_path)
+    assert calibration['games'].sum() == 1
+    assert calibration['predicted'].iloc[0] == 0.52
+
+def test_outcome_recorded_before_prediction_is_joined(tmp_path):
+    db_path = str(tmp_path / 'predictions.sqlite')
+    record_outcomes([{'date': '2024-04-04', 'home_team': 'NYY', 'away_team': 'BOS', 'home_won': False}], db_path)
+    record_prediction(prediction('2024-04-04', 'NYY', 'BOS', 60), db_path)
+
+    assert settled(db_path) == [('2024-04-04', 'NYY', 'BOS', 1, 0)]
+
+def test_settle_doubleheader_from_schedule(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'predictions.sqlite')
+    record_prediction(prediction('2024-04-04', 'NYY', 'BOS', 60), db_path, game_number=1)
+    record_prediction(prediction('2024-04-04', 'NYY', 'BOS', 40), db_path, game_number=2)
+
+    schedule = pd.DataFrame({
+        'Date': ['Thursday, Apr 4 (1)', 'Thursday, Apr 4 (2)', 'Friday, Apr 5'],
+        'Home_Away': ['Home', 'Home', '@'],
+        'Opp': ['BOS', 'BOS', 'BOS'],
+        'W/L': ['W', 'L', 'W'],
+        'R': [5, 2, 4],
+        'RA': [3, 6, 1]
+    })
+    monkeypatch.setattr(prediction_history, 'fetch_schedule', lambda year, team: schedule)
+
+    assert settle_predictions(db_path) == 2
+    assert settled(db_path) == [('2024-04-04', 'NYY', 'BOS', 1, 1), ('2024-04-04', 'NYY', 'BOS', 2, 0)]
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from prediction_models import original_method, original_method_batch, metric_matrix, MODEL_METRICS
+
+def random_stats(rng, missing=()):
+    stats = {}
+    for metric in MODEL_METRICS:
+        if metric in missing:
+            continue
+        # Mix in zeros and negatives so the neutral and shifted branches are exercised
+        stats[metric] = float(rng.choice([0.0, rng.normal(0, 50), rng.uniform(0, 5)]))
+    return stats
+
+@pytest.mark.parametrize('seed', range(5))
+def test_batch_matches_scalar_on_random_inputs(seed):
+    rng = np.random.default_rng(seed)
+    team1_stats, team2_stats = [], []
+    for _ in range(200):
+        missing = rng.choice(MODEL_METRICS, size=rng.integers(0, 3), replace=False)
+        team1_stats.append(random_stats(rng, missing))
+        team2_stats.append(random_stats(rng))
+
+    expected = [original_method(team1, team2) for team1, team2 in zip(team1_stats, team2_stats)]
+    batch = original_method_batch(metric_matrix(team1_stats), metric_matrix(team2_stats), MODEL_METRICS)
+
+    np.testing.assert_allclose(batch, expected, rtol=0, atol=1e-12)
+
+def test_batch_matches_scalar_when_all_metrics_are_zero():
+    zeros = {metric: 0.0 for metric in MODEL_METRICS}
+    batch = original_method_batch(metric_matrix([zeros]), metric_matrix([zeros]), MODEL_METRICS)
+    assert batch[0] == original_method(zeros, zeros) == 0.5
@@ -0,0 +1,196 @@
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Hardcoded values (VORTEX_TRACE=0 turns tracing off; the decorators then return the plain functions)
+TRACE_ENABLED = os.environ.get('VORTEX_TRACE', '1') not in ('', '0')
+# One line per span per reported run; beside the default .cache directory unless VORTEX_TRACE_FILE is set
+TRACE_FILE = os.environ.get(
+    'VORTEX_TRACE_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mlb_trace.jsonl')
+)
+
+TRACE_COLUMNS = ['Span', 'Calls', 'Total s', 'Mean ms', 'Max ms', 'Memo Hits', 'Memo Misses', 'Disk Hits', 'Disk Misses']
+
+# Aggregated statistics by span name
+_stats = {}
+_stats_lock = threading.Lock()
+
+# Names of the spans open in the current context, innermost last
+_open_spans = contextvars.ContextVar('open_spans', default=())
+
+def _new_entry():
+    return {'calls': 0, 'total': 0.0, 'max': 0.0,
+            'memo_hits': 0, 'memo_misses': 0, 'disk_hits': 0, 'disk_misses': 0}
+
+@contextmanager
+def span(name):
+    """
+    Times a block as one call of the named span. Spans nest; wall time is inclusive
+    of any spans opened inside the block.
+    """
+    if not TRACE_ENABLED:
+        yield
+        return
+    token = _open_spans.set(_open_spans.get() + (name,))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _close_span(name, token, start)
+
+def _close_span(name, token, start):
+    elapsed = time.perf_counter() - start
+    _open_spans.reset(token)
+    with _stats_lock:
+        entry = _stats.get(name)
+        if entry is None:
+            entry = _stats[name] = _new_entry()
+        entry['calls'] += 1
+        entry['total'] += elapsed
+        if elapsed > entry['max']:
+            entry['max'] = elapsed
+
+def module_name(module):
+    """Names a module run as a script (__main__) after its file, so spans match the imported module's."""
+    if module == '__main__':
+        path = getattr(sys.modules['__main__'], '__file__', None)
+        if path:
+            return os.path.splitext(os.path.basename(path))[0]
+    return module
+
+def traced(name=None):
+    """
+    Decorator that records every call of the function as a span, named module.function by default.
+
+    Meant for the pipeline stages (fetch, compute, score, log), not for small helpers called
+    once per game, where the bookkeeping would cost more than the call. Put it above @memoize
+    so memo hits and misses are counted against the function's span.
+    """
+    def decorator(func):
+        if not TRACE_ENABLED:
+            return func
+        span_name = name or f"{module_name(func.__module__)}.{func.__qualname__}"
+
+        # Same bookkeeping as span(), inlined because hot functions go through here
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _open_spans.set(_open_spans.get() + (span_name,))
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _close_span(span_name, token, start)
+        return wrapper
+    return decorator
+
+def record_cache(layer, hit):
+    """
+    Counts a cache lookup against the innermost open span.
+
+    Args:
+    layer (str): 'memo' for the in-process caches, 'disk' for the Parquet snapshots.
+    hit (bool): Whether the lookup was served from the cache.
+    """
+    open_spans = _open_spans.get()
+    if not open_spans:
+        return
+    key = f"{layer}_{'hits' if hit else 'misses'}"
+    with _stats_lock:
+        entry = _stats.get(open_spans[-1])
+        if entry is None:
+            entry = _stats[open_spans[-1]] = _new_entry()
+        entry[key] += 1
+
+def trace_snapshot():
+    """Returns a copy of the aggregated span statistics."""
+    with _stats_lock:
+        return {name: dict(entry) for name, entry in _stats.items()}
+
+def merge_trace(snapshot):
+    """Adds span statistics collected elsewhere (e.g. in a worker process) to this process's."""
+    with _stats_lock:
+        for name, other in snapshot.items():
+            entry = _stats.get(name)
+            if entry is None:
+                entry = _stats[name] = _new_entry()
+            for key, value in other.items():
+                entry[key] = max(entry[key], value) if key == 'max' else entry[key] + value
+
+def reset_trace():
+    with _stats_lock:
+        _stats.clear()
+
+def call_with_trace(func, *args, **kwargs):
+    """
+    Calls func with fresh span statistics and returns (result, trace_snapshot()).
+
+    Used to run work in a worker process and send its spans back for merge_trace.
+    """
+    reset_trace()
+    result = func(*args, **kwargs)
+    return result, trace_snapshot()
+
+def trace_rows(snapshot=None):
+    """Returns one summary row per span, slowest total first."""
+    if snapshot is None:
+        snapshot = trace_snapshot()
+    rows = []
+    for name, entry in snapshot.items():
+        rows.append({
+            'Span': name,
+            'Calls': entry['calls'],
+            'Total s': entry['total'],
+            'Mean ms': (entry['total'] / entry['calls']) * 1000 if entry['calls'] else 0.0,
+            'Max ms': entry['max'] * 1000,
+            'Memo Hits': entry['memo_hits'],
+            'Memo Misses': entry['memo_misses'],
+            'Disk Hits': entry['disk_hits'],
+            'Disk Misses': entry['disk_misses']
+        })
+    rows.sort(key=lambda row: row['Total s'], reverse=True)
+    return rows
+
+def trace_summary():
+    """Returns the span statistics as a DataFrame, slowest total first."""
+    import pandas as pd
+    return pd.DataFrame(trace_rows(), columns=TRACE_COLUMNS)
+
+def format_trace_summary():
+    """Formats the span statistics as a plain-text table."""
+    rows = trace_rows()
+    if not rows:
+        return "No spans recorded."
+    width = max(len('Span'), max(len(row['Span']) for row in rows))
+    lines = [f"{'Span':<{width}} {'Calls':>8} {'Total s':>9} {'Mean ms':>9} {'Max ms':>9} "
+             f"{'Memo H/M':>11} {'Disk H/M':>9}"]
+    for row in rows:
+        lines.append(
+            f"{row['Span']:<{width}} {row['Calls']:>8} {row['Total s']:>9.3f} {row['Mean ms']:>9.3f} "
+            f"{row['Max ms']:>9.3f} {row['Memo Hits']:>5}/{row['Memo Misses']:<5} "
+            f"{row['Disk Hits']:>4}/{row['Disk Misses']:<4}"
+        )
+    return '\n'.join(lines)
+
+def write_trace(run, trace_file=TRACE_FILE):
+    """
+    Appends the span statistics to the JSON lines trace file, one line per span.
+
+    Args:
+    run (str): Label for the run, e.g. 'matchup NYY-BOS' or 'backtest'.
+    trace_file (str): The JSON lines file.
+
+    Returns:
+    int: Number of spans written.
+    """
+    recorded_at = datetime.now().isoformat(timespec='seconds')
+    rows = trace_rows()
+    with open(trace_file, 'a') as f:
+        for row in rows:
+            f.write(json.dumps({'run': run, 'recorded_at': recorded_at, **row}) + '\n')
+    return len(rows)
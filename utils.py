@@ -1,7 +1,7 @@
+import re
 import pandas as pd
-from openpyxl import load_workbook
-import os
-import pybaseball as pb
+from data_cache import cached_frame, upstream, memoize
+from tracing import traced
 
 # Team abbreviation to full name mapping
 TEAM_ABBR_TO_NAME = {
@@ -17,53 +17,130 @@ TEAM_ABBR_TO_NAME = {
     'TEX': 'Texas Rangers', 'TOR': 'Toronto Blue Jays', 'WSN': 'Washington Nationals'
 }
 
+# Fixed team order for league-wide arrays, and each team's position in it
+TEAM_ABBRS = sorted(TEAM_ABBR_TO_NAME)
+TEAM_INDEX = {abbr: i for i, abbr in enumerate(TEAM_ABBRS)}
+
+# Baseball-Reference codes from other seasons for franchises in TEAM_ABBR_TO_NAME
+TEAM_ABBR_ALIASES = {'ATH': 'OAK', 'ANA': 'LAA', 'CAL': 'LAA', 'FLA': 'MIA', 'TBD': 'TBR', 'MON': 'WSN'}
+
+def team_index(team):
+    """Returns a team's position in TEAM_ABBRS, or None for an unknown abbreviation."""
+    return TEAM_INDEX.get(TEAM_ABBR_ALIASES.get(team, team))
+
+# Names older standings use for franchises in TEAM_ABBR_TO_NAME
+TEAM_NAME_ALIASES = {
+    'Cleveland Indians': 'CLE', 'Athletics': 'OAK', 'Florida Marlins': 'MIA',
+    'Tampa Bay Devil Rays': 'TBR', 'Anaheim Angels': 'LAA', 'Los Angeles Angels of Anaheim': 'LAA',
+    'Montreal Expos': 'WSN'
+}
+
+# Full name to team abbreviation mapping
+TEAM_NAME_TO_ABBR = {name: abbr for abbr, name in TEAM_ABBR_TO_NAME.items()}
+TEAM_NAME_TO_ABBR.update(TEAM_NAME_ALIASES)
+
 # Lists of good and inverse metrics
 GOOD_METRICS = ['run_differential', 'OPS', 'SLG', 'OBP', 'XBH', 'Hits', 'ISO', 'RAR', 'RBI', 'LOB%']
 INVERSE_METRICS = ['ERA', 'FIP', 'WHIP', 'ERA-', 'FIP-', 'R', 'ER']
 
-def save_to_excel(data, output_file):
-    """Saves matchup data to an Excel sheet without overwriting existing formatting."""
-    df = pd.DataFrame([data])
-
-    if os.path.exists(output_file):
-        # Load existing workbook
-        book = load_workbook(output_file)
-        
-        # Get the active sheet
-        sheet = book.active
-        
-        # Find the next empty row
-        next_row = sheet.max_row + 1
-        
-        # Write new data
-        for col, value in enumerate(df.iloc[0], start=1):
-            sheet.cell(row=next_row, column=col, value=value)
-        
-        # Save the workbook
-        book.save(output_file)
-    else:
-        # If file doesn't exist, create a new one
-        df.to_excel(output_file, index=False)
+# Team-level metrics in the league stats table, in column order
+TEAM_STAT_COLUMNS = [
+    'run_differential', 'OPS', 'SLG', 'OBP', 'XBH', 'Hits', 'ISO', 'RAR', 'RBI', 'LOB%',
+    'RunsScored', 'RunsAllowed'
+]
 
-def get_team_win_percentage(team, year):
+@traced()
+@memoize(maxsize=16)
+def fetch_standings(year):
+    """Returns the list of division standings frames for a season, via the on-disk cache."""
+    return cached_frame('standings', year, upstream('standings'), year)
+
+def clean_date(date_str):
+    """
+    Clean the date string to handle doubleheaders and ensure a standard format.
+    """
+    clean_date_str = re.sub(r'\(.*\)', '', date_str).strip()
+    return clean_date_str
+
+def parse_game_date(date_str, year):
+    """
+    Parse a schedule date such as 'Sunday, Apr 4 (1)' into a Timestamp for the given season.
+    """
+    return pd.to_datetime(f"{clean_date(date_str)} {year}", format='%A, %b %d %Y', errors='coerce')
+
+def schedule_game_number(date_str):
+    """Returns the game of a doubleheader a schedule date such as 'Sunday, Apr 4 (2)' refers to, else 1."""
+    doubleheader = re.search(r'\((\d)\)', str(date_str))
+    return int(doubleheader.group(1)) if doubleheader else 1
+
+def parse_games_back(value):
+    """Converts a standings GB cell ('--' for the division leader) to a float."""
     try:
-        standings_list = pb.standings(year)
-        standings = pd.concat(standings_list)
-        team_name = TEAM_ABBR_TO_NAME.get(team, team)
-        
-        team_row = standings[standings['Tm'] == team_name]
-        if not team_row.empty:
-            wins = int(team_row['W'].values[0])
-            losses = int(team_row['L'].values[0])
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+@traced()
+@memoize(maxsize=16)
+def get_standings_table(year):
+    """
+    Builds one standings table for a season, keyed by team abbreviation.
+
+    Each entry holds W, L, win_pct, division_rank, league_rank, GB, league and division.
+    Ranks are computed from win percentage, not from the position of the row in the
+    concatenated division frames.
+    """
+    standings_list = fetch_standings(year)
+    al_divisions = len(standings_list) // 2  # pb.standings lists the AL divisions first
+    table = {}
+
+    for division_index, division in enumerate(standings_list):
+        division_teams = []
+        for _, row in division.iterrows():
+            abbr = TEAM_NAME_TO_ABBR.get(row['Tm'])
+            if abbr is None:
+                print(f"Unknown team '{row['Tm']}' in {year} standings.")
+                continue
+            wins = int(row['W'])
+            losses = int(row['L'])
             games = wins + losses
-            if games > 0:
-                win_pct = wins / games
-                return win_pct
-            else:
-                return 0.000
+            table[abbr] = {
+                'W': wins,
+                'L': losses,
+                'win_pct': wins / games if games > 0 else 0.000,
+                'GB': parse_games_back(row.get('GB')),
+                'league': 'AL' if division_index < al_divisions else 'NL',
+                'division': division_index
+            }
+            division_teams.append(abbr)
+
+        # Stable sort keeps the published order for teams tied on win%
+        division_teams.sort(key=lambda abbr: table[abbr]['win_pct'], reverse=True)
+        for rank, abbr in enumerate(division_teams, start=1):
+            table[abbr]['division_rank'] = rank
+
+    for league in ('AL', 'NL'):
+        league_teams = [abbr for abbr, row in table.items() if row['league'] == league]
+        league_teams.sort(key=lambda abbr: table[abbr]['win_pct'], reverse=True)
+        for rank, abbr in enumerate(league_teams, start=1):
+            table[abbr]['league_rank'] = rank
+
+    return table
+
+def get_standings_row(team, year):
+    """Returns a team's standings entry, accepting an abbreviation or a full team name."""
+    abbr = TEAM_NAME_TO_ABBR.get(team, team)
+    return get_standings_table(year).get(abbr)
+
+@memoize(maxsize=256)
+def get_team_win_percentage(team, year):
+    try:
+        team_row = get_standings_row(team, year)
+        if team_row is not None:
+            return team_row['win_pct']
         else:
-            print(f"Team '{team}' ({team_name}) not found in standings.")
+            print(f"Team '{team}' ({TEAM_ABBR_TO_NAME.get(team, team)}) not found in standings.")
             return None
     except Exception as e:
         print(f"Error fetching win percentage: {e}")
-        return None
\ No newline at end of file
+        return None